@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Synthetic Edit Generator for TamperCheck
+Build labelled benchmark corpora from original generations
+
+Each original produces many edited variants with exact ground-truth spans.
+Edit operations mirror the hand edits in manual_edit_test.py:
+
+- synonym:   'precision' -> 'accuracy'
+- insertion: 'a robot' -> 'a small robot'
+- deletion:  'the paint brush' -> 'the brush'
+- typo:      'little' -> 'litte'
+- number:    '38' -> '24', 'three' -> 'five'
+
+The corpus is JSON Lines (optionally .gz): one 'original' record per source
+text followed by its 'variant' records, which reference the original by id
+instead of repeating the prompt and text. Spans are [start, end) character
+offsets; 'span' is in the variant text and 'original_span' in the original.
+
+Usage:
+    python edit_generator.py --sources test_data_*.json scientific_validation_results.json
+    python edit_generator.py --sources original_*.txt --variants 50 --edits 1:3 --output corpus.jsonl.gz
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import random
+import argparse
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+OPERATIONS = ('synonym', 'insertion', 'deletion', 'typo', 'number')
+
+# Prompt used for the robot story when a source file carries none
+DEFAULT_PROMPT = "Write a short story about a robot learning to paint. Keep it to 2-3 sentences."
+
+SYNONYMS = {
+    'precision': ['accuracy', 'exactness'],
+    'longed': ['wanted', 'yearned'],
+    'way': ['manner', 'fashion'],
+    'beautiful': ['splendid', 'lovely', 'gorgeous'],
+    'creativity': ['art', 'imagination'],
+    'robot': ['android', 'machine'],
+    'paint': ['sculpt', 'draw'],
+    'small': ['little', 'tiny'],
+    'big': ['large', 'huge'],
+    'large': ['big', 'huge'],
+    'happy': ['glad', 'joyful'],
+    'quickly': ['rapidly', 'swiftly'],
+    'slowly': ['gradually', 'steadily'],
+    'important': ['crucial', 'vital'],
+    'help': ['assist', 'aid'],
+    'helps': ['assists', 'aids'],
+    'use': ['utilize', 'employ'],
+    'uses': ['utilizes', 'employs'],
+    'learn': ['master', 'study'],
+    'learned': ['mastered', 'studied'],
+    'create': ['make', 'produce'],
+    'creating': ['making', 'producing'],
+    'discovered': ['found', 'uncovered'],
+    'joy': ['delight', 'pleasure'],
+    'start': ['begin', 'commence'],
+    'began': ['started', 'commenced'],
+    'finally': ['eventually', 'ultimately'],
+    'eventually': ['finally', 'ultimately'],
+    'improve': ['enhance', 'boost'],
+    'improves': ['enhances', 'boosts'],
+    'benefits': ['advantages', 'perks'],
+    'regular': ['routine', 'frequent'],
+    'simple': ['easy', 'basic'],
+    'bright': ['vivid', 'brilliant'],
+    'sky': ['heavens', 'horizon'],
+    'energy': ['power', 'fuel'],
+    'process': ['procedure', 'mechanism'],
+    'child': ['kid', 'youngster'],
+    'proud': ['pleased', 'delighted'],
+}
+
+INSERTIONS = ['small', 'little', 'very', 'really', 'also', 'then', 'suddenly', 'quite', 'always', 'one day,']
+
+NUMBER_WORDS = ['one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten', 'eleven', 'twelve']
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def _match_case(word, replacement):
+    """Carry the capitalization of word over to replacement"""
+    if word.isupper() and len(word) > 1:
+        return replacement.upper()
+    if word[:1].isupper():
+        return replacement[:1].upper() + replacement[1:]
+    return replacement
+
+
+def _typo(word, rng):
+    """Drop, double or transpose one interior letter"""
+    i = rng.randrange(1, len(word) - 1)
+    kind = rng.choice(('drop', 'double', 'transpose'))
+    if kind == 'drop':
+        return word[:i] + word[i + 1:]
+    if kind == 'double':
+        return word[:i] + word[i] + word[i:]
+    if word[i] == word[i + 1]:
+        return word[:i] + word[i + 1:]
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def _new_number(digits, rng):
+    """A different number of similar magnitude"""
+    n = int(digits)
+    while True:
+        candidate = rng.randint(max(0, n // 2), n * 2 + 10)
+        if candidate != n:
+            return str(candidate)
+
+
+def _candidates(op, words, text):
+    """(word index, original start, original end, replacement factory) for op"""
+    out = []
+    for i, w in enumerate(words):
+        word = w.group()
+        lower = word.lower()
+        if op == 'synonym' and lower in SYNONYMS:
+            out.append((i, w.start(), w.end(),
+                        lambda rng, word=word: _match_case(word, rng.choice(SYNONYMS[word.lower()]))))
+        elif op == 'insertion' and i > 0:
+            out.append((i, w.start(), w.start(), lambda rng: rng.choice(INSERTIONS) + " "))
+        elif op == 'deletion' and i > 0 and text[w.start() - 1] == " ":
+            # Remove the word together with the space before it
+            out.append((i, w.start() - 1, w.end(), lambda rng: ""))
+        elif op == 'typo' and word.isalpha() and len(word) >= 4:
+            out.append((i, w.start(), w.end(), lambda rng, word=word: _typo(word, rng)))
+        elif op == 'number' and word.isdigit():
+            out.append((i, w.start(), w.end(), lambda rng, word=word: _new_number(word, rng)))
+        elif op == 'number' and lower in NUMBER_WORDS:
+            out.append((i, w.start(), w.end(),
+                        lambda rng, word=word: _match_case(word, rng.choice([n for n in NUMBER_WORDS if n != word.lower()]))))
+    return out
+
+
+def apply_edits(text, count=1, operations=OPERATIONS, seed=0):
+    """
+    Apply up to count non-overlapping random edits to text.
+
+    Args:
+        text: The original text
+        count: Number of edits to attempt
+        operations: Edit operations to choose from
+        seed: Seed for a reproducible variant
+
+    Returns:
+        (edited_text, edits) where each edit is a dict with 'op', 'span',
+        'original_span', 'before' and 'after'. Operations with no
+        candidate in the text (e.g. number on a text without numbers)
+        are skipped, so fewer than count edits may be returned.
+    """
+    rng = random.Random(seed)
+    words = list(WORD_PATTERN.finditer(text))
+    pools = {op: _candidates(op, words, text) for op in operations}
+
+    planned = []
+    used = set()
+    for _ in range(count):
+        available = [op for op in operations if any(c[0] not in used for c in pools[op])]
+        if not available:
+            break
+        op = rng.choice(available)
+        index, start, end, make = rng.choice([c for c in pools[op] if c[0] not in used])
+        # Claim the neighbours too so edits never touch each other
+        used.update((index - 1, index, index + 1))
+        planned.append((start, end, make(rng), op))
+
+    planned.sort()
+    edited = []
+    edits = []
+    cursor = 0
+    offset = 0
+    for start, end, replacement, op in planned:
+        edited.append(text[cursor:start])
+        new_start = start + offset
+        after = replacement.rstrip() if op == 'insertion' else replacement
+        edits.append({
+            'op': op,
+            'span': [new_start, new_start + len(after)],
+            'original_span': [start, end],
+            'before': text[start:end],
+            'after': after
+        })
+        edited.append(replacement)
+        offset += len(replacement) - (end - start)
+        cursor = end
+    edited.append(text[cursor:])
+
+    return "".join(edited), edits
+
+
+def load_originals(paths, prompt=DEFAULT_PROMPT):
+    """
+    Collect original generations as {'id', 'prompt', 'text'} dicts.
+
+    Understands test_data_*.json (interactive_test.py), validation results
+    (type 'original' cases), {'text', 'context'} result files
+    (test_original.py), existing corpora and plain .txt files.
+    """
+    originals = []
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"Skipping missing source: {path}")
+            continue
+
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if path.endswith(('.jsonl', '.jsonl.gz')):
+            originals.extend({k: r[k] for k in ('id', 'prompt', 'text')}
+                             for r in read_corpus(path) if r['kind'] == 'original')
+        elif path.endswith('.txt'):
+            with open(path, 'r', encoding='utf-8') as f:
+                originals.append({'id': stem, 'prompt': prompt, 'text': f.read().strip()})
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict) and 'original_text' in data:
+                context = data.get('context') or [{'content': prompt}]
+                originals.append({'id': stem, 'prompt': context[-1]['content'], 'text': data['original_text']})
+            elif isinstance(data, dict) and 'individual_tests' in data:
+                for test in data['individual_tests']:
+                    if test.get('type', 'original') == 'original':
+                        originals.append({'id': f"{stem}:{test['test_id']}", 'prompt': test['prompt'], 'text': test['text']})
+            elif isinstance(data, dict) and 'text' in data:
+                originals.append({'id': stem, 'prompt': data.get('context', prompt), 'text': data['text']})
+            else:
+                print(f"Skipping unrecognized source: {path}")
+
+    return originals
+
+
+def _open(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def write_corpus(path, originals, variants=10, edits=(1, 3), operations=OPERATIONS, seed=0):
+    """
+    Stream a corpus to path, one JSON record per line.
+
+    Returns:
+        (number of originals, number of variants) written
+    """
+    written = 0
+    with _open(path, 'w') as f:
+        for i, original in enumerate(originals):
+            f.write(json.dumps(dict(original, kind='original'), ensure_ascii=False) + "\n")
+            for v in range(variants):
+                variant_seed = f"{seed}:{original['id']}:{v}"
+                count = random.Random(variant_seed).randint(*edits)
+                text, spans = apply_edits(original['text'], count, operations, seed=variant_seed)
+                if not spans:
+                    continue
+                f.write(json.dumps({
+                    'kind': 'variant',
+                    'id': f"{original['id']}__v{v:03d}",
+                    'original': original['id'],
+                    'text': text,
+                    'edits': spans
+                }, ensure_ascii=False) + "\n")
+                written += 1
+    return len(originals), written
+
+
+def read_corpus(path):
+    """
+    Iterate corpus records; variants get the original's prompt and text
+    filled in as 'prompt' and 'original_text'
+    """
+    originals = {}
+    with _open(path, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record['kind'] == 'original':
+                originals[record['id']] = record
+            else:
+                source = originals[record['original']]
+                record['prompt'] = source['prompt']
+                record['original_text'] = source['text']
+            yield record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate labelled edited variants of original generations")
+    parser.add_argument("--sources", nargs="+", required=True, help="Files holding original generations")
+    parser.add_argument("--variants", type=int, default=10, help="Variants per original")
+    parser.add_argument("--edits", default="1:3", help="Edits per variant (n or min:max)")
+    parser.add_argument("--ops", default=",".join(OPERATIONS), help="Comma-separated edit operations")
+    parser.add_argument("--prompt", default=DEFAULT_PROMPT, help="Prompt for sources that carry none (.txt)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output", default="edit_corpus.jsonl", help="Corpus path (.jsonl or .jsonl.gz)")
+    args = parser.parse_args()
+
+    operations = tuple(args.ops.split(","))
+    for op in operations:
+        if op not in OPERATIONS:
+            parser.error(f"unknown edit operation: {op}")
+    lo, _, hi = args.edits.partition(":")
+    edits = (int(lo), int(hi or lo))
+
+    originals = load_originals(args.sources, args.prompt)
+    n_originals, n_variants = write_corpus(args.output, originals, args.variants, edits, operations, args.seed)
+
+    print(f"✓ Wrote {n_originals} originals and {n_variants} variants to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
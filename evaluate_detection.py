@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Detection Evaluation Harness
+Score TamperDetector against known edits
+
+For every original/edited pair in a directory (test_data_*.json from
+interactive_test.py, original_*/edited_*.txt pairs, or edit_generator.py
+corpora) the true edit spans are derived by diffing the two texts at token
+level. The edited text is then analyzed and the flagged tokens and
+suspicious regions are joined against those spans by character offset, so
+every scoring strategy can be evaluated the same way whatever its token
+positions mean.
+
+Reports token-level and region-level precision/recall/F1 plus latency and
+cost per document.
+
+Usage:
+    python evaluate_detection.py                      # test data in the current directory
+    python evaluate_detection.py data/ --workers 8 --rpm 500 --strategy prefix
+"""
+
+import os
+import sys
+import glob
+import json
+import difflib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+from colorama import Fore, Style, init as colorama_init
+
+from tampercheck import TamperDetector, RateLimiter, ProbabilityLevel, TOKEN_PATTERN, UsageStats
+from edit_generator import DEFAULT_PROMPT, read_corpus
+
+colorama_init(autoreset=True)
+
+
+def load_pairs(directory):
+    """
+    Collect {'id', 'context', 'original', 'edited'} documents from a directory
+    """
+    documents = []
+    stamps = set()
+
+    for path in sorted(glob.glob(os.path.join(directory, "test_data_*.json"))):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        stamp = os.path.basename(path)[len("test_data_"):-len(".json")]
+        stamps.add(stamp)
+        documents.append({
+            'id': stamp,
+            'context': data['context'],
+            'original': data['original_text'],
+            'edited': data['edited_text']
+        })
+
+    # Text pairs that have no test_data file of their own
+    for path in sorted(glob.glob(os.path.join(directory, "original_*.txt"))):
+        stamp = os.path.basename(path)[len("original_"):-len(".txt")]
+        edited_path = os.path.join(directory, f"edited_{stamp}.txt")
+        if stamp in stamps or not os.path.exists(edited_path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            original = f.read().strip()
+        with open(edited_path, 'r', encoding='utf-8') as f:
+            edited = f.read().strip()
+        documents.append({
+            'id': stamp,
+            'context': [{"role": "user", "content": DEFAULT_PROMPT}],
+            'original': original,
+            'edited': edited
+        })
+
+    for path in sorted(glob.glob(os.path.join(directory, "*.jsonl")) + glob.glob(os.path.join(directory, "*.jsonl.gz"))):
+        for record in read_corpus(path):
+            if record['kind'] != 'variant':
+                continue
+            documents.append({
+                'id': record['id'],
+                'context': [{"role": "user", "content": record['prompt']}],
+                'original': record['original_text'],
+                'edited': record['text']
+            })
+
+    return documents
+
+
+def _merge_ranges(ranges, text):
+    """Merge [start, end) ranges separated only by whitespace"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and not text[merged[-1][1]:start].strip():
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def edit_ranges(original, edited):
+    """
+    True edit spans as [start, end) character ranges in the edited text.
+
+    Tokens are diffed with difflib; replaced and inserted tokens are edited,
+    and a deletion marks the token that follows it, which is where the
+    model first sees the changed continuation.
+    """
+    a = [m for m in TOKEN_PATTERN.finditer(original) if m.group().strip()]
+    b = [m for m in TOKEN_PATTERN.finditer(edited) if m.group().strip()]
+    matcher = difflib.SequenceMatcher(None, [m.group() for m in a], [m.group() for m in b], autojunk=False)
+
+    ranges = []
+    for op, _, _, j1, j2 in matcher.get_opcodes():
+        if op in ('replace', 'insert'):
+            ranges.append((b[j1].start(), b[j2 - 1].end()))
+        elif op == 'delete' and b:
+            following = b[min(j1, len(b) - 1)]
+            ranges.append((following.start(), following.end()))
+
+    return _merge_ranges(ranges, edited)
+
+
+def token_spans(message, tokens):
+    """
+    Character range of every analyzed token in message, or None for
+    whitespace and tokens that cannot be located (e.g. regeneration output)
+    """
+    spans = []
+    cursor = 0
+    for token in tokens:
+        text = token.token.strip()
+        at = message.find(text, cursor) if text else -1
+        if at < 0:
+            spans.append(None)
+            continue
+        spans.append((at, at + len(text)))
+        cursor = at + len(text)
+    return spans
+
+
+def _overlaps(span, ranges):
+    return any(span[0] < end and start < span[1] for start, end in ranges)
+
+
+def _prf(tp, fp, fn):
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {'precision': precision, 'recall': recall, 'f1': f1}
+
+
+def score_document(document, analysis):
+    """
+    Join one analysis against the document's true edit spans
+    """
+    truth = edit_ranges(document['original'], document['edited'])
+    spans = token_spans(document['edited'], analysis.tokens)
+
+    counts = {'tp': 0, 'fp': 0, 'fn': 0, 'tn': 0}
+    located = 0
+    for token, span in zip(analysis.tokens, spans):
+        if span is None:
+            continue
+        located += 1
+        predicted = not token.found or token.level == ProbabilityLevel.LOW
+        actual = _overlaps(span, truth)
+        key = ('t' if predicted == actual else 'f') + ('p' if predicted else 'n')
+        counts[key] += 1
+
+    # Suspicious regions are token positions; map them to character ranges
+    by_position = {t.position: s for t, s in zip(analysis.tokens, spans) if s is not None}
+    predicted_regions = []
+    for start_pos, end_pos in analysis.suspicious_regions:
+        inside = [s for p, s in by_position.items() if start_pos <= p <= end_pos]
+        if inside:
+            predicted_regions.append((min(s[0] for s in inside), max(s[1] for s in inside)))
+
+    region_tp = sum(1 for r in predicted_regions if _overlaps(r, truth))
+    regions_found = sum(1 for r in truth if _overlaps(r, predicted_regions))
+
+    return {
+        'id': document['id'],
+        'edits': len(truth),
+        'tokens': located,
+        'unlocated_tokens': len(spans) - located,
+        'token': dict(counts, **_prf(counts['tp'], counts['fp'], counts['fn'])),
+        'region': dict(
+            {'predicted': len(predicted_regions), 'true': len(truth), 'tp': region_tp, 'found': regions_found},
+            precision=region_tp / len(predicted_regions) if predicted_regions else 0.0,
+            recall=regions_found / len(truth) if truth else 0.0
+        ),
+        'latency': analysis.usage.wall_time,
+        'cost': analysis.usage.estimated_cost,
+        'usage': analysis.usage.to_dict()
+    }
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def summarize(rows):
+    """Micro-averaged token and region metrics plus latency/cost totals"""
+    token = {k: sum(r['token'][k] for r in rows) for k in ('tp', 'fp', 'fn', 'tn')}
+
+    predicted = sum(r['region']['predicted'] for r in rows)
+    true = sum(r['region']['true'] for r in rows)
+    region_precision = sum(r['region']['tp'] for r in rows) / predicted if predicted else 0.0
+    region_recall = sum(r['region']['found'] for r in rows) / true if true else 0.0
+    region_f1 = (2 * region_precision * region_recall / (region_precision + region_recall)
+                 if region_precision + region_recall else 0.0)
+
+    latencies = [r['latency'] for r in rows]
+    return {
+        'documents': len(rows),
+        'token': dict(token, **_prf(token['tp'], token['fp'], token['fn'])),
+        'region': {'predicted': predicted, 'true': true, 'precision': region_precision,
+                   'recall': region_recall, 'f1': region_f1},
+        'latency': {
+            'mean': sum(latencies) / len(latencies) if latencies else 0.0,
+            'p50': _percentile(latencies, 0.5),
+            'p95': _percentile(latencies, 0.95)
+        },
+        'cost': {
+            'total': sum(r['cost'] for r in rows),
+            'per_document': sum(r['cost'] for r in rows) / len(rows) if rows else 0.0
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate TamperDetector against known edits")
+    parser.add_argument("directory", nargs="?", default=".", help="Directory with test data / corpora")
+    parser.add_argument("--model", default="gpt-3.5-turbo", help="Model to score with")
+    parser.add_argument("--strategy", default="prefix", help="Scoring strategy (prefix, echo, local, auto)")
+    parser.add_argument("--workers", type=int, default=4, help="Documents analyzed concurrently")
+    parser.add_argument("--rpm", type=int, default=500, help="Shared requests-per-minute budget")
+    parser.add_argument("--tpm", type=int, default=None, help="Shared tokens-per-minute budget")
+    parser.add_argument("--limit", type=int, default=None, help="Only evaluate the first N documents")
+    parser.add_argument("--output", default="evaluation_results.json", help="Where to save the results")
+    args = parser.parse_args()
+
+    print(f"{Fore.CYAN}{Style.BRIGHT}")
+    print("="*80)
+    print("  DETECTION EVALUATION")
+    print("  Token- and region-level accuracy against known edits")
+    print("="*80)
+    print(Style.RESET_ALL)
+
+    documents = load_pairs(args.directory)[:args.limit]
+    if not documents:
+        print(f"{Fore.RED}No test data found in {args.directory}")
+        sys.exit(1)
+    print(f"{Fore.WHITE}Evaluating {len(documents)} documents with {args.workers} workers")
+
+    # One detector per worker thread, all drawing on one rate budget
+    rate_limiter = RateLimiter(args.rpm, args.tpm)
+    local = threading.local()
+
+    def evaluate(document):
+        if not hasattr(local, 'detector'):
+            local.detector = TamperDetector(model=args.model, rate_limiter=rate_limiter)
+        analysis = local.detector.analyze(document['context'], document['edited'], strategy=args.strategy)
+        return score_document(document, analysis)
+
+    rows = []
+    total_usage = UsageStats()
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {pool.submit(evaluate, d): d for d in documents}
+        for future in as_completed(futures):
+            document = futures[future]
+            try:
+                row = future.result()
+            except Exception as e:
+                print(f"{Fore.RED}✗ {document['id']}: {e}")
+                continue
+            rows.append(row)
+            total_usage.merge(UsageStats(**row['usage']))
+            print(f"{Fore.GREEN}✓ {row['id']}{Style.RESET_ALL}  token F1 {row['token']['f1']:.2f}  "
+                  f"regions {row['region']['found']}/{row['region']['true']}  "
+                  f"{row['latency']:.1f}s  ${row['cost']:.5f}")
+
+    rows.sort(key=lambda r: r['id'])
+    summary = summarize(rows)
+
+    print(f"\n{Fore.CYAN}{Style.BRIGHT}{'='*80}")
+    print("SUMMARY")
+    print(f"{'='*80}{Style.RESET_ALL}")
+    t, r = summary['token'], summary['region']
+    print(f"Token level:  precision {t['precision']:.2f}  recall {t['recall']:.2f}  F1 {t['f1']:.2f}")
+    print(f"Region level: precision {r['precision']:.2f}  recall {r['recall']:.2f}  F1 {r['f1']:.2f}")
+    print(f"Latency:      mean {summary['latency']['mean']:.1f}s  p50 {summary['latency']['p50']:.1f}s  "
+          f"p95 {summary['latency']['p95']:.1f}s")
+    print(f"Cost:         ${summary['cost']['total']:.4f} total, ${summary['cost']['per_document']:.5f} per document")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'metadata': {'directory': args.directory, 'model': args.model, 'strategy': args.strategy},
+            'summary': summary,
+            'usage': total_usage.to_dict(),
+            'documents': rows
+        }, f, indent=2, ensure_ascii=False)
+
+    print(f"\n{Fore.GREEN}✓ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -36,21 +36,26 @@ def example_2_compare_models():
     context = [
         {"role": "user", "content": "Explain quantum computing in one sentence."}
     ]
+    message = ("Quantum computing uses qubits, which can exist in a superposition of 0 and 1, "
+               "to solve certain problems much faster than classical computers.")
     
-    for model in ["gpt-3.5-turbo", "gpt-4"]:
-        print(f"\n{Fore.YELLOW}Testing with model: {model}{Style.RESET_ALL}")
-        try:
-            detector = TamperDetector(model=model)
-            result = detector.analyze(context, "")
-            
-            # Print summary only
-            print(f"\n{Fore.WHITE}Summary for {model}:")
-            print(f"  Avg probability: {result.avg_probability*100:.2f}%")
-            print(f"  Low-prob tokens: {result.low_prob_count}/{len(result.tokens)}")
-            print(f"  Suspicious regions: {len(result.suspicious_regions)}")
-            
-        except Exception as e:
-            print(f"{Fore.RED}Error with {model}: {e}{Style.RESET_ALL}")
+    # Both models score the message concurrently; the wall time is that of
+    # the slower model, not the sum of the two
+    detector = TamperDetector(model="gpt-3.5-turbo")
+    result = detector.analyze_ensemble(context, message, models=["gpt-3.5-turbo", "gpt-4"], fusion="mean")
+    
+    for model, member in result.ensemble.items():
+        print(f"\n{Fore.WHITE}Summary for {model}:")
+        print(f"  Avg probability: {member.avg_probability*100:.2f}%")
+        print(f"  Low-prob tokens: {member.low_prob_count}/{len(member.tokens)}")
+        print(f"  Suspicious regions: {len(member.suspicious_regions)}")
+        print(f"  Wall time: {member.usage.wall_time:.2f}s")
+    
+    print(f"\n{Fore.YELLOW}Fused (mean of both models):{Style.RESET_ALL}")
+    print(f"  Avg probability: {result.avg_probability*100:.2f}%")
+    print(f"  Low-prob tokens: {result.low_prob_count}/{len(result.tokens)}")
+    print(f"  Suspicious regions: {len(result.suspicious_regions)}")
+    print(f"  Wall time: {result.usage.wall_time:.2f}s")
 
 
 def example_3_temperature_effects():
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Fake Model Server for TamperCheck
+A local OpenAI-compatible endpoint for load tests and offline development
+
+Serves /v1/chat/completions (with logprobs/top_logprobs, and as server-sent
+event chunks with stream=True) and /v1/completions (with echo=True prompt
+logprobs) in the shapes the openai client parses.
+Predictions are deterministic pseudo-random draws from a small vocabulary
+keyed by the prompt, so repeated requests score identically, and every
+response waits --latency milliseconds to stand in for network and model time.
+No API key is checked and nothing leaves the machine. GET /stats reports
+how many model requests have been served.
+
+Usage:
+    python fake_model_server.py --port 8001 --latency 40
+    python tampercheck.py --base-url http://127.0.0.1:8001/v1 --strategy prefix \\
+        --prompt "Write about robots" --message "The robot painted a sunset."
+"""
+
+import sys
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+from tampercheck import TOKEN_PATTERN, estimate_tokens
+
+
+# Common words the fake model "predicts"; a message made of them scores HIGH
+VOCABULARY = [
+    'the', 'a', 'robot', 'to', 'and', 'of', 'it', 'was', 'in', 'paint', 'with',
+    'its', 'that', 'colors', 'learned', 'brush', 'canvas', 'one', 'day', 'art',
+    '.', ',', 'each', 'new', 'world', 'beauty', 'created', 'first', 'time', 'he',
+]
+
+
+def _rng(*parts):
+    """Random generator seeded by the request content"""
+    digest = hashlib.sha256("\x00".join(parts).encode('utf-8')).digest()
+    return random.Random(digest)
+
+
+def predict(prefix, k):
+    """
+    Top-k (token, logprob) next-token predictions after prefix.
+
+    Probabilities are a skewed distribution over a shuffled vocabulary,
+    so the first candidate typically gets 30-60% and the tail a few percent.
+    """
+    rng = _rng(prefix)
+    words = rng.sample(VOCABULARY, min(k, len(VOCABULARY)))
+    weights = sorted((rng.random() ** 3 for _ in words), reverse=True)
+    total = sum(weights) * rng.uniform(1.1, 1.6)  # leave mass for tokens outside the top k
+    lead = "" if not prefix or prefix[-1].isspace() else " "
+    return [((lead + w) if w not in '.,' else w, math.log(x / total)) for w, x in zip(words, weights)]
+
+
+def _logprob_entry(token, logprob, top=()):
+    entry = {'token': token, 'logprob': logprob, 'bytes': list(token.encode('utf-8'))}
+    if top is not None:
+        entry['top_logprobs'] = [{'token': t, 'logprob': lp, 'bytes': list(t.encode('utf-8'))} for t, lp in top]
+    return entry
+
+
+def _usage(prompt_tokens, completion_tokens):
+    return {
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'total_tokens': prompt_tokens + completion_tokens,
+    }
+
+
+def chat_completion(body):
+    """Response body for a /v1/chat/completions request"""
+    messages = body.get('messages', [])
+    prefix = messages[-1]['content'] if messages and messages[-1]['role'] == 'assistant' else ""
+    prompt_text = "".join(m.get('content') or "" for m in messages)
+    max_tokens = body.get('max_tokens') or 16
+    k = body.get('top_logprobs') or 1
+
+    content = []
+    text = prefix
+    for _ in range(max_tokens):
+        top = predict(text, max(k, 1))
+        token, logprob = top[0]
+        content.append(_logprob_entry(token, logprob, top[:k] if body.get('logprobs') else ()))
+        text += token
+
+    return {
+        'id': 'chatcmpl-fake',
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': body.get('model', 'fake'),
+        'choices': [{
+            'index': 0,
+            'finish_reason': 'length',
+            'message': {'role': 'assistant', 'content': text[len(prefix):]},
+            'logprobs': {'content': content} if body.get('logprobs') else None,
+        }],
+        'usage': _usage(estimate_tokens(prompt_text) + 4 * len(messages), len(content)),
+    }
+
+
+def chat_completion_chunks(payload, include_usage=False):
+    """
+    A chat.completion response split into stream=True chunks: one per
+    token, carrying its delta and logprobs, then one with the finish
+    reason and, when include_usage is set, a last one with empty choices
+    and the usage.
+    """
+    choice = payload['choices'][0]
+    logprobs = choice['logprobs']['content'] if choice['logprobs'] else None
+    tokens = [entry['token'] for entry in logprobs] if logprobs else [choice['message']['content']]
+    base = {'id': payload['id'], 'object': 'chat.completion.chunk',
+            'created': payload['created'], 'model': payload['model']}
+
+    for i, token in enumerate(tokens):
+        delta = {'content': token}
+        if i == 0:
+            delta['role'] = 'assistant'
+        yield dict(base, choices=[{
+            'index': 0,
+            'delta': delta,
+            'logprobs': {'content': [logprobs[i]]} if logprobs else None,
+            'finish_reason': None,
+        }], usage=None)
+    yield dict(base, choices=[{'index': 0, 'delta': {}, 'logprobs': None, 'finish_reason': choice['finish_reason']}], usage=None)
+    if include_usage:
+        yield dict(base, choices=[], usage=payload['usage'])
+
+
+def completion(body):
+    """Response body for a /v1/completions request (echo=True scoring)"""
+    prompt = body.get('prompt', "")
+    k = body.get('logprobs') or 0
+
+    tokens, offsets, token_logprobs, top_logprobs = [], [], [], []
+    for match in TOKEN_PATTERN.finditer(prompt):
+        piece = match.group()
+        before = prompt[:match.start()]
+        top = predict(before, max(k, 1))
+        known = dict(top)
+        logprob = known.get(piece, math.log(_rng(before, piece).uniform(0.0005, 0.05)))
+        tokens.append(piece)
+        offsets.append(match.start())
+        token_logprobs.append(logprob if tokens[1:] else None)
+        top_logprobs.append(dict(top[:k]) if k and tokens[1:] else None)
+
+    return {
+        'id': 'cmpl-fake',
+        'object': 'text_completion',
+        'created': int(time.time()),
+        'model': body.get('model', 'fake'),
+        'choices': [{
+            'index': 0,
+            'finish_reason': 'length',
+            'text': prompt if body.get('echo') else "",
+            'logprobs': {
+                'tokens': tokens,
+                'token_logprobs': token_logprobs,
+                'top_logprobs': top_logprobs,
+                'text_offset': offsets,
+            } if k or body.get('echo') else None,
+        }],
+        'usage': _usage(estimate_tokens(prompt), 0),
+    }
+
+
+class FakeModelHandler(BaseHTTPRequestHandler):
+    """OpenAI-shaped responses after a fixed delay"""
+
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    requests = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path.endswith('/chat/completions'):
+            payload = chat_completion(body)
+        elif self.path.endswith('/completions'):
+            payload = completion(body)
+        else:
+            self.send_error(404)
+            return
+
+        with FakeModelHandler.lock:
+            FakeModelHandler.requests += 1
+        time.sleep(self.latency)
+
+        if body.get('stream') and self.path.endswith('/chat/completions'):
+            include_usage = bool((body.get('stream_options') or {}).get('include_usage'))
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+            for chunk in chat_completion_chunks(payload, include_usage):
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            return
+
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != '/stats':
+            self.send_error(404)
+            return
+        data = json.dumps({'requests': FakeModelHandler.requests}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port=0, latency_ms=40.0):
+    """
+    Serve in a background thread.
+
+    Returns:
+        (server, base_url); call server.shutdown() to stop
+    """
+    handler = type('Handler', (FakeModelHandler,), {'latency': latency_ms / 1000})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible fake model server")
+    parser.add_argument("--port", type=int, default=8001, help="Port to listen on")
+    parser.add_argument("--latency", type=float, default=40.0, help="Delay per response in milliseconds")
+    args = parser.parse_args()
+
+    server, base_url = start_server(args.port, args.latency)
+    print(f"Fake model server on {base_url} ({args.latency:.0f} ms per response), Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
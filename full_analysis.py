@@ -4,6 +4,7 @@ FULL Token-by-Token Analysis - ALL TOKENS
 Then generate beautiful HTML with real probability distributions
 """
 
+import io
 import os
 import sys
 import json
@@ -18,6 +19,10 @@ if sys.platform == 'win32':
 from openai import OpenAI
 from colorama import Fore, Style, init as colorama_init
 
+from tampercheck import TamperDetector
+from streaming_stats import count_statuses
+from html_report import StreamTemplate, token_spans, flagged_rows
+
 colorama_init(autoreset=True)
 
 
@@ -91,18 +96,15 @@ def analyze_all_tokens(client, context_prompt, edited_text):
                         break
                 
                 # Determine status
-                if our_token_found and our_token_prob > 20:
+                status_text = TamperDetector.classify_status(our_token_found, our_token_prob)
+                if status_text == "HIGH":
                     status = f"{Fore.GREEN}✓ HIGH ({our_token_prob:.1f}%)"
-                    status_text = "HIGH"
-                elif our_token_found and our_token_prob > 5:
+                elif status_text == "MEDIUM":
                     status = f"{Fore.YELLOW}○ MED ({our_token_prob:.1f}%)"
-                    status_text = "MEDIUM"
-                elif our_token_found:
+                elif status_text == "LOW":
                     status = f"{Fore.RED}! LOW ({our_token_prob:.1f}%)"
-                    status_text = "LOW"
                 else:
                     status = f"{Fore.RED}✗ NOT IN TOP 5"
-                    status_text = "NOT_FOUND"
                 
                 top_pref = top_alternatives[0]['token'] if top_alternatives else "N/A"
                 top_prob = top_alternatives[0]['probability'] if top_alternatives else 0
@@ -139,69 +141,52 @@ def analyze_all_tokens(client, context_prompt, edited_text):
     return results
 
 
-def generate_html(results, original_text, edited_text, context_prompt):
-    """
-    Generate beautiful HTML visualization with real data
-    """
-    
-    # Calculate statistics
-    total = len([r for r in results if r['status'] != 'ERROR'])
-    high = len([r for r in results if r['status'] == 'HIGH'])
-    medium = len([r for r in results if r['status'] == 'MEDIUM'])
-    low = len([r for r in results if r['status'] == 'LOW'])
-    not_found = len([r for r in results if r['status'] == 'NOT_FOUND'])
-    
-    high_pct = (high / total * 100) if total > 0 else 0
-    medium_pct = (medium / total * 100) if total > 0 else 0
-    low_pct = (low / total * 100) if total > 0 else 0
-    not_found_pct = (not_found / total * 100) if total > 0 else 0
-    
-    # Build HTML
-    html = f"""<!DOCTYPE html>
+# Report layout, compiled once; rendered by write_html
+REPORT_TEMPLATE = StreamTemplate("""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>TamperCheck - REAL Analysis Results</title>
     <style>
-        * {{
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
         
-        body {{
+        body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             padding: 20px;
             color: #333;
-        }}
+        }
         
-        .container {{
+        .container {
             max-width: 1400px;
             margin: 0 auto;
             background: white;
             border-radius: 15px;
             padding: 40px;
             box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-        }}
+        }
         
-        h1 {{
+        h1 {
             color: #667eea;
             text-align: center;
             font-size: 2.8em;
             margin-bottom: 10px;
             text-shadow: 2px 2px 4px rgba(0,0,0,0.1);
-        }}
+        }
         
-        .subtitle {{
+        .subtitle {
             text-align: center;
             color: #666;
             font-size: 1.3em;
             margin-bottom: 20px;
-        }}
+        }
         
-        .badge {{
+        .badge {
             display: inline-block;
             background: #28a745;
             color: white;
@@ -210,26 +195,26 @@ def generate_html(results, original_text, edited_text, context_prompt):
             font-weight: bold;
             font-size: 0.9em;
             margin: 5px;
-        }}
+        }
         
-        .badge.real {{
+        .badge.real {
             background: #dc3545;
             animation: pulse 2s infinite;
-        }}
+        }
         
-        @keyframes pulse {{
-            0%, 100% {{ transform: scale(1); }}
-            50% {{ transform: scale(1.05); }}
-        }}
+        @keyframes pulse {
+            0%, 100% { transform: scale(1); }
+            50% { transform: scale(1.05); }
+        }
         
-        .stats-grid {{
+        .stats-grid {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
             gap: 20px;
             margin: 30px 0;
-        }}
+        }
         
-        .stat-card {{
+        .stat-card {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             padding: 25px;
@@ -237,38 +222,38 @@ def generate_html(results, original_text, edited_text, context_prompt):
             text-align: center;
             box-shadow: 0 4px 15px rgba(0,0,0,0.2);
             transition: transform 0.3s;
-        }}
+        }
         
-        .stat-card:hover {{
+        .stat-card:hover {
             transform: translateY(-5px);
-        }}
+        }
         
-        .stat-value {{
+        .stat-value {
             font-size: 3em;
             font-weight: bold;
             margin-bottom: 10px;
-        }}
+        }
         
-        .stat-label {{
+        .stat-label {
             font-size: 1.1em;
             opacity: 0.9;
-        }}
+        }
         
-        .section {{
+        .section {
             margin: 40px 0;
             padding: 30px;
             background: #f8f9fa;
             border-radius: 12px;
             border-left: 5px solid #667eea;
-        }}
+        }
         
-        .section h2 {{
+        .section h2 {
             color: #667eea;
             margin-bottom: 20px;
             font-size: 2em;
-        }}
+        }
         
-        .text-display {{
+        .text-display {
             background: white;
             padding: 25px;
             border-radius: 8px;
@@ -277,9 +262,9 @@ def generate_html(results, original_text, edited_text, context_prompt):
             box-shadow: 0 2px 10px rgba(0,0,0,0.1);
             margin: 20px 0;
             font-family: 'Georgia', serif;
-        }}
+        }
         
-        .token {{
+        .token {
             display: inline-block;
             padding: 2px 4px;
             margin: 1px;
@@ -287,41 +272,41 @@ def generate_html(results, original_text, edited_text, context_prompt):
             cursor: pointer;
             transition: all 0.2s;
             position: relative;
-        }}
+        }
         
-        .token:hover {{
+        .token:hover {
             transform: scale(1.1);
             z-index: 10;
-        }}
+        }
         
-        .token.high {{
+        .token.high {
             background: #28a745;
             color: white;
-        }}
+        }
         
-        .token.medium {{
+        .token.medium {
             background: #ffc107;
             color: black;
-        }}
+        }
         
-        .token.low {{
+        .token.low {
             background: #ff6b6b;
             color: white;
-        }}
+        }
         
-        .token.not-found {{
+        .token.not-found {
             background: #dc3545;
             color: white;
             font-weight: bold;
             animation: blink 1.5s infinite;
-        }}
+        }
         
-        @keyframes blink {{
-            0%, 100% {{ opacity: 1; }}
-            50% {{ opacity: 0.7; }}
-        }}
+        @keyframes blink {
+            0%, 100% { opacity: 1; }
+            50% { opacity: 0.7; }
+        }
         
-        .tooltip {{
+        .tooltip {
             visibility: hidden;
             position: absolute;
             bottom: 125%;
@@ -335,13 +320,13 @@ def generate_html(results, original_text, edited_text, context_prompt):
             white-space: nowrap;
             z-index: 1000;
             box-shadow: 0 4px 8px rgba(0,0,0,0.3);
-        }}
+        }
         
-        .token:hover .tooltip {{
+        .token:hover .tooltip {
             visibility: visible;
-        }}
+        }
         
-        .probability-bar {{
+        .probability-bar {
             height: 40px;
             background: #e9ecef;
             border-radius: 20px;
@@ -349,9 +334,9 @@ def generate_html(results, original_text, edited_text, context_prompt):
             margin: 20px 0;
             display: flex;
             box-shadow: inset 0 2px 4px rgba(0,0,0,0.1);
-        }}
+        }
         
-        .prob-segment {{
+        .prob-segment {
             height: 100%;
             display: flex;
             align-items: center;
@@ -359,18 +344,18 @@ def generate_html(results, original_text, edited_text, context_prompt):
             color: white;
             font-weight: bold;
             transition: all 0.3s;
-        }}
+        }
         
-        .prob-segment:hover {{
+        .prob-segment:hover {
             filter: brightness(1.1);
-        }}
+        }
         
-        .prob-high {{ background: #28a745; }}
-        .prob-medium {{ background: #ffc107; color: black; }}
-        .prob-low {{ background: #ff6b6b; }}
-        .prob-not-found {{ background: #dc3545; }}
+        .prob-high { background: #28a745; }
+        .prob-medium { background: #ffc107; color: black; }
+        .prob-low { background: #ff6b6b; }
+        .prob-not-found { background: #dc3545; }
         
-        .details-table {{
+        .details-table {
             width: 100%;
             border-collapse: collapse;
             margin: 20px 0;
@@ -378,103 +363,103 @@ def generate_html(results, original_text, edited_text, context_prompt):
             border-radius: 8px;
             overflow: hidden;
             box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
+        }
         
-        .details-table th {{
+        .details-table th {
             background: #667eea;
             color: white;
             padding: 15px;
             text-align: left;
             font-size: 1.1em;
-        }}
+        }
         
-        .details-table td {{
+        .details-table td {
             padding: 12px 15px;
             border-bottom: 1px solid #eee;
-        }}
+        }
         
-        .details-table tr:hover {{
+        .details-table tr:hover {
             background: #f8f9fa;
-        }}
+        }
         
-        .details-table tr.flagged {{
+        .details-table tr.flagged {
             background: #fff3cd;
-        }}
+        }
         
-        .details-table tr.flagged:hover {{
+        .details-table tr.flagged:hover {
             background: #ffe69c;
-        }}
+        }
         
-        .alternatives {{
+        .alternatives {
             font-size: 0.9em;
             color: #666;
-        }}
+        }
         
-        .alert {{
+        .alert {
             background: #fff3cd;
             border: 2px solid #ffc107;
             border-radius: 8px;
             padding: 20px;
             margin: 20px 0;
-        }}
+        }
         
-        .alert-danger {{
+        .alert-danger {
             background: #f8d7da;
             border-color: #dc3545;
-        }}
+        }
         
-        .alert h3 {{
+        .alert h3 {
             margin-top: 0;
             color: #856404;
-        }}
+        }
         
-        .alert-danger h3 {{
+        .alert-danger h3 {
             color: #721c24;
-        }}
+        }
         
-        .legend {{
+        .legend {
             background: white;
             padding: 20px;
             border-radius: 8px;
             margin: 20px 0;
             box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
+        }
         
-        .legend-item {{
+        .legend-item {
             display: inline-block;
             margin: 10px 20px 10px 0;
-        }}
+        }
         
-        .legend-box {{
+        .legend-box {
             display: inline-block;
             width: 20px;
             height: 20px;
             border-radius: 3px;
             margin-right: 8px;
             vertical-align: middle;
-        }}
+        }
         
-        .footer {{
+        .footer {
             text-align: center;
             margin-top: 50px;
             padding-top: 30px;
             border-top: 2px solid #eee;
             color: #666;
-        }}
+        }
         
-        .discovery-box {{
+        .discovery-box {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             padding: 30px;
             border-radius: 12px;
             margin: 30px 0;
             box-shadow: 0 8px 20px rgba(0,0,0,0.2);
-        }}
+        }
         
-        .discovery-box h3 {{
+        .discovery-box h3 {
             margin-top: 0;
             font-size: 1.8em;
-        }}
+        }
     </style>
 </head>
 <body>
@@ -492,19 +477,19 @@ def generate_html(results, original_text, edited_text, context_prompt):
         <!-- Statistics -->
         <div class="stats-grid">
             <div class="stat-card">
-                <div class="stat-value">{total}</div>
+                <div class="stat-value">{{total}}</div>
                 <div class="stat-label">Tokens Analyzed</div>
             </div>
             <div class="stat-card">
-                <div class="stat-value">{high}</div>
+                <div class="stat-value">{{high}}</div>
                 <div class="stat-label">High Probability</div>
             </div>
             <div class="stat-card">
-                <div class="stat-value">{medium + low}</div>
+                <div class="stat-value">{{medium_low}}</div>
                 <div class="stat-label">Medium/Low Prob</div>
             </div>
             <div class="stat-card">
-                <div class="stat-value" style="color: #ffeb3b;">{not_found}</div>
+                <div class="stat-value" style="color: #ffeb3b;">{{not_found}}</div>
                 <div class="stat-label">⚠️ NOT in Top 5</div>
             </div>
         </div>
@@ -513,13 +498,13 @@ def generate_html(results, original_text, edited_text, context_prompt):
         <div class="section">
             <h2>📊 Probability Distribution</h2>
             <div class="probability-bar">
-                <div class="prob-segment prob-high" style="width: {high_pct}%">{high_pct:.1f}% HIGH</div>
-                <div class="prob-segment prob-medium" style="width: {medium_pct}%">{medium_pct:.1f}% MED</div>
-                <div class="prob-segment prob-low" style="width: {low_pct}%">{low_pct:.1f}% LOW</div>
-                <div class="prob-segment prob-not-found" style="width: {not_found_pct}%">{not_found_pct:.1f}% ⚠️</div>
+                <div class="prob-segment prob-high" style="width: {{high_pct}}%">{{high_pct:.1f}}% HIGH</div>
+                <div class="prob-segment prob-medium" style="width: {{medium_pct}}%">{{medium_pct:.1f}}% MED</div>
+                <div class="prob-segment prob-low" style="width: {{low_pct}}%">{{low_pct:.1f}}% LOW</div>
+                <div class="prob-segment prob-not-found" style="width: {{not_found_pct}}%">{{not_found_pct:.1f}}% ⚠️</div>
             </div>
             
-            {"<div class='alert alert-danger'><h3>⚠️ TAMPERING DETECTED!</h3><p><strong>" + str(not_found) + " tokens</strong> (" + f"{not_found_pct:.1f}%" + ") do not appear in the model's top 5 predictions. This indicates significant editing of AI-generated text.</p></div>" if not_found_pct > 10 else "<div class='alert'><h3>✓ Text Appears Authentic</h3><p>Most tokens match the model's natural generation patterns.</p></div>"}
+            {{verdict}}
         </div>
         
         <!-- Color-Coded Text -->
@@ -545,29 +530,7 @@ def generate_html(results, original_text, edited_text, context_prompt):
             </div>
             
             <div class="text-display">
-"""
-    
-    # Add color-coded tokens
-    for r in results:
-        if r['status'] == 'ERROR':
-            continue
-        
-        token = r['token'].replace('<', '&lt;').replace('>', '&gt;')
-        status_class = {
-            'HIGH': 'high',
-            'MEDIUM': 'medium',
-            'LOW': 'low',
-            'NOT_FOUND': 'not-found'
-        }.get(r['status'], 'high')
-        
-        tooltip_text = f"Probability: {r['probability']:.1f}%"
-        if r['top_alternatives']:
-            top = r['top_alternatives'][0]
-            tooltip_text += f" | Model prefers: '{top['token']}' ({top['probability']:.1f}%)"
-        
-        html += f'<span class="token {status_class}"><span class="tooltip">{tooltip_text}</span>{token}</span>'
-    
-    html += """
+{{tokens}}
             </div>
         </div>
         
@@ -585,29 +548,7 @@ def generate_html(results, original_text, edited_text, context_prompt):
                     </tr>
                 </thead>
                 <tbody>
-"""
-    
-    # Add flagged tokens
-    for r in results:
-        if r['status'] == 'NOT_FOUND' or r['status'] == 'LOW':
-            token = r['token'].replace('<', '&lt;').replace('>', '&gt;')
-            alts_html = ""
-            for i, alt in enumerate(r['top_alternatives'][:3]):
-                alt_token = alt['token'].replace('<', '&lt;').replace('>', '&gt;')
-                alts_html += f"<div>#{i+1}: <strong>'{alt_token}'</strong> ({alt['probability']:.1f}%)</div>"
-            
-            prob_display = f"{r['probability']:.1f}%" if r['found'] else "NOT IN TOP 5"
-            
-            html += f"""
-                    <tr class="flagged">
-                        <td>{r['position']}</td>
-                        <td><strong>'{token}'</strong></td>
-                        <td style="color: #dc3545; font-weight: bold;">{prob_display}</td>
-                        <td class="alternatives">{alts_html}</td>
-                    </tr>
-"""
-    
-    html += f"""
+{{flagged_rows}}
                 </tbody>
             </table>
         </div>
@@ -624,7 +565,7 @@ def generate_html(results, original_text, edited_text, context_prompt):
             <ul style="margin: 15px 0; padding-left: 30px; line-height: 1.8;">
                 <li>You edited AI-generated text</li>
                 <li>We analyzed each token to see if it appears in the model's top predictions</li>
-                <li><strong>{not_found} tokens ({not_found_pct:.1f}%)</strong> were NOT in the top 5 - these are your edits!</li>
+                <li><strong>{{not_found}} tokens ({{not_found_pct:.1f}}%)</strong> were NOT in the top 5 - these are your edits!</li>
                 <li>The model "knows" what it would naturally write</li>
                 <li>Your changes show up as low-probability tokens</li>
             </ul>
@@ -640,19 +581,19 @@ def generate_html(results, original_text, edited_text, context_prompt):
             <div style="margin: 20px 0;">
                 <h3 style="color: #667eea;">Context Prompt:</h3>
                 <p style="background: white; padding: 15px; border-radius: 8px; margin: 10px 0;">
-                    "{context_prompt}"
+                    "{{context_prompt}}"
                 </p>
             </div>
             <div style="margin: 20px 0;">
                 <h3 style="color: #28a745;">Original (AI Generated):</h3>
                 <p style="background: white; padding: 15px; border-radius: 8px; margin: 10px 0;">
-                    {original_text}
+                    {{original_text}}
                 </p>
             </div>
             <div style="margin: 20px 0;">
                 <h3 style="color: #dc3545;">Edited (Your Version):</h3>
                 <p style="background: white; padding: 15px; border-radius: 8px; margin: 10px 0;">
-                    {edited_text}
+                    {{edited_text}}
                 </p>
             </div>
         </div>
@@ -667,15 +608,54 @@ def generate_html(results, original_text, edited_text, context_prompt):
                 Based on the "38 vs 24" discovery about LLM self-authentication
             </p>
             <p style="margin-top: 20px; color: #999;">
-                Analysis completed with {total} tokens • {not_found} suspicious tokens detected
+                Analysis completed with {{total}} tokens • {{not_found}} suspicious tokens detected
             </p>
         </div>
     </div>
 </body>
 </html>
-"""
+""")
+
+
+def write_html(out, results, original_text, edited_text, context_prompt):
+    """
+    Stream the HTML visualization of real data to out (an open text file)
+    """
+    stats = count_statuses(results)
     
-    return html
+    if stats['not_found_pct'] > 10:
+        verdict = ("<div class='alert alert-danger'><h3>⚠️ TAMPERING DETECTED!</h3><p><strong>" + str(stats['not_found'])
+                   + " tokens</strong> (" + f"{stats['not_found_pct']:.1f}%" + ") do not appear in the model's top 5 "
+                   "predictions. This indicates significant editing of AI-generated text.</p></div>")
+    else:
+        verdict = "<div class='alert'><h3>✓ Text Appears Authentic</h3><p>Most tokens match the model's natural generation patterns.</p></div>"
+    
+    REPORT_TEMPLATE.render(
+        out,
+        total=stats['total'],
+        high=stats['high'],
+        medium_low=stats['medium'] + stats['low'],
+        not_found=stats['not_found'],
+        high_pct=stats['high_pct'],
+        medium_pct=stats['medium_pct'],
+        low_pct=stats['low_pct'],
+        not_found_pct=stats['not_found_pct'],
+        verdict=verdict,
+        tokens=token_spans(results),
+        flagged_rows=flagged_rows(results),
+        context_prompt=context_prompt,
+        original_text=original_text,
+        edited_text=edited_text
+    )
+
+
+def generate_html(results, original_text, edited_text, context_prompt):
+    """
+    Generate beautiful HTML visualization with real data
+    """
+    buffer = io.StringIO()
+    write_html(buffer, results, original_text, edited_text, context_prompt)
+    return buffer.getvalue()
 
 
 def main():
@@ -713,10 +693,8 @@ def main():
     
     # Generate HTML
     print(f"\n{Fore.CYAN}Generating beautiful HTML visualization...")
-    html = generate_html(results, original_text, edited_text, context_prompt)
-    
     with open('real_tamper_results.html', 'w', encoding='utf-8') as f:
-        f.write(html)
+        write_html(f, results, original_text, edited_text, context_prompt)
     
     print(f"{Fore.GREEN}✓ HTML generated: real_tamper_results.html")
     print(f"\n{Fore.CYAN}{Style.BRIGHT}Opening in browser...")
@@ -1,10 +1,22 @@
 #!/usr/bin/env python3
 """
 Generate comparison HTML showing Original vs Edited side by side
+
+Usage:
+    python generate_comparison_html.py                      # the robot story results
+    python generate_comparison_html.py --pairs pairs.json --output-dir reports --workers 8
+
+A pairs file is a JSON list of {"original", "edited", "name"} entries (name
+is optional) or a text file with one "original edited" pair per line. In
+batch mode the stylesheet is written once to <output-dir>/assets and every
+report links to it.
 """
 
-import json
+import os
 import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 if sys.platform == 'win32':
     import codecs
@@ -14,123 +26,83 @@ if sys.platform == 'win32':
 from colorama import Fore, Style, init as colorama_init
 colorama_init(autoreset=True)
 
-print(f"{Fore.CYAN}Loading analysis results...")
-
-# Load both results
-with open('original_analysis_results.json', 'r', encoding='utf-8') as f:
-    original_data = json.load(f)
-
-with open('full_analysis_results.json', 'r', encoding='utf-8') as f:
-    edited_data = json.load(f)
-
-print(f"{Fore.GREEN}✓ Loaded original analysis")
-print(f"{Fore.GREEN}✓ Loaded edited analysis")
-
-# Calculate stats
-def calc_stats(results):
-    total = len([r for r in results if r.get('status') != 'ERROR'])
-    high = len([r for r in results if r.get('status') == 'HIGH'])
-    medium = len([r for r in results if r.get('status') == 'MEDIUM'])
-    low = len([r for r in results if r.get('status') == 'LOW'])
-    not_found = len([r for r in results if r.get('status') == 'NOT_FOUND'])
-    
-    return {
-        'total': total,
-        'high': high,
-        'medium': medium,
-        'low': low,
-        'not_found': not_found,
-        'high_pct': (high / total * 100) if total > 0 else 0,
-        'medium_pct': (medium / total * 100) if total > 0 else 0,
-        'low_pct': (low / total * 100) if total > 0 else 0,
-        'not_found_pct': (not_found / total * 100) if total > 0 else 0
-    }
-
-original_stats = calc_stats(original_data['results'])
-edited_stats = calc_stats(edited_data)
-
-print(f"\n{Fore.CYAN}Generating comparison HTML...")
+from streaming_stats import count_statuses
+from html_report import StreamTemplate, token_spans
 
-html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>TamperCheck - Original vs Edited Comparison</title>
-    <style>
-        * {{
+# Stylesheet shared by every comparison report
+COMPARISON_CSS = """        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
         
-        body {{
+        body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             padding: 20px;
             color: #333;
-        }}
+        }
         
-        .container {{
+        .container {
             max-width: 1600px;
             margin: 0 auto;
             background: white;
             border-radius: 15px;
             padding: 40px;
             box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-        }}
+        }
         
-        h1 {{
+        h1 {
             color: #667eea;
             text-align: center;
             font-size: 3em;
             margin-bottom: 10px;
             text-shadow: 2px 2px 4px rgba(0,0,0,0.1);
-        }}
+        }
         
-        .subtitle {{
+        .subtitle {
             text-align: center;
             color: #666;
             font-size: 1.4em;
             margin-bottom: 30px;
-        }}
+        }
         
-        .comparison-grid {{
+        .comparison-grid {
             display: grid;
             grid-template-columns: 1fr 1fr;
             gap: 30px;
             margin: 40px 0;
-        }}
+        }
         
-        .panel {{
+        .panel {
             background: #f8f9fa;
             padding: 30px;
             border-radius: 12px;
             box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-        }}
+        }
         
-        .panel.original {{
+        .panel.original {
             border-left: 5px solid #28a745;
-        }}
+        }
         
-        .panel.edited {{
+        .panel.edited {
             border-left: 5px solid #dc3545;
-        }}
+        }
         
-        .panel h2 {{
+        .panel h2 {
             margin-bottom: 20px;
             font-size: 2em;
-        }}
+        }
         
-        .panel.original h2 {{
+        .panel.original h2 {
             color: #28a745;
-        }}
+        }
         
-        .panel.edited h2 {{
+        .panel.edited h2 {
             color: #dc3545;
-        }}
+        }
         
-        .text-display {{
+        .text-display {
             background: white;
             padding: 25px;
             border-radius: 8px;
@@ -139,9 +111,9 @@ html = f"""<!DOCTYPE html>
             box-shadow: 0 2px 10px rgba(0,0,0,0.1);
             margin: 20px 0;
             font-family: 'Georgia', serif;
-        }}
+        }
         
-        .token {{
+        .token {
             display: inline-block;
             padding: 2px 4px;
             margin: 1px;
@@ -149,41 +121,41 @@ html = f"""<!DOCTYPE html>
             cursor: pointer;
             transition: all 0.2s;
             position: relative;
-        }}
+        }
         
-        .token:hover {{
+        .token:hover {
             transform: scale(1.1);
             z-index: 10;
-        }}
+        }
         
-        .token.high {{
+        .token.high {
             background: #28a745;
             color: white;
-        }}
+        }
         
-        .token.medium {{
+        .token.medium {
             background: #ffc107;
             color: black;
-        }}
+        }
         
-        .token.low {{
+        .token.low {
             background: #ff6b6b;
             color: white;
-        }}
+        }
         
-        .token.not-found {{
+        .token.not-found {
             background: #dc3545;
             color: white;
             font-weight: bold;
             animation: blink 1.5s infinite;
-        }}
+        }
         
-        @keyframes blink {{
-            0%, 100% {{ opacity: 1; }}
-            50% {{ opacity: 0.7; }}
-        }}
+        @keyframes blink {
+            0%, 100% { opacity: 1; }
+            50% { opacity: 0.7; }
+        }
         
-        .tooltip {{
+        .tooltip {
             visibility: hidden;
             position: absolute;
             bottom: 125%;
@@ -197,36 +169,36 @@ html = f"""<!DOCTYPE html>
             white-space: nowrap;
             z-index: 1000;
             box-shadow: 0 4px 8px rgba(0,0,0,0.3);
-        }}
+        }
         
-        .token:hover .tooltip {{
+        .token:hover .tooltip {
             visibility: visible;
-        }}
+        }
         
-        .stats-card {{
+        .stats-card {
             background: white;
             padding: 20px;
             border-radius: 8px;
             margin: 20px 0;
             box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
+        }
         
-        .stat-row {{
+        .stat-row {
             display: flex;
             justify-content: space-between;
             padding: 10px 0;
             border-bottom: 1px solid #eee;
-        }}
+        }
         
-        .stat-row:last-child {{
+        .stat-row:last-child {
             border-bottom: none;
-        }}
+        }
         
-        .stat-label {{
+        .stat-label {
             font-weight: bold;
-        }}
+        }
         
-        .probability-bar {{
+        .probability-bar {
             height: 40px;
             background: #e9ecef;
             border-radius: 20px;
@@ -234,9 +206,9 @@ html = f"""<!DOCTYPE html>
             margin: 20px 0;
             display: flex;
             box-shadow: inset 0 2px 4px rgba(0,0,0,0.1);
-        }}
+        }
         
-        .prob-segment {{
+        .prob-segment {
             height: 100%;
             display: flex;
             align-items: center;
@@ -244,100 +216,111 @@ html = f"""<!DOCTYPE html>
             color: white;
             font-weight: bold;
             font-size: 0.9em;
-        }}
+        }
         
-        .prob-high {{ background: #28a745; }}
-        .prob-medium {{ background: #ffc107; color: black; }}
-        .prob-low {{ background: #ff6b6b; }}
-        .prob-not-found {{ background: #dc3545; }}
+        .prob-high { background: #28a745; }
+        .prob-medium { background: #ffc107; color: black; }
+        .prob-low { background: #ff6b6b; }
+        .prob-not-found { background: #dc3545; }
         
-        .verdict {{
+        .verdict {
             text-align: center;
             padding: 30px;
             margin: 40px 0;
             border-radius: 12px;
             font-size: 1.3em;
-        }}
+        }
         
-        .verdict.authentic {{
+        .verdict.authentic {
             background: #d4edda;
             border: 3px solid #28a745;
             color: #155724;
-        }}
+        }
         
-        .verdict.tampered {{
+        .verdict.tampered {
             background: #f8d7da;
             border: 3px solid #dc3545;
             color: #721c24;
-        }}
+        }
         
-        .verdict h3 {{
+        .verdict h3 {
             font-size: 2em;
             margin-bottom: 15px;
-        }}
+        }
         
-        .comparison-stats {{
+        .comparison-stats {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             padding: 40px;
             border-radius: 12px;
             margin: 40px 0;
             box-shadow: 0 8px 20px rgba(0,0,0,0.2);
-        }}
+        }
         
-        .comparison-stats h2 {{
+        .comparison-stats h2 {
             text-align: center;
             margin-bottom: 30px;
             font-size: 2.5em;
-        }}
+        }
         
-        .stats-grid {{
+        .stats-grid {
             display: grid;
             grid-template-columns: repeat(4, 1fr);
             gap: 20px;
             margin-top: 20px;
-        }}
+        }
         
-        .stat-box {{
+        .stat-box {
             background: rgba(255,255,255,0.2);
             padding: 20px;
             border-radius: 8px;
             text-align: center;
-        }}
+        }
         
-        .stat-value {{
+        .stat-value {
             font-size: 2.5em;
             font-weight: bold;
             margin-bottom: 10px;
-        }}
+        }
         
-        .stat-desc {{
+        .stat-desc {
             font-size: 1em;
             opacity: 0.9;
-        }}
+        }
         
-        .legend {{
+        .legend {
             background: white;
             padding: 20px;
             border-radius: 8px;
             margin: 20px 0;
             box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
+        }
         
-        .legend-item {{
+        .legend-item {
             display: inline-block;
             margin: 10px 20px 10px 0;
-        }}
+        }
         
-        .legend-box {{
+        .legend-box {
             display: inline-block;
             width: 20px;
             height: 20px;
             border-radius: 3px;
             margin-right: 8px;
             vertical-align: middle;
-        }}
-    </style>
+        }
+"""
+
+ASSET_NAME = "comparison.css"
+
+# Side-by-side report layout, compiled once
+COMPARISON_TEMPLATE = StreamTemplate("""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>TamperCheck - Original vs Edited Comparison</title>
+    {{assets}}
 </head>
 <body>
     <div class="container">
@@ -351,24 +334,24 @@ html = f"""<!DOCTYPE html>
             <h2>📊 Detection Results</h2>
             <div class="stats-grid">
                 <div class="stat-box">
-                    <div class="stat-value">{original_stats['high_pct']:.1f}%</div>
+                    <div class="stat-value">{{original_high_pct:.1f}}%</div>
                     <div class="stat-desc">Original<br>HIGH Probability</div>
                 </div>
                 <div class="stat-box">
-                    <div class="stat-value">{edited_stats['high_pct']:.1f}%</div>
+                    <div class="stat-value">{{edited_high_pct:.1f}}%</div>
                     <div class="stat-desc">Edited<br>HIGH Probability</div>
                 </div>
                 <div class="stat-box">
-                    <div class="stat-value">{original_stats['not_found_pct']:.1f}%</div>
+                    <div class="stat-value">{{original_not_found_pct:.1f}}%</div>
                     <div class="stat-desc">Original<br>Suspicious Tokens</div>
                 </div>
                 <div class="stat-box">
-                    <div class="stat-value" style="color: #ffeb3b;">{edited_stats['not_found_pct']:.1f}%</div>
+                    <div class="stat-value" style="color: #ffeb3b;">{{edited_not_found_pct:.1f}}%</div>
                     <div class="stat-desc">Edited<br>Suspicious Tokens ⚠️</div>
                 </div>
             </div>
             <div style="text-align: center; margin-top: 30px; font-size: 1.3em;">
-                <strong>The edited version has {edited_stats['not_found_pct'] / original_stats['not_found_pct']:.1f}x more suspicious tokens!</strong>
+                <strong>The edited version has {{not_found_ratio:.1f}}x more suspicious tokens!</strong>
             </div>
         </div>
         
@@ -377,13 +360,13 @@ html = f"""<!DOCTYPE html>
             <div class="verdict authentic">
                 <h3>✅ ORIGINAL TEXT</h3>
                 <p><strong>AUTHENTIC</strong></p>
-                <p>Low false positive rate ({original_stats['not_found_pct']:.1f}%)</p>
+                <p>Low false positive rate ({{original_not_found_pct:.1f}}%)</p>
                 <p>System correctly identifies AI-generated text</p>
             </div>
             <div class="verdict tampered">
                 <h3>⚠️ EDITED TEXT</h3>
                 <p><strong>TAMPERING DETECTED</strong></p>
-                <p>High suspicious token rate ({edited_stats['not_found_pct']:.1f}%)</p>
+                <p>High suspicious token rate ({{edited_not_found_pct:.1f}}%)</p>
                 <p>Clear evidence of human editing</p>
             </div>
         </div>
@@ -418,58 +401,35 @@ html = f"""<!DOCTYPE html>
                 <div class="stats-card">
                     <div class="stat-row">
                         <span class="stat-label">Total Tokens:</span>
-                        <span>{original_stats['total']}</span>
+                        <span>{{original_total}}</span>
                     </div>
                     <div class="stat-row">
                         <span class="stat-label">High Probability:</span>
-                        <span style="color: #28a745;">{original_stats['high']} ({original_stats['high_pct']:.1f}%)</span>
+                        <span style="color: #28a745;">{{original_high}} ({{original_high_pct:.1f}}%)</span>
                     </div>
                     <div class="stat-row">
                         <span class="stat-label">Medium Probability:</span>
-                        <span style="color: #ffc107;">{original_stats['medium']} ({original_stats['medium_pct']:.1f}%)</span>
+                        <span style="color: #ffc107;">{{original_medium}} ({{original_medium_pct:.1f}}%)</span>
                     </div>
                     <div class="stat-row">
                         <span class="stat-label">Low Probability:</span>
-                        <span style="color: #ff6b6b;">{original_stats['low']} ({original_stats['low_pct']:.1f}%)</span>
+                        <span style="color: #ff6b6b;">{{original_low}} ({{original_low_pct:.1f}}%)</span>
                     </div>
                     <div class="stat-row">
                         <span class="stat-label">NOT in Top 5:</span>
-                        <span style="color: #dc3545; font-weight: bold;">{original_stats['not_found']} ({original_stats['not_found_pct']:.1f}%)</span>
+                        <span style="color: #dc3545; font-weight: bold;">{{original_not_found}} ({{original_not_found_pct:.1f}}%)</span>
                     </div>
                 </div>
                 
                 <div class="probability-bar">
-                    <div class="prob-segment prob-high" style="width: {original_stats['high_pct']}%">{original_stats['high_pct']:.1f}%</div>
-                    <div class="prob-segment prob-medium" style="width: {original_stats['medium_pct']}%">{original_stats['medium_pct']:.1f}%</div>
-                    <div class="prob-segment prob-low" style="width: {original_stats['low_pct']}%">{original_stats['low_pct']:.1f}%</div>
-                    <div class="prob-segment prob-not-found" style="width: {original_stats['not_found_pct']}%">{original_stats['not_found_pct']:.1f}%</div>
+                    <div class="prob-segment prob-high" style="width: {{original_high_pct}}%">{{original_high_pct:.1f}}%</div>
+                    <div class="prob-segment prob-medium" style="width: {{original_medium_pct}}%">{{original_medium_pct:.1f}}%</div>
+                    <div class="prob-segment prob-low" style="width: {{original_low_pct}}%">{{original_low_pct:.1f}}%</div>
+                    <div class="prob-segment prob-not-found" style="width: {{original_not_found_pct}}%">{{original_not_found_pct:.1f}}%</div>
                 </div>
                 
                 <div class="text-display">
-"""
-
-# Add original tokens
-for r in original_data['results']:
-    if r.get('status') == 'ERROR':
-        continue
-    
-    token = r['token'].replace('<', '&lt;').replace('>', '&gt;')
-    status_class = {
-        'HIGH': 'high',
-        'MEDIUM': 'medium',
-        'LOW': 'low',
-        'NOT_FOUND': 'not-found'
-    }.get(r.get('status'), 'high')
-    
-    prob = r.get('probability', 0)
-    tooltip_text = f"Probability: {prob:.1f}%"
-    if r.get('top_alternatives'):
-        top = r['top_alternatives'][0]
-        tooltip_text += f" | Model prefers: '{top['token']}' ({top['probability']:.1f}%)"
-    
-    html += f'<span class="token {status_class}"><span class="tooltip">{tooltip_text}</span>{token}</span>'
-
-html += """
+{{original_tokens}}
                 </div>
             </div>
             
@@ -480,58 +440,35 @@ html += """
                 <div class="stats-card">
                     <div class="stat-row">
                         <span class="stat-label">Total Tokens:</span>
-                        <span>""" + str(edited_stats['total']) + """</span>
+                        <span>{{edited_total}}</span>
                     </div>
                     <div class="stat-row">
                         <span class="stat-label">High Probability:</span>
-                        <span style="color: #28a745;">""" + str(edited_stats['high']) + f" ({edited_stats['high_pct']:.1f}%)" + """</span>
+                        <span style="color: #28a745;">{{edited_high}} ({{edited_high_pct:.1f}}%)</span>
                     </div>
                     <div class="stat-row">
                         <span class="stat-label">Medium Probability:</span>
-                        <span style="color: #ffc107;">""" + str(edited_stats['medium']) + f" ({edited_stats['medium_pct']:.1f}%)" + """</span>
+                        <span style="color: #ffc107;">{{edited_medium}} ({{edited_medium_pct:.1f}}%)</span>
                     </div>
                     <div class="stat-row">
                         <span class="stat-label">Low Probability:</span>
-                        <span style="color: #ff6b6b;">""" + str(edited_stats['low']) + f" ({edited_stats['low_pct']:.1f}%)" + """</span>
+                        <span style="color: #ff6b6b;">{{edited_low}} ({{edited_low_pct:.1f}}%)</span>
                     </div>
                     <div class="stat-row">
                         <span class="stat-label">NOT in Top 5:</span>
-                        <span style="color: #dc3545; font-weight: bold;">""" + str(edited_stats['not_found']) + f" ({edited_stats['not_found_pct']:.1f}%)" + """</span>
+                        <span style="color: #dc3545; font-weight: bold;">{{edited_not_found}} ({{edited_not_found_pct:.1f}}%)</span>
                     </div>
                 </div>
                 
                 <div class="probability-bar">
-                    <div class="prob-segment prob-high" style="width: """ + str(edited_stats['high_pct']) + """%">""" + f"{edited_stats['high_pct']:.1f}%" + """</div>
-                    <div class="prob-segment prob-medium" style="width: """ + str(edited_stats['medium_pct']) + """%">""" + f"{edited_stats['medium_pct']:.1f}%" + """</div>
-                    <div class="prob-segment prob-low" style="width: """ + str(edited_stats['low_pct']) + """%">""" + f"{edited_stats['low_pct']:.1f}%" + """</div>
-                    <div class="prob-segment prob-not-found" style="width: """ + str(edited_stats['not_found_pct']) + """%">""" + f"{edited_stats['not_found_pct']:.1f}%" + """</div>
+                    <div class="prob-segment prob-high" style="width: {{edited_high_pct}}%">{{edited_high_pct:.1f}}%</div>
+                    <div class="prob-segment prob-medium" style="width: {{edited_medium_pct}}%">{{edited_medium_pct:.1f}}%</div>
+                    <div class="prob-segment prob-low" style="width: {{edited_low_pct}}%">{{edited_low_pct:.1f}}%</div>
+                    <div class="prob-segment prob-not-found" style="width: {{edited_not_found_pct}}%">{{edited_not_found_pct:.1f}}%</div>
                 </div>
                 
                 <div class="text-display">
-"""
-
-# Add edited tokens
-for r in edited_data:
-    if r.get('status') == 'ERROR':
-        continue
-    
-    token = r['token'].replace('<', '&lt;').replace('>', '&gt;')
-    status_class = {
-        'HIGH': 'high',
-        'MEDIUM': 'medium',
-        'LOW': 'low',
-        'NOT_FOUND': 'not-found'
-    }.get(r.get('status'), 'high')
-    
-    prob = r.get('probability', 0)
-    tooltip_text = f"Probability: {prob:.1f}%"
-    if r.get('top_alternatives'):
-        top = r['top_alternatives'][0]
-        tooltip_text += f" | Model prefers: '{top['token']}' ({top['probability']:.1f}%)"
-    
-    html += f'<span class="token {status_class}"><span class="tooltip">{tooltip_text}</span>{token}</span>'
-
-html += f"""
+{{edited_tokens}}
                 </div>
             </div>
         </div>
@@ -541,10 +478,10 @@ html += f"""
             <h2 style="font-size: 2.5em; margin-bottom: 20px;">🎉 The "38 vs 24" Discovery PROVEN!</h2>
             <p style="font-size: 1.3em; line-height: 1.8;">
                 The model can detect edits through probability mismatches.<br>
-                <strong>Original text: {original_stats['not_found_pct']:.1f}% suspicious tokens</strong><br>
-                <strong>Edited text: {edited_stats['not_found_pct']:.1f}% suspicious tokens</strong><br>
+                <strong>Original text: {{original_not_found_pct:.1f}}% suspicious tokens</strong><br>
+                <strong>Edited text: {{edited_not_found_pct:.1f}}% suspicious tokens</strong><br>
                 <br>
-                The edited version has <strong style="font-size: 1.5em; color: #ffeb3b;">{edited_stats['not_found_pct'] / original_stats['not_found_pct']:.1f}x</strong> more suspicious tokens!<br>
+                The edited version has <strong style="font-size: 1.5em; color: #ffeb3b;">{{not_found_ratio:.1f}}x</strong> more suspicious tokens!<br>
                 <br>
                 <em>The model's "stubbornness" becomes its authentication signature.</em>
             </p>
@@ -557,18 +494,170 @@ html += f"""
     </div>
 </body>
 </html>
-"""
+""")
+
+
+
+# Calculate stats (single pass over the results)
+def calc_stats(results):
+    return count_statuses(results)
+
+
+def load_results(path):
+    """Token results from a full_analysis (list) or test_original (dict) file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data if isinstance(data, list) else data['results']
+
+
+def generate_comparison(out, original_results, edited_results, stylesheet=None):
+    """
+    Stream a side-by-side comparison report to out.
+    
+    Args:
+        out: Open text file (or anything with .write)
+        original_results: Token results for the original text
+        edited_results: Token results for the edited text
+        stylesheet: URL of a shared stylesheet to link; None inlines the CSS
+        
+    Returns:
+        (original_stats, edited_stats)
+    """
+    original_stats = calc_stats(original_results)
+    edited_stats = calc_stats(edited_results)
+    
+    if stylesheet is None:
+        assets = "<style>\n" + COMPARISON_CSS + "    </style>"
+    else:
+        assets = f'<link rel="stylesheet" href="{stylesheet}">'
+    
+    original_nf = original_stats['not_found_pct']
+    COMPARISON_TEMPLATE.render(
+        out,
+        assets=assets,
+        original_tokens=token_spans(original_results),
+        edited_tokens=token_spans(edited_results),
+        not_found_ratio=edited_stats['not_found_pct'] / original_nf if original_nf else float('inf'),
+        **{f"original_{k}": v for k, v in original_stats.items()},
+        **{f"edited_{k}": v for k, v in edited_stats.items()}
+    )
+    
+    return original_stats, edited_stats
+
 
-# Save HTML
-with open('comparison_results.html', 'w', encoding='utf-8') as f:
-    f.write(html)
+def write_asset(output_dir):
+    """Write the shared stylesheet once; returns its path relative to the reports"""
+    os.makedirs(os.path.join(output_dir, "assets"), exist_ok=True)
+    with open(os.path.join(output_dir, "assets", ASSET_NAME), 'w', encoding='utf-8') as f:
+        f.write(COMPARISON_CSS)
+    return f"assets/{ASSET_NAME}"
 
-print(f"{Fore.GREEN}✓ HTML generated: comparison_results.html")
 
-# Open in browser
-import subprocess
-subprocess.run(['start', 'comparison_results.html'], shell=True)
+def render_pair(original_path, edited_path, output_path, stylesheet=None):
+    """
+    Load one (original, edited) pair and write its report.
+    Top-level so it can run in a worker process.
+    """
+    original_results = load_results(original_path)
+    edited_results = load_results(edited_path)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        original_stats, edited_stats = generate_comparison(f, original_results, edited_results, stylesheet)
+    return {
+        'output': output_path,
+        'original_not_found_pct': original_stats['not_found_pct'],
+        'edited_not_found_pct': edited_stats['not_found_pct']
+    }
+
+
+def load_pairs(path):
+    """[(name, original_path, edited_path)] from a JSON or whitespace-separated pairs file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    base = os.path.dirname(path)
+    pairs = []
+    if content.lstrip().startswith('['):
+        for entry in json.loads(content):
+            pairs.append((entry.get('name'), entry['original'], entry['edited']))
+    else:
+        for line in content.splitlines():
+            if line.strip() and not line.lstrip().startswith('#'):
+                original, edited = line.split()[:2]
+                pairs.append((None, original, edited))
+    
+    resolved = []
+    seen = {}
+    for name, original, edited in pairs:
+        original = original if os.path.isabs(original) else os.path.join(base, original)
+        edited = edited if os.path.isabs(edited) else os.path.join(base, edited)
+        name = name or os.path.splitext(os.path.basename(edited))[0]
+        # Keep report names unique so workers never write the same file
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            name = f"{name}_{seen[name]}"
+        resolved.append((name, original, edited))
+    return resolved
+
+
+def render_batch(pairs, output_dir, workers=None):
+    """
+    Render many comparison reports in parallel worker processes.
+    
+    Returns:
+        (reports written, failures as (name, error) tuples)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    stylesheet = write_asset(output_dir)
+    
+    written = []
+    failures = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(render_pair, original, edited, os.path.join(output_dir, f"{name}.html"), stylesheet): name
+            for name, original, edited in pairs
+        }
+        for future in as_completed(futures):
+            try:
+                written.append(future.result())
+            except Exception as e:
+                failures.append((futures[future], str(e)))
+    
+    return written, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render original vs edited comparison reports")
+    parser.add_argument("--original", default="original_analysis_results.json", help="Original text results")
+    parser.add_argument("--edited", default="full_analysis_results.json", help="Edited text results")
+    parser.add_argument("--output", default="comparison_results.html", help="Report path (single pair)")
+    parser.add_argument("--pairs", help="Pairs file for batch mode")
+    parser.add_argument("--output-dir", default="comparison_reports", help="Report directory (batch mode)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--no-open", action="store_true", help="Don't open the report in a browser")
+    args = parser.parse_args()
+    
+    if args.pairs:
+        pairs = load_pairs(args.pairs)
+        print(f"{Fore.CYAN}Rendering {len(pairs)} comparison reports...")
+        written, failures = render_batch(pairs, args.output_dir, args.workers)
+        for name, error in failures:
+            print(f"{Fore.RED}✗ {name}: {error}")
+        print(f"{Fore.GREEN}✓ {len(written)} reports written to: {args.output_dir}")
+        return
+    
+    print(f"{Fore.CYAN}Loading analysis results...")
+    print(f"\n{Fore.CYAN}Generating comparison HTML...")
+    render_pair(args.original, args.edited, args.output)
+    print(f"{Fore.GREEN}✓ HTML generated: {args.output}")
+    
+    if not args.no_open:
+        # Open in browser
+        import subprocess
+        subprocess.run(['start', args.output], shell=True)
+        print(f"{Fore.CYAN}Opening in browser...")
+    
+    print(f"{Fore.GREEN}{Style.BRIGHT}✓ DONE!")
 
-print(f"{Fore.CYAN}Opening in browser...")
-print(f"{Fore.GREEN}{Style.BRIGHT}✓ DONE!")
 
+if __name__ == "__main__":
+    main()
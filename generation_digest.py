@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Merkle Digests for TamperCheck Generations
+Find which parts of a presented copy of our own generation were edited,
+without any model calls
+
+A text is split into chunks of word/punctuation pieces. The chunk hashes
+are the leaves of a Merkle tree, which is stored with the generation
+(GenerationRecord.digest). To check a copy, build its tree the same way
+and descend from the root, skipping every subtree whose hash matches.
+k changed chunks then cost O(k log N) hash comparisons. Only the pieces in
+those chunks go on to probability scoring (TamperDetector.verify).
+
+Chunk boundaries depend only on the pieces themselves. A chunk ends at a
+sentence end, after a word whose hash falls in 1/CHUNK_TARGET of the
+range, or after MAX_CHUNK_WORDS words. An edit therefore moves only the
+boundaries next to it, and the chunks after it line up again. If an edit
+changes the number of chunks, the common prefix is still found in O(log N),
+but the shifted suffix only lines up with the tree on some levels, so an
+insertion or deletion costs up to O(N) hash comparisons.
+
+Usage:
+    python generation_digest.py generation.json edited.txt
+"""
+
+import sys
+import difflib
+import argparse
+import hashlib
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Tuple
+
+from tampercheck import TOKEN_PATTERN
+
+CHUNK_TARGET = 8        # Average words per chunk
+MAX_CHUNK_WORDS = 32    # Hard cap on words per chunk
+DIGEST_SIZE = 8         # Bytes per hash
+SENTENCE_ENDS = frozenset(".!?")
+
+# Domain separation, so a leaf can never pass for an inner node
+_LEAF = b"\x00"
+_NODE = b"\x01"
+
+
+def _hash(prefix: bytes, data: str) -> str:
+    return hashlib.blake2b(prefix + data.encode("utf-8"), digest_size=DIGEST_SIZE).hexdigest()
+
+
+def _is_boundary(word: str, target: int) -> bool:
+    """Whether a chunk ends after this word, from the word alone"""
+    if word in SENTENCE_ENDS:
+        return True
+    digest = hashlib.blake2b(word.encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "big") % target == 0
+
+
+def chunk_pieces(text: str, target: int = CHUNK_TARGET, max_words: int = MAX_CHUNK_WORDS) -> List[List[str]]:
+    """
+    Split text into content-defined chunks of TOKEN_PATTERN pieces.
+
+    Whitespace opens the next chunk, so a chunk's words carry their leading
+    space, as analysis tokens do.
+    """
+    chunks = []
+    current = []
+    words = 0
+    for piece in TOKEN_PATTERN.findall(text):
+        current.append(piece)
+        if not piece.strip():
+            continue
+        words += 1
+        if words >= max_words or _is_boundary(piece, target):
+            chunks.append(current)
+            current = []
+            words = 0
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+@dataclass
+class MerkleDigest:
+    """Merkle tree over a text's chunks: levels[0] are the chunk hashes, levels[-1] the root"""
+    levels: List[List[str]]
+    chunk_pieces: List[int]  # TOKEN_PATTERN pieces per chunk, to map chunks back to the text
+    target: int = CHUNK_TARGET
+    max_words: int = MAX_CHUNK_WORDS
+
+    @property
+    def root(self) -> str:
+        return self.levels[-1][0] if self.levels[-1] else ""
+
+    @property
+    def chunks(self) -> int:
+        return len(self.levels[0])
+
+    def piece_starts(self) -> List[int]:
+        """Index of each chunk's first piece, plus the total piece count"""
+        starts = [0]
+        for count in self.chunk_pieces:
+            starts.append(starts[-1] + count)
+        return starts
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly representation"""
+        return {
+            'target': self.target,
+            'max_words': self.max_words,
+            'chunk_pieces': self.chunk_pieces,
+            'levels': self.levels
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MerkleDigest":
+        """Rebuild a digest from to_dict output"""
+        return cls(
+            levels=data['levels'],
+            chunk_pieces=data['chunk_pieces'],
+            target=data.get('target', CHUNK_TARGET),
+            max_words=data.get('max_words', MAX_CHUNK_WORDS)
+        )
+
+
+def build_digest(text: str, target: int = CHUNK_TARGET, max_words: int = MAX_CHUNK_WORDS) -> MerkleDigest:
+    """
+    Chunk text and hash the chunks into a Merkle tree.
+
+    An odd node at the end of a level is carried up unchanged.
+    """
+    chunks = chunk_pieces(text, target, max_words)
+    level = [_hash(_LEAF, "".join(chunk)) for chunk in chunks]
+    levels = [level]
+    while len(level) > 1:
+        level = [_hash(_NODE, level[i] + level[i + 1]) if i + 1 < len(level) else level[i]
+                 for i in range(0, len(level), 2)]
+        levels.append(level)
+    return MerkleDigest(levels, [len(chunk) for chunk in chunks], target, max_words)
+
+
+@dataclass
+class DigestDiff:
+    """Changed chunks between a stored and a presented digest"""
+    changes: List[Tuple[Tuple[int, int], Tuple[int, int]]] = field(default_factory=list)  # (stored, presented) chunk ranges
+    comparisons: int = 0  # Hash comparisons made
+
+    @property
+    def changed_chunks(self) -> int:
+        """Chunks of the presented text that differ (or are new)"""
+        return sum(end - start for _, (start, end) in self.changes)
+
+
+def _ranges(indices: List[int]) -> List[Tuple[int, int]]:
+    """Sorted indices -> [start, end) runs"""
+    runs = []
+    for index in indices:
+        if runs and runs[-1][1] == index:
+            runs[-1] = (runs[-1][0], index + 1)
+        else:
+            runs.append((index, index + 1))
+    return runs
+
+
+def diff_digests(stored: MerkleDigest, presented: MerkleDigest) -> DigestDiff:
+    """
+    Find the chunks that differ between two digests.
+
+    With the same number of chunks, matching subtrees are skipped from the
+    root down, in O(k log N) comparisons for k changed chunks. Otherwise the
+    longest common prefix is found one tree level at a time, in O(log N).
+    The common suffix is matched on the levels that line up from the right:
+    one comparison per 2**v chunks, where 2**v is the largest power of two
+    dividing the change in chunk count. Only the window between them is
+    aligned with difflib. An insertion or deletion of an odd number of
+    chunks therefore costs O(N) comparisons in the worst case, not O(log N).
+
+    Raises:
+        ValueError: If the digests were chunked with different settings
+    """
+    if (stored.target, stored.max_words) != (presented.target, presented.max_words):
+        raise ValueError("Digests were chunked with different settings")
+    result = DigestDiff(comparisons=1)
+    if stored.root == presented.root:
+        return result
+    n, m = stored.chunks, presented.chunks
+
+    if n == m:
+        changed = []
+        stack = [(len(stored.levels) - 1, 0)]
+        while stack:
+            level, index = stack.pop()
+            if level == 0:
+                changed.append(index)
+                continue
+            # Right child first, so leaves come off the stack in order
+            for child in (2 * index + 1, 2 * index):
+                if child < len(stored.levels[level - 1]):
+                    result.comparisons += 1
+                    if stored.levels[level - 1][child] != presented.levels[level - 1][child]:
+                        stack.append((level - 1, child))
+        result.changes = [(run, run) for run in _ranges(changed)]
+        return result
+
+    # Full subtrees over the same leaves have the same hash in both trees
+    prefix = 0
+    for level in range(min(len(stored.levels), len(presented.levels)) - 1, -1, -1):
+        size = 1 << level
+        if prefix + size <= min(n, m):
+            result.comparisons += 1
+            if stored.levels[level][prefix >> level] == presented.levels[level][prefix >> level]:
+                prefix += size
+
+    # Counted from the right, the trees only line up on levels whose node
+    # size divides the change in chunk count. The last node of such a level
+    # covers the same number of leaves in both, even when it is partial.
+    aligned = 0
+    while aligned < min(len(stored.levels), len(presented.levels)) - 1 and abs(m - n) % (2 << aligned) == 0:
+        aligned += 1
+    suffix = 0
+    level = aligned
+    while level >= 0:
+        if suffix == 0:
+            index, other = (n - 1) >> level, (m - 1) >> level
+            count = n - (index << level)
+        else:
+            index, other = ((n - suffix) >> level) - 1, ((m - suffix) >> level) - 1
+            count = 1 << level
+        if prefix + suffix + count <= min(n, m):
+            result.comparisons += 1
+            if stored.levels[level][index] == presented.levels[level][other]:
+                suffix += count
+                continue
+        level -= 1
+
+    matcher = difflib.SequenceMatcher(None, stored.levels[0][prefix:n - suffix], presented.levels[0][prefix:m - suffix],
+                                      autojunk=False)
+    result.comparisons += (n - prefix - suffix) + (m - prefix - suffix)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            result.changes.append(((prefix + i1, prefix + i2), (prefix + j1, prefix + j2)))
+    return result
+
+
+def align(stored: MerkleDigest, text: str, presented_text: str) -> Tuple[List[Tuple[str, int, int, int, int]], DigestDiff]:
+    """
+    difflib-style opcodes over the TOKEN_PATTERN pieces of the stored text
+    and a presented copy. Only the changed chunks are diffed word by word.
+
+    Args:
+        stored: Digest of text, as stored with the generation
+        text: The generated text
+        presented_text: The copy to check
+
+    Returns:
+        (opcodes, DigestDiff); opcodes are (tag, i1, i2, j1, j2) as from
+        difflib.SequenceMatcher.get_opcodes
+    """
+    presented = build_digest(presented_text, stored.target, stored.max_words)
+    diff = diff_digests(stored, presented)
+    original_pieces = TOKEN_PATTERN.findall(text)
+    presented_pieces = TOKEN_PATTERN.findall(presented_text)
+    stored_starts, presented_starts = stored.piece_starts(), presented.piece_starts()
+
+    opcodes = []
+    i = j = 0
+    for (a, b), (c, d) in diff.changes:
+        i1, i2, j1, j2 = stored_starts[a], stored_starts[b], presented_starts[c], presented_starts[d]
+        if i1 > i:
+            opcodes.append(("equal", i, i1, j, j1))
+        matcher = difflib.SequenceMatcher(None, original_pieces[i1:i2], presented_pieces[j1:j2], autojunk=False)
+        opcodes += [(tag, i1 + x1, i1 + x2, j1 + y1, j1 + y2) for tag, x1, x2, y1, y2 in matcher.get_opcodes()]
+        i, j = i2, j2
+    if i < len(original_pieces) or j < len(presented_pieces):
+        opcodes.append(("equal", i, len(original_pieces), j, len(presented_pieces)))
+    return opcodes, diff
+
+
+def main():
+    from colorama import Fore, Style, init as colorama_init
+    from tampercheck import GenerationRecord
+
+    if sys.platform == 'win32':
+        import codecs
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+    colorama_init(autoreset=True)
+
+    parser = argparse.ArgumentParser(description="Show which chunks of a copy differ from a stored generation")
+    parser.add_argument("record", help="Generation record JSON (GenerationRecord.save)")
+    parser.add_argument("presented", help="Text file holding the copy to check")
+    args = parser.parse_args()
+
+    record = GenerationRecord.load(args.record)
+    with open(args.presented, 'r', encoding='utf-8') as f:
+        presented_text = f.read()
+
+    stored = record.digest or build_digest(record.text)
+    opcodes, diff = align(stored, record.text, presented_text)
+    pieces = TOKEN_PATTERN.findall(presented_text)
+
+    print(f"{Fore.CYAN}{Style.BRIGHT}{stored.chunks} chunks stored, {diff.changed_chunks} changed "
+          f"({diff.comparisons} hash comparisons, no model calls){Style.RESET_ALL}\n")
+    for tag, i1, i2, j1, j2 in opcodes:
+        text = "".join(pieces[j1:j2])
+        if tag == "equal":
+            print(f"{Fore.WHITE}{text}", end="")
+        elif text:
+            print(f"{Fore.RED}{Style.BRIGHT}{text}", end="")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Streaming HTML Report Rendering for TamperCheck
+
+Report templates are parsed once into static text and named placeholders.
+Rendering writes straight to a file handle: static text as-is, scalar
+placeholders through format(), and iterable placeholders (token spans,
+table rows) chunk by chunk, so a report is produced in linear time without
+ever holding the whole document in memory.
+
+Placeholders look like {{name}} or {{name:.1f}} (any format spec). Plain
+CSS braces need no escaping.
+
+write_compact_report() is the mode for long documents: results are embedded
+once as compact JSON and a small viewer renders only the visible tokens and
+table rows, building tooltips and top predictions on demand.
+
+Usage:
+    python html_report.py full_analysis_results.json --output report.html
+"""
+
+import io
+import re
+import sys
+import json
+import argparse
+
+from streaming_stats import count_statuses
+
+
+_PLACEHOLDER = re.compile(r'\{\{(\w+)(?::([^{}]*))?\}\}')
+
+STATUS_CLASSES = {
+    'HIGH': 'high',
+    'MEDIUM': 'medium',
+    'LOW': 'low',
+    'NOT_FOUND': 'not-found'
+}
+
+
+class StreamTemplate:
+    """A template compiled into (literal, placeholder, format spec) parts"""
+
+    def __init__(self, source):
+        pieces = _PLACEHOLDER.split(source)
+        self._parts = [(pieces[i], pieces[i + 1], pieces[i + 2] or '') for i in range(0, len(pieces) - 1, 3)]
+        self._tail = pieces[-1]
+        self.fields = {name for _, name, _ in self._parts}
+
+    def render(self, out, **values):
+        """
+        Write the template to out (anything with .write)
+
+        String and number values are formatted with the placeholder's spec;
+        any other iterable is streamed, one write per chunk.
+        """
+        missing = self.fields - values.keys()
+        if missing:
+            raise KeyError(f"Missing template values: {', '.join(sorted(missing))}")
+
+        write = out.write
+        for literal, name, spec in self._parts:
+            write(literal)
+            value = values[name]
+            if isinstance(value, (str, int, float)):
+                write(format(value, spec))
+            else:
+                for chunk in value:
+                    write(chunk)
+        write(self._tail)
+
+    def render_string(self, **values):
+        """Render into a string (for small reports and callers that need one)"""
+        buffer = io.StringIO()
+        self.render(buffer, **values)
+        return buffer.getvalue()
+
+
+def escape(text):
+    """The escaping the reports have always applied to token text"""
+    return text.replace('<', '&lt;').replace('>', '&gt;')
+
+
+def token_spans(results):
+    """Yield one colour-coded <span> with a tooltip per scored token"""
+    for r in results:
+        if r.get('status') == 'ERROR':
+            continue
+
+        status_class = STATUS_CLASSES.get(r.get('status'), 'high')
+        tooltip_text = f"Probability: {r.get('probability', 0):.1f}%"
+        if r.get('top_alternatives'):
+            top = r['top_alternatives'][0]
+            tooltip_text += f" | Model prefers: '{top['token']}' ({top['probability']:.1f}%)"
+
+        yield f'<span class="token {status_class}"><span class="tooltip">{tooltip_text}</span>{escape(r["token"])}</span>'
+
+
+def flagged_rows(results):
+    """Yield one details-table <tr> per LOW or NOT_FOUND token"""
+    for r in results:
+        if r['status'] not in ('NOT_FOUND', 'LOW'):
+            continue
+
+        alts_html = "".join(
+            f"<div>#{i+1}: <strong>'{escape(alt['token'])}'</strong> ({alt['probability']:.1f}%)</div>"
+            for i, alt in enumerate(r['top_alternatives'][:3])
+        )
+        prob_display = f"{r['probability']:.1f}%" if r['found'] else "NOT IN TOP 5"
+
+        yield f"""
+                    <tr class="flagged">
+                        <td>{r['position']}</td>
+                        <td><strong>'{escape(r['token'])}'</strong></td>
+                        <td style="color: #dc3545; font-weight: bold;">{prob_display}</td>
+                        <td class="alternatives">{alts_html}</td>
+                    </tr>
+"""
+
+
+# One letter per token in the compact payload
+STATUS_CODES = {'HIGH': 'H', 'MEDIUM': 'M', 'LOW': 'L', 'NOT_FOUND': 'N'}
+
+
+def compact_payload(results):
+    """
+    Columnar form of the results for the compact viewer.
+
+    Strings are stored once in 'w' and referenced by index; probabilities
+    are integer tenths of a percent. 'a' holds each token's alternatives
+    flattened as [string index, tenths, string index, tenths, ...].
+    """
+    strings = {}
+
+    def ref(text):
+        if text not in strings:
+            strings[text] = len(strings)
+        return strings[text]
+
+    tokens, positions, statuses, probabilities, alternatives = [], [], [], [], []
+    for r in results:
+        if r.get('status') == 'ERROR':
+            continue
+        tokens.append(ref(r['token']))
+        positions.append(r['position'])
+        statuses.append(STATUS_CODES.get(r.get('status'), 'H'))
+        probabilities.append(round(r.get('probability', 0) * 10))
+        flat = []
+        for alt in r.get('top_alternatives') or []:
+            flat += [ref(alt['token']), round(alt['probability'] * 10)]
+        alternatives.append(flat)
+
+    return {
+        'w': list(strings),
+        't': tokens,
+        'p': positions,
+        's': "".join(statuses),
+        'q': probabilities,
+        'a': alternatives
+    }
+
+
+def _json_chunks(payload):
+    """Compact JSON, chunk by chunk, safe inside a <script> element"""
+    # One C-encoded chunk per column rather than one per value
+    for i, (key, column) in enumerate(payload.items()):
+        chunk = json.dumps(column, separators=(',', ':'), ensure_ascii=False)
+        yield ('{' if i == 0 else ',') + json.dumps(key) + ':' + chunk.replace('<', '\\u003c')
+    yield '}'
+
+
+COMPACT_TEMPLATE = StreamTemplate("""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{{title}}</title>
+    <style>
+        * { margin: 0; padding: 0; box-sizing: border-box; }
+        
+        body {
+            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            padding: 20px;
+            color: #333;
+        }
+        
+        .container {
+            max-width: 1400px;
+            margin: 0 auto;
+            background: white;
+            border-radius: 15px;
+            padding: 40px;
+            box-shadow: 0 20px 60px rgba(0,0,0,0.3);
+        }
+        
+        h1 { color: #667eea; text-align: center; font-size: 2.4em; margin-bottom: 10px; }
+        
+        .subtitle { text-align: center; color: #666; margin-bottom: 20px; }
+        
+        .section {
+            margin: 30px 0;
+            padding: 30px;
+            background: #f8f9fa;
+            border-radius: 12px;
+            border-left: 5px solid #667eea;
+        }
+        
+        .section h2 { color: #667eea; margin-bottom: 20px; }
+        
+        .probability-bar {
+            height: 40px;
+            background: #e9ecef;
+            border-radius: 20px;
+            overflow: hidden;
+            display: flex;
+        }
+        
+        .prob-segment {
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            color: white;
+            font-weight: bold;
+            white-space: nowrap;
+            overflow: hidden;
+        }
+        
+        .prob-high { background: #28a745; }
+        .prob-medium { background: #ffc107; color: black; }
+        .prob-low { background: #ff6b6b; }
+        .prob-not-found { background: #dc3545; }
+        
+        .text-display {
+            background: white;
+            padding: 25px;
+            border-radius: 8px;
+            line-height: 2.2;
+            font-size: 1.15em;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+            font-family: 'Georgia', serif;
+        }
+        
+        .token {
+            display: inline-block;
+            padding: 2px 4px;
+            margin: 1px;
+            border-radius: 3px;
+            cursor: pointer;
+        }
+        
+        .token.high { background: #28a745; color: white; }
+        .token.medium { background: #ffc107; color: black; }
+        .token.low { background: #ff6b6b; color: white; }
+        .token.not-found { background: #dc3545; color: white; font-weight: bold; }
+        
+        #tip {
+            position: fixed;
+            display: none;
+            background: #333;
+            color: white;
+            padding: 8px 12px;
+            border-radius: 6px;
+            font-size: 0.85em;
+            pointer-events: none;
+            z-index: 100;
+            white-space: nowrap;
+        }
+        
+        .rows {
+            position: relative;
+            height: 480px;
+            overflow-y: auto;
+            background: white;
+            border-radius: 8px;
+        }
+        
+        .row {
+            position: absolute;
+            left: 0;
+            right: 0;
+            display: grid;
+            grid-template-columns: 100px 220px 160px 1fr;
+            align-items: center;
+            padding: 0 15px;
+            border-bottom: 1px solid #e9ecef;
+            background: #fff5f5;
+        }
+        
+        .row.head {
+            position: sticky;
+            top: 0;
+            background: #667eea;
+            color: white;
+            font-weight: bold;
+            height: 40px;
+            z-index: 1;
+        }
+        
+        .alternatives { font-size: 0.9em; color: #666; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>{{title}}</h1>
+        <p class="subtitle">{{total}} tokens • {{not_found}} not in the model's top predictions ({{not_found_pct:.1f}}%)</p>
+        
+        <div class="section">
+            <h2>📊 Probability Distribution</h2>
+            <div class="probability-bar">
+                <div class="prob-segment prob-high" style="width: {{high_pct}}%">{{high_pct:.1f}}% HIGH</div>
+                <div class="prob-segment prob-medium" style="width: {{medium_pct}}%">{{medium_pct:.1f}}% MED</div>
+                <div class="prob-segment prob-low" style="width: {{low_pct}}%">{{low_pct:.1f}}% LOW</div>
+                <div class="prob-segment prob-not-found" style="width: {{not_found_pct}}%">{{not_found_pct:.1f}}% ⚠️</div>
+            </div>
+        </div>
+        
+        <div class="section">
+            <h2>🎨 Color-Coded Analysis</h2>
+            <div class="text-display" id="text"></div>
+        </div>
+        
+        <div class="section">
+            <h2>📋 Detailed Token Analysis</h2>
+            <p style="margin-bottom: 20px;">Showing tokens with LOW probability or NOT in the model's top predictions:</p>
+            <div class="rows" id="rows">
+                <div class="row head"><div>Position</div><div>Your Token</div><div>Probability</div><div>Model's Top Predictions</div></div>
+            </div>
+        </div>
+    </div>
+    <div id="tip"></div>
+    <script type="application/json" id="report-data">{{data}}</script>
+    <script>
+    (function () {
+        var D = JSON.parse(document.getElementById('report-data').textContent);
+        var W = D.w, T = D.t, P = D.p, S = D.s, Q = D.q, A = D.a;
+        var CLASSES = {H: 'high', M: 'medium', L: 'low', N: 'not-found'};
+        var BLOCK = 256, ROW = 40;
+        
+        function esc(s) {
+            return s.replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+        }
+        
+        function pct(tenths) {
+            return (tenths / 10).toFixed(1) + '%';
+        }
+        
+        function tooltip(i) {
+            var text = 'Probability: ' + pct(Q[i]);
+            if (A[i].length) {
+                text += " | Model prefers: '" + W[A[i][0]] + "' (" + pct(A[i][1]) + ')';
+            }
+            return text;
+        }
+        
+        // Text: one placeholder per block of tokens, filled only near the viewport
+        var text = document.getElementById('text');
+        function fill(div) {
+            var start = +div.dataset.start, end = Math.min(start + BLOCK, T.length), html = '';
+            for (var i = start; i < end; i++) {
+                html += '<span class="token ' + CLASSES[S[i]] + '" data-i="' + i + '">' + esc(W[T[i]]) + '</span>';
+            }
+            div.innerHTML = html;
+            div.style.height = '';
+        }
+        var observer = new IntersectionObserver(function (entries) {
+            entries.forEach(function (entry) {
+                var div = entry.target;
+                if (entry.isIntersecting && !div.firstChild) {
+                    fill(div);
+                } else if (!entry.isIntersecting && div.firstChild) {
+                    div.style.height = div.offsetHeight + 'px';
+                    div.innerHTML = '';
+                }
+            });
+        }, {rootMargin: '1500px 0px'});
+        for (var start = 0; start < T.length; start += BLOCK) {
+            var div = document.createElement('div');
+            div.dataset.start = start;
+            div.style.height = (Math.ceil(Math.min(BLOCK, T.length - start) / 12) * 2.2) + 'em';
+            text.appendChild(div);
+            observer.observe(div);
+        }
+        
+        // Tooltip: a single element, text built when a token is hovered
+        var tip = document.getElementById('tip');
+        text.addEventListener('mouseover', function (e) {
+            var token = e.target.closest('.token');
+            if (!token) return;
+            var box = token.getBoundingClientRect();
+            tip.textContent = tooltip(+token.dataset.i);
+            tip.style.display = 'block';
+            tip.style.left = Math.max(0, box.left) + 'px';
+            tip.style.top = Math.max(0, box.top - 38) + 'px';
+        });
+        text.addEventListener('mouseout', function () {
+            tip.style.display = 'none';
+        });
+        
+        // Flagged-token table: fixed-height rows, only the visible ones exist
+        var flagged = [];
+        for (var i = 0; i < S.length; i++) {
+            if (S[i] === 'L' || S[i] === 'N') flagged.push(i);
+        }
+        var rows = document.getElementById('rows');
+        var spacer = document.createElement('div');
+        spacer.style.height = (flagged.length * ROW) + 'px';
+        rows.appendChild(spacer);
+        var pool = document.createElement('div');
+        rows.appendChild(pool);
+        function renderRows() {
+            var first = Math.max(0, Math.floor(rows.scrollTop / ROW) - 5);
+            var last = Math.min(flagged.length, first + Math.ceil(rows.clientHeight / ROW) + 10);
+            var html = '';
+            for (var r = first; r < last; r++) {
+                var i = flagged[r], alts = '';
+                for (var k = 0; k < Math.min(A[i].length, 6); k += 2) {
+                    alts += '#' + (k / 2 + 1) + ": <strong>'" + esc(W[A[i][k]]) + "'</strong> (" + pct(A[i][k + 1]) + ') ';
+                }
+                html += '<div class="row" style="top:' + (ROW * (r + 1)) + 'px;height:' + ROW + 'px">'
+                    + '<div>' + P[i] + '</div>'
+                    + "<div><strong>'" + esc(W[T[i]]) + "'</strong></div>"
+                    + '<div style="color: #dc3545; font-weight: bold;">' + (S[i] === 'N' ? 'NOT IN TOP 5' : pct(Q[i])) + '</div>'
+                    + '<div class="alternatives">' + alts + '</div></div>';
+            }
+            pool.innerHTML = html;
+        }
+        rows.addEventListener('scroll', function () { requestAnimationFrame(renderRows); });
+        renderRows();
+    })();
+    </script>
+</body>
+</html>
+""")
+
+
+def write_compact_report(out, results, title="TamperCheck Analysis"):
+    """
+    Stream a compact report: stats and a data-driven viewer instead of
+    one element per token
+    """
+    stats = count_statuses(results)
+    COMPACT_TEMPLATE.render(
+        out,
+        title=escape(title),
+        data=_json_chunks(compact_payload(results)),
+        **{k: v for k, v in stats.items() if k in COMPACT_TEMPLATE.fields}
+    )
+
+
+def main():
+    if sys.platform == 'win32':
+        import codecs
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+    parser = argparse.ArgumentParser(description="Render a compact HTML report from stored results")
+    parser.add_argument("results", help="Result file (full_analysis, test_original or validation output)")
+    parser.add_argument("--output", default="compact_report.html", help="Where to write the report")
+    parser.add_argument("--title", default="TamperCheck Analysis", help="Report title")
+    args = parser.parse_args()
+
+    with open(args.results, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if isinstance(data, list):
+        results = data
+    elif 'individual_tests' in data:
+        results = [r for test in data['individual_tests'] for r in test['results']]
+    else:
+        results = data['results']
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        write_compact_report(f, results, args.title)
+
+    print(f"✓ Compact report written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,12 @@
 Interactive Test Suite for TamperCheck
 
 This script:
-1. Generates text from OpenAI
-2. Saves the original
+1. Generates text from OpenAI, recording each token's logprobs
+2. Saves the original and its token record
 3. Asks you to manually edit it
-4. Compares original vs edited with tamper detection
+4. Verifies original vs edited against the record (only edits are scored)
 """
 
-import os
 import json
 from datetime import datetime
 from tampercheck import TamperDetector
@@ -18,8 +17,9 @@ from colorama import Fore, Style, init as colorama_init
 colorama_init(autoreset=True)
 
 
-def save_test_data(original_text, edited_text, context, timestamp):
-    """Save test data for analysis"""
+def save_test_data(original_text, edited_text, context, timestamp, record=None):
+    """Save test data for analysis, plus the generation's token record if given"""
+    stamp = timestamp.replace(':', '-').replace(' ', '_')
     data = {
         "timestamp": timestamp,
         "context": context,
@@ -27,7 +27,12 @@ def save_test_data(original_text, edited_text, context, timestamp):
         "edited_text": edited_text
     }
     
-    filename = f"test_data_{timestamp.replace(':', '-').replace(' ', '_')}.json"
+    if record is not None:
+        data["record_file"] = f"generation_{stamp}.json"
+        record.save(data["record_file"])
+        print(f"{Fore.GREEN}✓ Token record saved to: {data['record_file']}")
+    
+    filename = f"test_data_{stamp}.json"
     with open(filename, 'w') as f:
         json.dump(data, f, indent=2)
     
@@ -62,20 +67,14 @@ def main():
     ]
     
     try:
-        # Generate original text
-        from openai import OpenAI
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=context,
-            temperature=0.7,
-            max_tokens=100
-        )
+        # Generate original text, streaming it and recording its logprobs
+        print(f"\n{Fore.WHITE}", end="")
+        record = detector.generate(context, temperature=0.7, max_tokens=100, stream=True,
+                                   on_token=lambda score: print(score.token, end="", flush=True))
+        print()
+        original_text = record.text
         
-        original_text = response.choices[0].message.content
-        
-        print(f"\n{Fore.GREEN}✓ Original text generated!")
+        print(f"\n{Fore.GREEN}✓ Original text generated ({len(record.tokens)} tokens recorded)!")
         print(f"\n{Fore.WHITE}{Style.BRIGHT}ORIGINAL TEXT:")
         print(f"{Fore.CYAN}{'='*80}")
         print(f"{Fore.WHITE}{original_text}")
@@ -127,14 +126,15 @@ def main():
     
     # Save test data
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    save_test_data(original_text, edited_text, context, timestamp)
+    save_test_data(original_text, edited_text, context, timestamp, record)
     
     # Step 3: Analyze ORIGINAL text
     print(f"\n{Fore.CYAN}{Style.BRIGHT}[4/5] Analyzing ORIGINAL text...")
     print(f"{Fore.YELLOW}This should show mostly HIGH probability (green) tokens")
     
     try:
-        result_original = detector.analyze(context, "", temperature=0.7)
+        # Identical to the record, so this needs no API calls
+        result_original = detector.verify(record, original_text)
         
         print(f"\n{Fore.WHITE}{Style.BRIGHT}═══ ORIGINAL TEXT ANALYSIS ═══")
         detector.print_results(result_original, show_all_tokens=False)
@@ -147,15 +147,13 @@ def main():
     print(f"{Fore.YELLOW}This should show LOW probability (red) tokens where you made edits!")
     print(f"{Fore.YELLOW}The '38 vs 24' effect in action! 🔍")
     
-    # For edited text, we need to regenerate with the same context
-    # and see what probabilities the model assigns
+    # Diff against the record; only the edited words are sent to the model
     try:
-        # We'll analyze by having the model regenerate and compare
-        result_edited = detector.analyze(context, "", temperature=0.7)
+        result_edited = detector.verify(record, edited_text)
         
         print(f"\n{Fore.WHITE}{Style.BRIGHT}═══ EDITED TEXT ANALYSIS ═══")
-        print(f"{Fore.YELLOW}Note: We're comparing what the model WOULD generate")
-        print(f"{Fore.YELLOW}vs what you ACTUALLY wrote (the edit)")
+        print(f"{Fore.YELLOW}Note: Unchanged words reuse the probabilities recorded while")
+        print(f"{Fore.YELLOW}generating; {result_edited.usage.calls} requests scored your edits")
         
         detector.print_results(result_edited, show_all_tokens=False)
         
@@ -167,9 +165,6 @@ def main():
         print(f"\n{Fore.WHITE}Edited text (what you provided):")
         print(f"{Fore.YELLOW}{edited_text}")
         
-        print(f"\n{Fore.WHITE}What the model would generate again:")
-        print(f"{Fore.CYAN}{result_edited.original_message}")
-        
         # Highlight differences
         if original_text != edited_text:
             print(f"\n{Fore.RED}{Style.BRIGHT}⚠️  DIFFERENCES DETECTED!")
@@ -186,7 +181,7 @@ def main():
     print(f"{'='*80}{Style.RESET_ALL}")
     
     print(f"\n{Fore.WHITE}What we demonstrated:")
-    print(f"  1. {Fore.GREEN}✓{Fore.WHITE} Generated original text from OpenAI")
+    print(f"  1. {Fore.GREEN}✓{Fore.WHITE} Generated original text from OpenAI, recording its logprobs")
     print(f"  2. {Fore.GREEN}✓{Fore.WHITE} You manually edited the text")
     print(f"  3. {Fore.GREEN}✓{Fore.WHITE} Analyzed token probabilities of both versions")
     print(f"  4. {Fore.GREEN}✓{Fore.WHITE} Model detected edits through probability mismatches")
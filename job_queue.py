@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Durable Job Queue for TamperCheck
+Submit long analyses and poll for them instead of blocking
+
+Jobs live in a local SQLite database, so pending, running and finished
+analyses survive restarts. A pool of worker threads drains the queue:
+
+- Priority classes: interactive jobs are always claimed before default
+  ones, and default before nightly batch work; FIFO within a class.
+- Leases: a claimed job is leased to its worker, which renews the lease
+  while it runs. If the worker crashes the lease expires and another
+  worker picks the job up again.
+- Retries: a failed (or abandoned) job goes back to pending with
+  exponential backoff until it has used max_attempts attempts.
+
+Usage:
+    python job_queue.py submit --prompt "Write about robots" --file story.txt --priority interactive
+    python job_queue.py work --workers 4 --rpm 500
+    python job_queue.py status 12
+    python job_queue.py result 12 --output job_12.json
+    python job_queue.py list --status pending
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import logging
+import argparse
+import threading
+
+from tampercheck import TamperDetector, RateLimiter, configure_logging, load_environment, _event
+
+logger = logging.getLogger("tampercheck.jobs")
+
+DEFAULT_DB = "tampercheck_jobs.db"
+
+# Lower runs first
+PRIORITY_CLASSES = {'interactive': 0, 'default': 1, 'batch': 2}
+
+STATUSES = ('pending', 'running', 'done', 'failed')
+
+# Longest a worker waits before retrying after a queue error, in seconds
+MAX_WORKER_BACKOFF = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    priority INTEGER NOT NULL,
+    request TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    not_before REAL NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority, id);
+"""
+
+
+class JobQueue:
+    """
+    SQLite-backed queue of analysis requests.
+
+    Safe to share between threads and processes: every thread gets its own
+    connection, and claiming and failing run in IMMEDIATE transactions so
+    two workers can never take the same job or count the same attempt.
+    """
+
+    def __init__(self, path=DEFAULT_DB, retry_delay=5.0):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+            retry_delay: Backoff before the first retry in seconds; doubles
+                    with every further attempt
+        """
+        self.path = path
+        self.retry_delay = retry_delay
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        if not hasattr(self._local, 'conn'):
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return self._local.conn
+
+    def submit(self, request, priority='default', max_attempts=3):
+        """
+        Queue an analysis.
+
+        Args:
+            request: {'context', 'message', 'strategy'?, 'temperature'?, 'resolve'?}
+            priority: 'interactive', 'default' or 'batch'
+            max_attempts: Attempts before the job is marked failed
+
+        Returns:
+            The job id
+        """
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class: {priority}")
+        now = time.time()
+        cursor = self._connect().execute(
+            "INSERT INTO jobs (priority, request, max_attempts, created, updated) VALUES (?, ?, ?, ?, ?)",
+            (PRIORITY_CLASSES[priority], json.dumps(request, ensure_ascii=False), max_attempts, now, now)
+        )
+        return cursor.lastrowid
+
+    def claim(self, worker, lease_seconds=60.0):
+        """
+        Lease the next runnable job to worker.
+
+        Runnable means pending and past its retry backoff, or running with
+        an expired lease (its worker died). Abandoned jobs that are out of
+        attempts are marked failed instead.
+
+        Returns:
+            The job as a dict, or None if nothing is runnable
+        """
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'lease expired', lease_owner = NULL, updated = ? "
+                "WHERE status = 'running' AND lease_expires < ? AND attempts >= max_attempts",
+                (now, now)
+            )
+            row = conn.execute(
+                "SELECT id FROM jobs "
+                "WHERE (status = 'pending' AND not_before <= ?) OR (status = 'running' AND lease_expires < ?) "
+                "ORDER BY priority, id LIMIT 1",
+                (now, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires = ?, updated = ? WHERE id = ?",
+                (worker, now + lease_seconds, now, row['id'])
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row['id'])
+
+    def renew(self, job_id, worker, lease_seconds=60.0):
+        """Extend worker's lease; False if the job is no longer leased to it"""
+        cursor = self._connect().execute(
+            "UPDATE jobs SET lease_expires = ?, updated = ? WHERE id = ? AND status = 'running' AND lease_owner = ?",
+            (time.time() + lease_seconds, time.time(), job_id, worker)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, worker, result):
+        """Store the result of a leased job; False if the lease was lost"""
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_owner = NULL, lease_expires = NULL, "
+            "updated = ? WHERE id = ? AND status = 'running' AND lease_owner = ?",
+            (json.dumps(result, ensure_ascii=False, default=str), time.time(), job_id, worker)
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id, worker, error):
+        """
+        Record a failed attempt: back to pending with backoff, or failed
+        for good once max_attempts is used up
+        """
+        conn = self._connect()
+        now = time.time()
+        # Read and update under one write lock, so an expired lease cannot be
+        # re-claimed (bumping attempts) between the two
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ? AND lease_owner = ?",
+                               (job_id, worker)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return False
+            if row['attempts'] >= row['max_attempts']:
+                status, not_before = 'failed', 0
+            else:
+                status, not_before = 'pending', now + self.retry_delay * 2 ** (row['attempts'] - 1)
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, not_before = ?, lease_owner = NULL, lease_expires = NULL, "
+                "updated = ? WHERE id = ? AND lease_owner = ?",
+                (status, str(error), not_before, now, job_id, worker)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def get(self, job_id):
+        """Job as a dict (request/result decoded), or None"""
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['request'] = json.loads(job['request'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        job['priority'] = next(name for name, value in PRIORITY_CLASSES.items() if value == job['priority'])
+        return job
+
+    def jobs(self, status=None, limit=100):
+        """Most recent jobs, without their results"""
+        query = "SELECT id FROM jobs" + (" WHERE status = ?" if status else "") + " ORDER BY id DESC LIMIT ?"
+        rows = self._connect().execute(query, ((status,) if status else ()) + (limit,)).fetchall()
+        return [dict(self.get(row['id']), result=None) for row in rows]
+
+    def counts(self):
+        """{status: number of jobs}"""
+        counts = dict.fromkeys(STATUSES, 0)
+        for row in self._connect().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+            counts[row['status']] = row['n']
+        return counts
+
+
+class WorkerPool:
+    """
+    Threads that claim jobs from a JobQueue and run them through a
+    TamperDetector each, sharing one rate limiter
+    """
+
+    def __init__(self, queue, workers=4, lease_seconds=60.0, poll_interval=1.0, **detector_options):
+        self.queue = queue
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        detector_options.setdefault('rate_limiter', RateLimiter(
+            detector_options.pop('requests_per_minute', None), detector_options.pop('tokens_per_minute', None)))
+        self._options = detector_options
+        self._stop = threading.Event()
+        self._threads = []
+        self.processed = 0
+
+    def start(self):
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, args=(f"{prefix}:{i}",), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, wait=True):
+        """Stop claiming new jobs; with wait, let running jobs finish"""
+        self._stop.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def run_until_empty(self):
+        """Process jobs until none are pending or running, then stop"""
+        self.start()
+        while not self._stop.is_set():
+            counts = self.queue.counts()
+            if counts['pending'] == 0 and counts['running'] == 0:
+                break
+            time.sleep(self.poll_interval)
+        self.stop()
+
+    def _work(self, worker):
+        detector = TamperDetector(**self._options)
+        backoff = self.poll_interval
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim(worker, self.lease_seconds)
+                backoff = self.poll_interval
+                if job is None:
+                    self._stop.wait(self.poll_interval)
+                    continue
+                self._run(detector, worker, job)
+            except Exception as e:
+                # e.g. "database is locked" under contention; a lost job's lease expires and it is retried
+                logger.exception("Worker %s hit a queue error; retrying in %.1fs", worker, backoff,
+                                 extra=_event("worker_error", worker=worker, error=str(e), backoff=backoff))
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, MAX_WORKER_BACKOFF)
+
+    def _run(self, detector, worker, job):
+        request = job['request']
+        logger.info("Job %d started (attempt %d/%d, %s)", job['id'], job['attempts'], job['max_attempts'],
+                    job['priority'], extra=_event("job_start", job=job['id'], attempt=job['attempts'],
+                                                  priority=job['priority'], worker=worker))
+
+        # Keep the lease alive while the analysis runs
+        done = threading.Event()
+
+        def heartbeat():
+            while not done.wait(self.lease_seconds / 3):
+                if not self.queue.renew(job['id'], worker, self.lease_seconds):
+                    return
+
+        renewer = threading.Thread(target=heartbeat, daemon=True)
+        renewer.start()
+        try:
+            analysis = detector.analyze(
+                request['context'], request['message'],
+                temperature=request.get('temperature', 0.7),
+                strategy=request.get('strategy', 'prefix'),
+                resolve=request.get('resolve'),
+                stop_after_regions=request.get('stop_after_regions')
+            )
+        except Exception as e:
+            self.queue.fail(job['id'], worker, e)
+            logger.error("Job %d failed: %s", job['id'], e,
+                         extra=_event("job_failed", job=job['id'], attempt=job['attempts'], error=str(e)))
+            return
+        finally:
+            done.set()
+            renewer.join()
+
+        if self.queue.complete(job['id'], worker, analysis.to_dict()):
+            self.processed += 1
+            logger.info("Job %d done (%d tokens, %d low)", job['id'], len(analysis.tokens), analysis.low_prob_count,
+                        extra=_event("job_done", job=job['id'], tokens=len(analysis.tokens),
+                                     calls=analysis.usage.calls, cost=analysis.usage.estimated_cost))
+        else:
+            logger.warning("Job %d lost its lease; result discarded", job['id'],
+                           extra=_event("job_lease_lost", job=job['id'], worker=worker))
+
+
+def _print_job(job):
+    line = (f"#{job['id']:<6} {job['status']:<8} {job['priority']:<12} "
+            f"attempts {job['attempts']}/{job['max_attempts']}  {job['request']['message'][:40]!r}")
+    if job['error']:
+        line += f"  error: {job['error']}"
+    print(line)
+
+
+def main():
+    if sys.platform == 'win32':
+        import codecs
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+    load_environment()
+
+    parser = argparse.ArgumentParser(description="Durable TamperCheck job queue")
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite queue database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="Queue an analysis")
+    submit.add_argument("--prompt", help="User prompt the message was generated for")
+    submit.add_argument("--message", default="", help="Message text to check for edits")
+    submit.add_argument("--file", help="Read the message from a file")
+    submit.add_argument("--strategy", default="prefix", help="Scoring strategy")
+    submit.add_argument("--resolve", choices=["auto", "top_k", "echo"], help="Rescore NOT_FOUND tokens")
+    submit.add_argument("--priority", default="default", choices=list(PRIORITY_CLASSES), help="Priority class")
+    submit.add_argument("--max-attempts", type=int, default=3, help="Attempts before giving up")
+
+    work = commands.add_parser("work", help="Drain the queue with a worker pool")
+    work.add_argument("--workers", type=int, default=4, help="Concurrent analyses")
+    work.add_argument("--lease", type=float, default=60.0, help="Lease length in seconds")
+    work.add_argument("--model", default="gpt-3.5-turbo", help="Model to score with")
+    work.add_argument("--base-url", help="OpenAI-compatible API endpoint")
+    work.add_argument("--rpm", type=int, help="Requests-per-minute rate limit")
+    work.add_argument("--tpm", type=int, help="Tokens-per-minute rate limit")
+    work.add_argument("--context-window", type=int, help="Prefix scoring sends only the last K tokens")
+    work.add_argument("--until-empty", action="store_true", help="Exit once the queue is drained")
+    work.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+
+    status = commands.add_parser("status", help="Show a job")
+    status.add_argument("job", type=int)
+
+    result = commands.add_parser("result", help="Write a finished job's analysis as JSON")
+    result.add_argument("job", type=int)
+    result.add_argument("--output", help="File to write (default: stdout)")
+
+    listing = commands.add_parser("list", help="List recent jobs")
+    listing.add_argument("--status", choices=STATUSES)
+    listing.add_argument("--limit", type=int, default=20)
+
+    args = parser.parse_args()
+    queue = JobQueue(args.db)
+
+    if args.command == "submit":
+        message = args.message
+        if args.file:
+            with open(args.file, 'r', encoding='utf-8') as f:
+                message = f.read()
+        if not message.strip():
+            parser.error("submit needs --message or --file")
+        job_id = queue.submit({
+            'context': [{"role": "user", "content": args.prompt}] if args.prompt else [],
+            'message': message,
+            'strategy': args.strategy,
+            'resolve': args.resolve
+        }, priority=args.priority, max_attempts=args.max_attempts)
+        print(job_id)
+
+    elif args.command == "work":
+        configure_logging(args.log_level)
+        pool = WorkerPool(
+            queue, workers=args.workers, lease_seconds=args.lease,
+            model=args.model, base_url=args.base_url, context_window=args.context_window,
+            requests_per_minute=args.rpm, tokens_per_minute=args.tpm
+        )
+        print(f"Working on {args.db} with {args.workers} workers: {queue.counts()}")
+        try:
+            if args.until_empty:
+                pool.run_until_empty()
+            else:
+                pool.start()
+                while True:
+                    time.sleep(3600)
+        except KeyboardInterrupt:
+            print("Stopping; running jobs finish first (their leases expire if interrupted again)")
+            pool.stop()
+        print(f"Processed {pool.processed} jobs: {queue.counts()}")
+
+    elif args.command == "status":
+        job = queue.get(args.job)
+        if job is None:
+            print(f"No job {args.job}")
+            sys.exit(1)
+        _print_job(job)
+
+    elif args.command == "result":
+        job = queue.get(args.job)
+        if job is None or job['status'] != 'done':
+            print(f"Job {args.job} is {job['status'] if job else 'missing'}")
+            sys.exit(1)
+        data = json.dumps(job['result'], indent=2, ensure_ascii=False)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(data + "\n")
+            print(f"✓ Result saved to: {args.output}")
+        else:
+            print(data)
+
+    elif args.command == "list":
+        print(queue.counts())
+        for job in queue.jobs(args.status, args.limit):
+            _print_job(job)
+
+
+if __name__ == "__main__":
+    main()
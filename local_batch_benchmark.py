@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Local Batch Benchmark
+Documents per second for batched local-model scoring versus one forward
+pass per document, for offline audits of many short replies
+
+Builds --docs short replies of varying length (sentences from the robot
+story fixtures), scores them once with analyze(..., strategy="local") each
+and once with analyze_batch() at every --batch-sizes value, and checks the
+batched probabilities agree with the one-at-a-time ones. Needs torch and
+transformers; nothing is sent over the network.
+
+Usage:
+    python local_batch_benchmark.py --model gpt2
+    python local_batch_benchmark.py --docs 1000 --batch-sizes 8,32,64 --threads 8
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+from colorama import Fore, Style, init as colorama_init
+
+from tampercheck import TamperDetector
+
+colorama_init(autoreset=True)
+
+
+PROMPT = "Write a short story about a robot learning to paint. Keep it to 2-3 sentences."
+
+SENTENCES = [
+    "The robot learned to paint the colors of the world.",
+    "Each day it created a new canvas with its brush.",
+    "It was the first time the robot felt the beauty of art.",
+    "One day the robot painted the world in each color it knew.",
+    "Its creators were amazed by the precision of every stroke.",
+    "Slowly, the machine understood that art was about feeling.",
+]
+
+
+def make_documents(count, seed=0):
+    """count (context, message) pairs of one to four sentences"""
+    rng = random.Random(seed)
+    context = [{"role": "user", "content": PROMPT}]
+    return [(context, " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(1, 4))))
+            for _ in range(count)]
+
+
+def max_difference(reference, candidate):
+    """Largest per-token probability difference (percentage points) between two runs"""
+    worst = 0.0
+    for a, b in zip(reference, candidate):
+        for x, y in zip(a.tokens, b.tokens):
+            worst = max(worst, abs(x.probability_pct - y.probability_pct))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched local-model scoring")
+    parser.add_argument("--model", default="gpt2", help="Local model name/path")
+    parser.add_argument("--docs", type=int, default=200, help="Documents to score")
+    parser.add_argument("--batch-sizes", default="4,16,32", help="Comma-separated batch sizes")
+    parser.add_argument("--threads", type=int, help="torch intra-op threads (default: torch's choice)")
+    parser.add_argument("--output", default="local_batch_results.json", help="Where to save the results")
+    args = parser.parse_args()
+
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+
+    print(f"{Fore.CYAN}{Style.BRIGHT}")
+    print("="*80)
+    print("  LOCAL BATCH BENCHMARK")
+    print("  Batched forward passes vs one pass per document")
+    print("="*80)
+    print(Style.RESET_ALL)
+
+    detector = TamperDetector(local_model=args.model, local_threads=args.threads)
+    documents = make_documents(args.docs)
+    print(f"{Fore.WHITE}{len(documents)} documents, model {args.model}, "
+          f"threads {args.threads or 'default'}")
+
+    # Load the model outside the timings
+    detector.analyze(*documents[0], strategy="local")
+
+    started = time.perf_counter()
+    sequential = [detector.analyze(context, message, strategy="local") for context, message in documents]
+    elapsed = time.perf_counter() - started
+    rows = [{'batch_size': 1, 'mode': 'sequential', 'seconds': elapsed, 'docs_per_second': len(documents) / elapsed}]
+    print(f"\n  one at a time  {elapsed:7.2f}s  {Fore.WHITE}{len(documents) / elapsed:8.1f} docs/s")
+
+    for batch_size in batch_sizes:
+        started = time.perf_counter()
+        batched = detector.analyze_batch(documents, batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+        difference = max_difference(sequential, batched)
+        rows.append({
+            'batch_size': batch_size,
+            'mode': 'batched',
+            'seconds': elapsed,
+            'docs_per_second': len(documents) / elapsed,
+            'speedup': rows[0]['seconds'] / elapsed,
+            'max_probability_difference': difference
+        })
+        color = Fore.GREEN if difference < 0.1 else Fore.YELLOW
+        print(f"  batch {batch_size:<8} {elapsed:7.2f}s  {Fore.WHITE}{len(documents) / elapsed:8.1f} docs/s  "
+              f"{rows[-1]['speedup']:5.1f}x  {color}max diff {difference:.3f} pp")
+
+    best = max(rows, key=lambda r: r['docs_per_second'])
+    print(f"\n{Fore.GREEN}Best: {best['docs_per_second']:.1f} docs/s "
+          f"({best['mode']}, batch size {best['batch_size']})")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'model': args.model, 'docs': len(documents), 'threads': args.threads, 'rows': rows},
+                  f, indent=2, ensure_ascii=False)
+
+    print(f"\n{Fore.GREEN}✓ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Edit Localization for TamperCheck
+Rank the regions of a document most likely to have been edited, from
+stored per-token results and without any API calls
+
+Every token gets a surprise score, its negative log-likelihood (nats). A
+NOT_FOUND token is scored as if its probability were half that of the
+least likely listed alternative. Over windows of several widths, the
+excess surprise is read off one prefix-sum array. It is the window sum
+minus the surprise authentic text would have, scaled by authentic text's
+spread and the square root of the width. That makes the whole scan O(N)
+per window width. Windows at or above the threshold are ranked, and the
+best non-overlapping ones are reported.
+
+The authentic baseline defaults to the bundled fixtures; --calibrate
+re-estimates it from the untouched documents being scanned.
+
+--normalized scores each token against the entropy of its position,
+estimated from the stored top-k alternatives. A rare word where the model
+had many good options then counts for less than one where it was sure.
+
+Unlike TamperDetector._find_suspicious_regions, which needs
+MIN_CLUSTER_SIZE consecutive LOW tokens, this catches:
+- a single swapped word (width 1);
+- LOW tokens interleaved with MEDIUM ones (wider windows).
+
+Usage:
+    python localization.py
+    python localization.py --fixtures full_analysis_results.json --windows 1,3,5,9 --top 5
+    python localization.py --normalized --calibrate
+"""
+
+import sys
+import json
+import math
+import argparse
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Window widths (tokens) scanned by default: single swapped words up to
+# rewritten clauses
+DEFAULT_WINDOWS = (1, 3, 5, 9)
+
+# Excess-surprise score (in standard deviations) a window must reach
+DEFAULT_THRESHOLD = 3.0
+
+# (mean, standard deviation) of per-token surprise in nats for authentic
+# prefix-scored gpt-3.5-turbo output: the untouched documents of
+# original_analysis_results.json and scientific_validation_results.json
+DEFAULT_BASELINE = (1.07, 1.29)
+
+# The same for entropy-normalized surprise (see topk_features)
+NORMALIZED_BASELINE = (0.11, 1.20)
+
+# Probability (%) assumed for a NOT_FOUND token without listed alternatives
+NOT_FOUND_PROBABILITY_PCT = 0.5
+
+# Floor on a baseline's spread, so near-uniform text does not turn small
+# wobbles into huge scores
+MIN_SPREAD = 0.5
+
+
+@dataclass
+class SurpriseRegion:
+    """A ranked window of unexpectedly surprising tokens"""
+    start: int            # Position of the first token
+    end: int              # Position of the last token
+    score: float          # Excess surprise in baseline standard deviations
+    mean_surprise: float  # Mean negative log-likelihood (nats) in the window
+    tokens: int
+    text: str
+    peak: str             # Most surprising token in the window
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _results(source) -> List[Dict[str, Any]]:
+    """Script-format results from a result list or a TamperAnalysis"""
+    if hasattr(source, 'tokens'):
+        source = [token.to_dict() for token in source.tokens]
+    return [r for r in sorted(source, key=lambda r: r['position']) if r.get('status') != 'ERROR']
+
+
+def _probability_pct(result: Dict[str, Any]) -> float:
+    """
+    A script-format token's probability in percent.
+
+    NOT_FOUND tokens only tell us their probability is below every listed
+    alternative, so they are scored at half the smallest one.
+    """
+    if result.get('found', True) and result.get('probability', 0.0) > 0:
+        return result['probability']
+    listed = [alt['probability'] for alt in result.get('top_alternatives') or [] if alt['probability'] > 0]
+    return min(listed) / 2 if listed else NOT_FOUND_PROBABILITY_PCT
+
+
+def topk_features(results: Sequence[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Per-position uncertainty features from the stored top-k alternatives.
+
+    The alternatives are packed into one positions x k matrix and every
+    feature is computed on whole arrays:
+
+    - surprise: the token's negative log-likelihood (nats)
+    - entropy: estimated entropy of the next-token distribution, i.e.
+      the surprise expected at that position. Mass outside the top k is
+      treated as spread over tokens as likely as the last listed one.
+    - excess: surprise - entropy, which is near zero where the model was
+      unsure anyway and large where it was confident and the text departs
+      from it
+    - rank: 1-based rank of the token among the alternatives (k + 1 when
+      NOT_FOUND)
+    - rank_surprise: log(rank) - entropy, the rank relative to the
+      effective number of choices (perplexity)
+
+    Returns:
+        Dict of arrays, one entry per position
+    """
+    n = len(results)
+    k = max((len(r.get('top_alternatives') or []) for r in results), default=0)
+    alternatives = np.zeros((n, max(k, 1)))
+    for i, r in enumerate(results):
+        listed = [alt['probability'] for alt in r.get('top_alternatives') or []]
+        alternatives[i, :len(listed)] = listed
+    alternatives = np.clip(alternatives / 100, 0.0, 1.0)
+
+    probability = np.fromiter((_probability_pct(r) for r in results), dtype=float, count=n) / 100
+    surprise = -np.log(np.clip(probability, 1e-12, 1.0))
+    found = np.fromiter((bool(r.get('found', True)) for r in results), dtype=bool, count=n)
+
+    # Listed mass contributes -p log p; the remainder is spread over tokens
+    # no likelier than the smallest listed one, contributing -rest log p_min
+    listed = alternatives > 0
+    plogp = np.where(listed, alternatives * np.log(np.where(listed, alternatives, 1.0)), 0.0)
+    smallest = np.where(listed, alternatives, np.inf).min(axis=1)
+    smallest = np.where(np.isfinite(smallest), smallest, NOT_FOUND_PROBABILITY_PCT / 100)
+    rest = np.clip(1.0 - alternatives.sum(axis=1), 0.0, 1.0)
+    entropy = -plogp.sum(axis=1) - rest * np.log(smallest)
+
+    rank = np.where(found, (alternatives > probability[:, None] * (1 + 1e-9)).sum(axis=1) + 1, k + 1)
+
+    return {
+        'surprise': surprise,
+        'entropy': entropy,
+        'excess': surprise - entropy,
+        'rank': rank,
+        'rank_surprise': np.log(rank) - entropy
+    }
+
+
+def token_surprise(results: Sequence[Dict[str, Any]], normalized: bool = False) -> np.ndarray:
+    """
+    Negative log-likelihood (nats) of every token in script-format results,
+    or with normalized=True its excess over the position's entropy
+    """
+    if normalized:
+        return topk_features(results)['excess']
+    probabilities = np.fromiter((_probability_pct(r) for r in results), dtype=float, count=len(results))
+    return -np.log(np.clip(probabilities / 100, 1e-12, 1.0))
+
+
+def calibrate_baseline(sources, normalized: bool = False) -> Tuple[float, float]:
+    """
+    (mean, standard deviation) of token surprise over authentic documents.
+
+    Args:
+        sources: Script-format result lists or TamperAnalysis objects of
+                text known to be untouched
+        normalized: Calibrate entropy-normalized surprise instead
+    """
+    surprise = np.concatenate([token_surprise(_results(source), normalized) for source in sources]
+                              or [np.empty(0)])
+    if not len(surprise):
+        return NORMALIZED_BASELINE if normalized else DEFAULT_BASELINE
+    return float(surprise.mean()), max(float(surprise.std()), MIN_SPREAD)
+
+
+def robust_baseline(surprise: np.ndarray) -> Tuple[float, float]:
+    """
+    (typical surprise, spread) of one document on its own.
+
+    The median and scaled median absolute deviation are used so that the
+    edits being looked for barely move the baseline. np.median selects
+    rather than sorts, which keeps this O(N). Only an edited document's
+    outliers stand out this way, not a document that was rewritten
+    throughout.
+    """
+    if not len(surprise):
+        return 0.0, MIN_SPREAD
+    center = float(np.median(surprise))
+    spread = 1.4826 * float(np.median(np.abs(surprise - center)))
+    return center, max(spread, MIN_SPREAD)
+
+
+def window_scores(surprise: np.ndarray, window: int, center: float, spread: float) -> np.ndarray:
+    """
+    Excess-surprise score of every window of `window` tokens, by start index.
+
+    One cumulative sum gives every window sum as a difference of two
+    entries, so the cost is O(N) whatever the width.
+    """
+    if window > len(surprise):
+        return np.empty(0)
+    cumulative = np.concatenate(([0.0], np.cumsum(surprise - center)))
+    return (cumulative[window:] - cumulative[:-window]) / (spread * math.sqrt(window))
+
+
+def find_surprise_regions(
+    source,
+    windows: Sequence[int] = DEFAULT_WINDOWS,
+    threshold: float = DEFAULT_THRESHOLD,
+    max_regions: Optional[int] = None,
+    baseline: Any = None,
+    normalized: bool = False
+) -> List[SurpriseRegion]:
+    """
+    Rank the windows of a document whose surprise stands out.
+
+    Args:
+        source: Script-format per-token results (stored JSON) or a TamperAnalysis
+        windows: Window widths to scan
+        threshold: Minimum excess-surprise score to report
+        max_regions: Keep only the best this many regions
+        baseline: (mean, spread) of authentic surprise (see
+                calibrate_baseline), or "document" to use the document's
+                own robust estimate; defaults to the bundled calibration
+        normalized: Score entropy-normalized surprise (topk_features
+                'excess'), so positions where the model was unsure anyway
+                count for less
+
+    Returns:
+        Non-overlapping SurpriseRegions, highest score first
+    """
+    results = _results(source)
+    surprise = token_surprise(results, normalized)
+    if baseline is None:
+        baseline = NORMALIZED_BASELINE if normalized else DEFAULT_BASELINE
+    center, spread = robust_baseline(surprise) if baseline == "document" else baseline
+
+    # Every window at or above the threshold, as (score, start, width)
+    candidates = []
+    for window in sorted(set(windows)):
+        scores = window_scores(surprise, window, center, spread)
+        starts = np.flatnonzero(scores >= threshold)
+        candidates.extend(zip(scores[starts].tolist(), starts.tolist(), [window] * len(starts)))
+    candidates.sort(key=lambda c: (-c[0], c[2]))
+
+    # Best-first, skipping windows that overlap a region already taken
+    covered = np.zeros(len(results), dtype=bool)
+    regions = []
+    for score, start, window in candidates:
+        if max_regions is not None and len(regions) >= max_regions:
+            break
+        end = start + window
+        if covered[start:end].any():
+            continue
+        covered[start:end] = True
+        window_results = results[start:end]
+        regions.append(SurpriseRegion(
+            start=window_results[0]['position'],
+            end=window_results[-1]['position'],
+            score=score,
+            mean_surprise=float(surprise[start:end].mean()),
+            tokens=window,
+            text=" ".join(r['token'].strip() for r in window_results),
+            peak=window_results[int(np.argmax(surprise[start:end]))]['token'].strip()
+        ))
+    return regions
+
+
+@dataclass
+class ChangePointEvent:
+    """A region boundary found while tokens stream in"""
+    kind: str              # "start" once a region is confirmed, "end" once it is over
+    position: int          # Position of the token that triggered the event
+    start: int             # Position where the region began
+    end: Optional[int]     # Position of its last surprising token ("end" events only)
+    score: float           # CUSUM statistic when the event fired
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class ChangePointDetector:
+    """
+    Online CUSUM over per-token surprise, for the streaming analysis path.
+
+    Each token adds its standardized excess surprise, less a drift
+    allowance, to a running sum that never goes below zero. Authentic text
+    keeps the sum near zero. A run of surprising tokens pushes it over the
+    threshold, which confirms a region starting where the sum last left
+    zero. The region ends when the sum falls back to zero, at the token
+    where it peaked. Each update is O(1) and keeps no token history.
+
+    Usage:
+        detector = ChangePointDetector()
+        for token in stream:
+            for event in detector.update(token):
+                ...
+        events = detector.finish()
+    """
+
+    def __init__(self, baseline: Optional[Tuple[float, float]] = None,
+                 drift: float = 0.5, threshold: float = 4.0, normalized: bool = False):
+        """
+        Args:
+            baseline: (mean, spread) of authentic surprise, as in find_surprise_regions
+            drift: Excess (in spreads) a token must exceed to push the sum up;
+                    larger values ignore mild surprise
+            threshold: Sum (in spreads) that confirms a region; larger values
+                    need longer or stronger runs
+            normalized: Track entropy-normalized surprise, as in find_surprise_regions
+        """
+        self.center, self.spread = baseline or (NORMALIZED_BASELINE if normalized else DEFAULT_BASELINE)
+        self.normalized = normalized
+        self.drift = drift
+        self.threshold = threshold
+        self.events = []      # Every event emitted so far
+        self.confirmed = 0    # Regions confirmed so far
+        self._sum = 0.0
+        self._start = None    # Position where the current run left zero
+        self._peak = 0.0
+        self._peak_position = None
+        self._open = False    # Current run has been confirmed as a region
+        self._last = None     # Last position seen
+
+    def update(self, token) -> List[ChangePointEvent]:
+        """
+        Add one scored token (TokenAnalysis or script-format dict).
+
+        Returns:
+            Events this token triggered (usually none)
+        """
+        result = token.to_dict() if hasattr(token, 'to_dict') else token
+        if result.get('status') == 'ERROR':
+            return []
+        position = result['position']
+        if self.normalized:
+            surprise = float(topk_features([result])['excess'][0])
+        else:
+            surprise = -math.log(min(max(_probability_pct(result) / 100, 1e-12), 1.0))
+        self._last = position
+
+        events = []
+        self._sum = max(0.0, self._sum + (surprise - self.center) / self.spread - self.drift)
+        if self._sum == 0.0:
+            if self._open:
+                events.append(self._close(position))
+            self._start = None
+            self._peak = 0.0
+            return self._emit(events)
+
+        if self._start is None:
+            self._start = position
+        if self._sum >= self._peak:
+            self._peak, self._peak_position = self._sum, position
+        if not self._open and self._sum >= self.threshold:
+            self._open = True
+            self.confirmed += 1
+            events.append(ChangePointEvent("start", position, self._start, None, self._sum))
+        return self._emit(events)
+
+    def finish(self) -> List[ChangePointEvent]:
+        """Close a region still open at the end of the stream"""
+        if not self._open:
+            return []
+        return self._emit([self._close(self._last)])
+
+    @property
+    def in_region(self) -> bool:
+        return self._open
+
+    def _close(self, position: int) -> ChangePointEvent:
+        self._open = False
+        return ChangePointEvent("end", position, self._start, self._peak_position, self._peak)
+
+    def _emit(self, events: List[ChangePointEvent]) -> List[ChangePointEvent]:
+        self.events.extend(events)
+        return events
+
+
+def main():
+    from colorama import Fore, Style, init as colorama_init
+    from window_benchmark import DEFAULT_FIXTURES, load_fixtures
+
+    if sys.platform == 'win32':
+        import codecs
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+    colorama_init(autoreset=True)
+
+    parser = argparse.ArgumentParser(description="Rank likely edited regions in stored per-token results")
+    parser.add_argument("--fixtures", nargs="+", default=DEFAULT_FIXTURES, help="Stored result files")
+    parser.add_argument("--windows", default=",".join(map(str, DEFAULT_WINDOWS)), help="Comma-separated window widths")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Minimum excess-surprise score")
+    parser.add_argument("--top", type=int, default=5, help="Regions to show per document")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="Estimate the authentic baseline from the untouched documents in the fixtures")
+    parser.add_argument("--per-document", action="store_true",
+                        help="Compare each document against its own robust baseline instead")
+    parser.add_argument("--normalized", action="store_true",
+                        help="Score surprise relative to each position's entropy (from the top-k alternatives)")
+    parser.add_argument("--output", default="localization_results.json", help="Where to save the results")
+    args = parser.parse_args()
+
+    windows = [int(w) for w in args.windows.split(",")]
+
+    print(f"{Fore.CYAN}{Style.BRIGHT}")
+    print("="*80)
+    print("  EDIT LOCALIZATION")
+    print("  Rolling-window surprise over stored per-token results")
+    print("="*80)
+    print(Style.RESET_ALL)
+
+    documents = load_fixtures(args.fixtures)
+    baseline = NORMALIZED_BASELINE if args.normalized else DEFAULT_BASELINE
+    if args.per_document:
+        baseline = "document"
+    elif args.calibrate:
+        baseline = calibrate_baseline([d['results'] for d in documents if d['type'] == 'original'], args.normalized)
+    if baseline != "document":
+        print(f"{Fore.WHITE}Authentic baseline: {baseline[0]:.2f} ± {baseline[1]:.2f} nats per token\n")
+
+    output = []
+    for document in documents:
+        regions = find_surprise_regions(document['results'], windows, args.threshold, args.top, baseline,
+                                        args.normalized)
+        output.append({'document': document['name'], 'type': document['type'],
+                       'tokens': len(document['results']), 'regions': [r.to_dict() for r in regions]})
+
+        color = Fore.WHITE if document['type'] == 'original' else Fore.YELLOW
+        print(f"{color}{Style.BRIGHT}{document['name']}{Style.RESET_ALL} "
+              f"({document['type']}, {len(document['results'])} tokens): {len(regions)} regions")
+        for rank, region in enumerate(regions, 1):
+            print(f"  {rank}. score {region.score:5.1f}  positions {region.start}-{region.end}  "
+                  f"peak '{region.peak}'  {Fore.RED}{region.text[:60]}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'windows': windows, 'threshold': args.threshold, 'baseline': baseline,
+                   'normalized': args.normalized, 'documents': output},
+                  f, indent=2, ensure_ascii=False)
+
+    print(f"\n{Fore.GREEN}✓ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
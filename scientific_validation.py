@@ -2,14 +2,24 @@
 """
 Scientific Validation Suite for TamperCheck
 Run 5-10 tests on different text types to establish statistical validity
+
+The suite is driven by a declarative matrix (validation_matrix.json):
+models x temperatures x categories x edit types. Cases run concurrently
+under one shared rate budget, and generated originals and finished cases
+are cached on disk so an interrupted run resumes where it stopped.
 """
 
 import os
+import re
 import sys
 import json
-import math
 import time
+import random
+import hashlib
+import argparse
+import threading
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 if sys.platform == 'win32':
     import codecs
@@ -19,118 +29,281 @@ if sys.platform == 'win32':
 from openai import OpenAI
 from colorama import Fore, Style, init as colorama_init
 
+from tampercheck import TamperDetector, UsageStats, RateLimiter
+from streaming_stats import ValidationAggregator, count_statuses
+from edit_generator import OPERATIONS as EDIT_OPERATIONS, apply_edits
+
 colorama_init(autoreset=True)
 
 
-def analyze_text(client, context_prompt, text_to_analyze, test_id):
+# A case whose scoring fails is retried this many times, backing off
+# RETRY_BACKOFF * 2**attempt seconds, before it is reported as failed
+CASE_ATTEMPTS = 3
+RETRY_BACKOFF = 2.0
+
+
+def analyze_text(detector, context_prompt, text_to_analyze, usage=None, temperature=0.7):
+    """
+    Analyze a single text sample with prefix scoring
+    
+    If a UsageStats is passed, the analysis's requests are recorded into it.
+    Returns per-token results in the format the analysis scripts store.
     """
-    Analyze a single text sample
+    analysis = detector.analyze([{"role": "user", "content": context_prompt}], text_to_analyze,
+                                temperature=temperature, strategy="prefix")
+    if usage is not None:
+        usage.merge(analysis.usage)
+    return [token.to_dict() for token in analysis.tokens]
+
+
+def calculate_statistics(results):
+    """Calculate statistics from results (single pass)"""
+    return count_statuses(results)
+
+
+def apply_edit(text, edit_type, seed):
     """
-    import re
-    tokens = re.findall(r'\w+|[^\w\s]|\s+', text_to_analyze)
+    Produce the text to analyze for an edit type
+    
+    'original' analyzes the generation as-is (false positive baseline);
+    'word_swap' swaps two adjacent words at a seeded position; the
+    edit_generator operations (synonym, typo, ...) apply one such edit.
+    """
+    if edit_type == 'original':
+        return text
+    
+    if edit_type in EDIT_OPERATIONS:
+        edited, _ = apply_edits(text, 1, (edit_type,), seed=seed)
+        return edited
+    
+    if edit_type == 'word_swap':
+        words = list(re.finditer(r'\w+', text))
+        if len(words) < 3:
+            return text
+        i = random.Random(seed).randrange(1, len(words) - 1)
+        first, second = words[i], words[i + 1]
+        return (text[:first.start()] + second.group() + text[first.end():second.start()]
+                + first.group() + text[second.end():])
+    
+    raise ValueError(f"Unknown edit type: {edit_type}")
+
+
+EDIT_TYPES = ('original', 'word_swap') + EDIT_OPERATIONS
+
+
+def load_matrix(path):
+    """Load the validation matrix and expand it into a list of cases"""
+    with open(path, 'r', encoding='utf-8') as f:
+        matrix = json.load(f)
+    
+    for edit_type in matrix['edit_types']:
+        if edit_type not in EDIT_TYPES:
+            raise ValueError(f"Unknown edit type in {path}: {edit_type}")
     
-    results = []
-    current_text = ""
+    cases = []
+    for model in matrix['models']:
+        for temperature in matrix['temperatures']:
+            for category in matrix['categories']:
+                for edit_type in matrix['edit_types']:
+                    cases.append({
+                        'test_id': f"{category['id']}__{model}__t{temperature}__{edit_type}",
+                        'original_key': f"{category['id']}__{model}__t{temperature}",
+                        'category': category['category'],
+                        'prompt': category['prompt'],
+                        'model': model,
+                        'temperature': temperature,
+                        'type': edit_type,
+                        'max_tokens': matrix.get('max_tokens', 150)
+                    })
     
-    for i, token in enumerate(tokens):
-        if token.strip() == "":
-            current_text += token
-            continue
+    return matrix, cases
+
+
+def _cache_path(cache_dir, kind, key):
+    safe = re.sub(r'[^\w.-]', '_', key)
+    return os.path.join(cache_dir, kind, f"{safe}.json")
+
+
+def _read_cache(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_cache(path, data):
+    """Write atomically so an interrupted run never leaves a half-written file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class ValidationRunner:
+    """Runs matrix cases concurrently with shared rate budget and disk cache"""
+    
+    def __init__(self, client, cache_dir, rate_limiter, fresh=False):
+        self.client = client
+        self.cache_dir = cache_dir
+        self.rate_limiter = rate_limiter
+        self.fresh = fresh
+        self.usage = UsageStats()
+        self._usage_lock = threading.Lock()
+        self._original_locks = {}
+        self._locks_lock = threading.Lock()
+        self._generated = set()  # Originals generated in this run; --fresh skips the cache only before that
+    
+    def _original_lock(self, key):
+        with self._locks_lock:
+            return self._original_locks.setdefault(key, threading.Lock())
+    
+    def get_original(self, case):
+        """Generate (or load the cached) original text shared by a case's edit types"""
+        path = _cache_path(self.cache_dir, 'originals', case['original_key'])
         
-        try:
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "user", "content": context_prompt},
-                    {"role": "assistant", "content": current_text}
-                ],
-                max_tokens=1,
-                temperature=0.7,
-                logprobs=True,
-                top_logprobs=5
-            )
-            
-            if response.choices[0].logprobs and response.choices[0].logprobs.content:
-                top_tokens_data = response.choices[0].logprobs.content[0]
-                
-                top_alternatives = []
-                if top_tokens_data.top_logprobs:
-                    for alt in top_tokens_data.top_logprobs:
-                        alt_token = alt.token.strip()
-                        alt_prob = math.exp(alt.logprob) * 100
-                        top_alternatives.append({
-                            'token': alt_token,
-                            'probability': alt_prob
-                        })
-                
-                our_token_clean = token.strip().lower()
-                our_token_found = False
-                our_token_prob = 0
-                
-                for alt in top_alternatives:
-                    alt_clean = alt['token'].strip().lower()
-                    if our_token_clean == alt_clean or our_token_clean in alt_clean or alt_clean in our_token_clean:
-                        our_token_found = True
-                        our_token_prob = alt['probability']
-                        break
-                
-                if our_token_found and our_token_prob > 20:
-                    status = "HIGH"
-                elif our_token_found and our_token_prob > 5:
-                    status = "MEDIUM"
-                elif our_token_found:
-                    status = "LOW"
-                else:
-                    status = "NOT_FOUND"
-                
-                results.append({
-                    'position': i,
-                    'token': token,
-                    'found': our_token_found,
-                    'probability': our_token_prob,
-                    'status': status,
-                    'top_alternatives': top_alternatives
-                })
+        # One generation per original, even when several edit types want it at once
+        with self._original_lock(case['original_key']):
+            fresh = self.fresh and case['original_key'] not in self._generated
+            cached = None if fresh else _read_cache(path)
+            if cached is not None:
+                return cached['text'], UsageStats()
             
-            current_text += token
-            time.sleep(0.05)  # Reduced delay for faster testing
+            usage = UsageStats()
+            started = time.perf_counter()
+            self.rate_limiter.acquire(len(case['prompt']) // 4)
+            response = self.client.chat.completions.create(
+                model=case['model'],
+                messages=[{"role": "user", "content": case['prompt']}],
+                temperature=case['temperature'],
+                max_tokens=case['max_tokens']
+            )
+            usage.record(response, case['model'], time.perf_counter() - started)
+            usage.wall_time = time.perf_counter() - started
             
-        except Exception as e:
-            print(f"{Fore.RED}Error at token {i}: {e}")
-            results.append({
-                'position': i,
-                'token': token,
-                'found': False,
-                'probability': 0,
-                'status': 'ERROR',
-                'top_alternatives': []
+            text = response.choices[0].message.content
+            _write_cache(path, {
+                'key': case['original_key'],
+                'prompt': case['prompt'],
+                'model': case['model'],
+                'temperature': case['temperature'],
+                'text': text,
+                'usage': usage.to_dict(),
+                'timestamp': datetime.now().isoformat()
             })
+            self._generated.add(case['original_key'])
+            return text, usage
+    
+    def _detector(self, model):
+        """A detector for one case, sharing the client and the rate budget"""
+        detector = TamperDetector(model=model, rate_limiter=self.rate_limiter)
+        detector.client = self.client
+        return detector
     
-    return results
+    def run_case(self, case):
+        """Run one case, or return its cached result"""
+        path = _cache_path(self.cache_dir, 'cases', case['test_id'])
+        cached = None if self.fresh else _read_cache(path)
+        # Cases written with failed tokens (older runs) are run again
+        if cached is not None and not any(r.get('status') == 'ERROR' for r in cached['results']):
+            cached['cached'] = True
+            return cached
+        
+        original_text, generation_usage = self.get_original(case)
+        seed = int(hashlib.sha1(case['test_id'].encode('utf-8')).hexdigest()[:8], 16)
+        text = apply_edit(original_text, case['type'], seed)
+        
+        analysis_started = time.perf_counter()
+        analysis_usage = UsageStats()
+        detector = self._detector(case['model'])
+        for attempt in range(CASE_ATTEMPTS):
+            try:
+                results = analyze_text(detector, case['prompt'], text, usage=analysis_usage,
+                                       temperature=case['temperature'])
+                break
+            except Exception as e:
+                # Never cache a partial case; retry it, or let it fail uncached
+                if attempt == CASE_ATTEMPTS - 1:
+                    raise
+                delay = RETRY_BACKOFF * 2 ** attempt
+                print(f"{Fore.YELLOW}{case['test_id']}: {e} - retrying in {delay:.0f}s")
+                time.sleep(delay)
+        analysis_usage.wall_time = time.perf_counter() - analysis_started
+        
+        with self._usage_lock:
+            self.usage.merge(generation_usage).merge(analysis_usage)
+        
+        result = {
+            'test_id': case['test_id'],
+            'category': case['category'],
+            'prompt': case['prompt'],
+            'model': case['model'],
+            'temperature': case['temperature'],
+            'text': text,
+            'original_text': original_text,
+            'type': case['type'],
+            'results': results,
+            'statistics': calculate_statistics(results),
+            'usage': {
+                'generation': generation_usage.to_dict(),
+                'analysis': analysis_usage.to_dict()
+            },
+            'timestamp': datetime.now().isoformat()
+        }
+        if not any(r.get('status') == 'ERROR' for r in results):
+            _write_cache(path, result)
+        result['cached'] = False
+        return result
 
 
-def calculate_statistics(results):
-    """Calculate statistics from results"""
-    total = len([r for r in results if r['status'] != 'ERROR'])
-    high = len([r for r in results if r['status'] == 'HIGH'])
-    medium = len([r for r in results if r['status'] == 'MEDIUM'])
-    low = len([r for r in results if r['status'] == 'LOW'])
-    not_found = len([r for r in results if r['status'] == 'NOT_FOUND'])
-    
-    return {
-        'total': total,
-        'high': high,
-        'medium': medium,
-        'low': low,
-        'not_found': not_found,
-        'high_pct': (high / total * 100) if total > 0 else 0,
-        'medium_pct': (medium / total * 100) if total > 0 else 0,
-        'low_pct': (low / total * 100) if total > 0 else 0,
-        'not_found_pct': (not_found / total * 100) if total > 0 else 0
-    }
+def write_results(path, header, case_paths):
+    """
+    Write the results file, streaming each test in from its cache file so
+    per-token results for the whole run are never held in memory at once
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{\n')
+        for key, value in header.items():
+            body = json.dumps(value, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+            f.write(f'  {json.dumps(key)}: {body},\n')
+        f.write('  "individual_tests": [')
+        for i, case_path in enumerate(case_paths):
+            test = _read_cache(case_path)
+            body = json.dumps(test, indent=2, ensure_ascii=False).replace('\n', '\n    ')
+            f.write((',' if i else '') + f'\n    {body}')
+        f.write('\n  ]\n}\n')
+
+
+def print_case(idx, total, result):
+    """Print one finished case as a single block"""
+    stats = result['statistics']
+    analysis_usage = result['usage']['analysis']
+    source = " (cached)" if result.get('cached') else ""
+    print(
+        f"\n{Fore.CYAN}{Style.BRIGHT}[Test {idx}/{total}] {result['category']} - "
+        f"{result['model']} t={result['temperature']} {result['type']}{source}{Style.RESET_ALL}\n"
+        f"{Fore.WHITE}  Prompt: {result['prompt']}\n"
+        f"  Total tokens: {stats['total']}\n"
+        f"  {Fore.GREEN}HIGH: {stats['high']} ({stats['high_pct']:.1f}%)\n"
+        f"  {Fore.YELLOW}MEDIUM: {stats['medium']} ({stats['medium_pct']:.1f}%)\n"
+        f"  {Fore.RED}LOW: {stats['low']} ({stats['low_pct']:.1f}%)\n"
+        f"  {Fore.RED}NOT IN TOP 5: {stats['not_found']} ({stats['not_found_pct']:.1f}%)\n"
+        f"  {Fore.WHITE}API calls: {analysis_usage['calls']}, prompt tokens: {analysis_usage['prompt_tokens']}, "
+        f"cost: ${analysis_usage['estimated_cost']:.4f}, time: {analysis_usage['wall_time']:.1f}s"
+    )
 
 
 def main():
+    parser = argparse.ArgumentParser(description="TamperCheck scientific validation suite")
+    parser.add_argument("--matrix", default="validation_matrix.json", help="Declarative test matrix")
+    parser.add_argument("--workers", type=int, default=4, help="Cases run concurrently")
+    parser.add_argument("--rpm", type=int, default=500, help="Shared requests-per-minute budget")
+    parser.add_argument("--tpm", type=int, help="Shared tokens-per-minute budget")
+    parser.add_argument("--cache-dir", default="validation_cache", help="Cache for originals and finished cases")
+    parser.add_argument("--fresh", action="store_true", help="Ignore cached originals/cases and regenerate")
+    parser.add_argument("--output", default="scientific_validation_results.json", help="Where to save the results")
+    args = parser.parse_args()
+    
     print(f"{Fore.CYAN}{Style.BRIGHT}")
     print("="*80)
     print("  SCIENTIFIC VALIDATION SUITE")
@@ -139,111 +312,120 @@ def main():
     print(Style.RESET_ALL)
     
     client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    matrix, test_cases = load_matrix(args.matrix)
+    runner = ValidationRunner(client, args.cache_dir, RateLimiter(args.rpm, args.tpm), fresh=args.fresh)
     
-    # Define test cases - diverse, innocuous texts
-    test_cases = [
-        {
-            'id': 'test_1_technical',
-            'prompt': 'Explain how photosynthesis works in 2-3 sentences.',
-            'type': 'original',
-            'category': 'Scientific/Technical'
-        },
-        {
-            'id': 'test_2_narrative',
-            'prompt': 'Write a short story about a child learning to ride a bicycle.',
-            'type': 'original',
-            'category': 'Narrative'
-        },
-        {
-            'id': 'test_3_expository',
-            'prompt': 'Describe the benefits of regular exercise in 2-3 sentences.',
-            'type': 'original',
-            'category': 'Expository'
-        },
-        {
-            'id': 'test_4_descriptive',
-            'prompt': 'Describe a sunset over the ocean in vivid detail.',
-            'type': 'original',
-            'category': 'Descriptive'
-        },
-        {
-            'id': 'test_5_instructional',
-            'prompt': 'Explain how to make a paper airplane in simple steps.',
-            'type': 'original',
-            'category': 'Instructional'
-        }
-    ]
+    # Only slim per-case rows stay in memory; aggregates stream into the
+    # aggregator and full per-token results stay in the cache files
+    completed = []
+    aggregator = ValidationAggregator()
+    run_started = time.perf_counter()
     
-    all_results = []
+    print(f"\n{Fore.YELLOW}Running {len(test_cases)} tests with {args.workers} workers "
+          f"({len(matrix['models'])} models x {len(matrix['temperatures'])} temperatures x "
+          f"{len(matrix['categories'])} categories x {len(matrix['edit_types'])} edit types)...")
+    print(f"{Fore.YELLOW}Finished cases are cached in {args.cache_dir}/ - rerun to resume.\n")
     
-    print(f"\n{Fore.YELLOW}Running {len(test_cases)} tests...")
-    print(f"{Fore.YELLOW}This will take approximately 5-10 minutes...\n")
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {pool.submit(runner.run_case, case): case for case in test_cases}
+        for idx, future in enumerate(as_completed(futures), 1):
+            case = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"{Fore.RED}[Test {idx}/{len(test_cases)}] {case['test_id']} failed: {e}")
+                continue
+            print_case(idx, len(test_cases), result)
+            aggregator.add(result['statistics'], category=result['category'], edit_type=result['type'])
+            completed.append({
+                'test_id': result['test_id'],
+                'cached': result.get('cached', False),
+                'analyzed_tokens': result['statistics']['total'],
+                'analysis_usage': result['usage']['analysis']
+            })
     
-    for idx, test_case in enumerate(test_cases, 1):
-        print(f"\n{Fore.CYAN}{Style.BRIGHT}[Test {idx}/{len(test_cases)}] {test_case['category']}")
-        print(f"{'='*80}{Style.RESET_ALL}")
-        print(f"{Fore.WHITE}Prompt: {test_case['prompt']}")
-        
-        # Generate original text
-        print(f"{Fore.CYAN}Generating original text...")
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": test_case['prompt']}],
-            temperature=0.7,
-            max_tokens=150
-        )
-        
-        original_text = response.choices[0].message.content
-        print(f"{Fore.GREEN}Generated: {original_text[:100]}...")
-        
-        # Analyze original
-        print(f"{Fore.CYAN}Analyzing original text...")
-        results = analyze_text(client, test_case['prompt'], original_text, test_case['id'])
-        stats = calculate_statistics(results)
-        
-        print(f"\n{Fore.WHITE}Results:")
-        print(f"  Total tokens: {stats['total']}")
-        print(f"  {Fore.GREEN}HIGH: {stats['high']} ({stats['high_pct']:.1f}%)")
-        print(f"  {Fore.YELLOW}MEDIUM: {stats['medium']} ({stats['medium_pct']:.1f}%)")
-        print(f"  {Fore.RED}LOW: {stats['low']} ({stats['low_pct']:.1f}%)")
-        print(f"  {Fore.RED}NOT IN TOP 5: {stats['not_found']} ({stats['not_found_pct']:.1f}%)")
-        
-        # Store results
-        all_results.append({
-            'test_id': test_case['id'],
-            'category': test_case['category'],
-            'prompt': test_case['prompt'],
-            'text': original_text,
-            'type': test_case['type'],
-            'results': results,
-            'statistics': stats,
-            'timestamp': datetime.now().isoformat()
-        })
+    if not completed:
+        print(f"{Fore.RED}No tests completed.")
+        return
+    
+    # Keep matrix order in the output regardless of completion order
+    order = {case['test_id']: i for i, case in enumerate(test_cases)}
+    completed.sort(key=lambda r: order[r['test_id']])
+    cached_count = sum(1 for r in completed if r['cached'])
     
     # Calculate aggregate statistics
     print(f"\n{Fore.CYAN}{Style.BRIGHT}{'='*80}")
     print("AGGREGATE RESULTS")
     print(f"{'='*80}{Style.RESET_ALL}")
     
-    avg_high = sum(r['statistics']['high_pct'] for r in all_results) / len(all_results)
-    avg_not_found = sum(r['statistics']['not_found_pct'] for r in all_results) / len(all_results)
+    # The false positive baseline only makes sense on unedited text
+    baseline = aggregator.summary('edit_type:original') or aggregator.summary('all')
+    
+    avg_high = baseline['high_pct']['mean']
+    avg_not_found = baseline['not_found_pct']['mean']
     
     print(f"\n{Fore.WHITE}Average across all tests:")
     print(f"  {Fore.GREEN}HIGH probability: {avg_high:.1f}%")
     print(f"  {Fore.RED}NOT in top 5: {avg_not_found:.1f}%")
     
     # Determine if results are consistent
-    import statistics
-    high_pcts = [r['statistics']['high_pct'] for r in all_results]
-    not_found_pcts = [r['statistics']['not_found_pct'] for r in all_results]
-    
-    high_std = statistics.stdev(high_pcts) if len(high_pcts) > 1 else 0
-    not_found_std = statistics.stdev(not_found_pcts) if len(not_found_pcts) > 1 else 0
+    high_std = baseline['high_pct']['stdev']
+    not_found_std = baseline['not_found_pct']['stdev']
     
     print(f"\n{Fore.WHITE}Standard deviation:")
     print(f"  HIGH probability: ±{high_std:.1f}%")
     print(f"  NOT in top 5: ±{not_found_std:.1f}%")
     
+    if baseline['not_found_pct']['ci95']:
+        lo, hi = baseline['not_found_pct']['ci95']
+        print(f"\n{Fore.WHITE}95% bootstrap CI, NOT in top 5: [{lo:.1f}%, {hi:.1f}%]")
+    
+    by_category = {}
+    for category in dict.fromkeys(c['category'] for c in matrix['categories']):
+        summary = aggregator.summary(f"category:{category}")
+        if summary:
+            by_category[category] = {metric: summary[metric]['mean'] for metric in summary}
+    
+    by_edit_type = {}
+    for edit_type in matrix['edit_types']:
+        summary = aggregator.summary(f"edit_type:{edit_type}")
+        if summary:
+            by_edit_type[edit_type] = summary['not_found_pct']['mean']
+    if len(by_edit_type) > 1:
+        print(f"\n{Fore.WHITE}NOT in top 5 by edit type:")
+        for edit_type, pct in by_edit_type.items():
+            print(f"  {edit_type}: {pct:.1f}%")
+    
+    # Usage rollup - prefix scoring resends the whole prefix, so prompt
+    # tokens grow quadratically with the number of analyzed tokens.
+    # Only requests made by this run count; cached cases cost nothing.
+    run_usage = runner.usage
+    run_usage.wall_time = time.perf_counter() - run_started
+    cost_scaling = [
+        {
+            'test_id': r['test_id'],
+            'analyzed_tokens': r['analyzed_tokens'],
+            'calls': r['analysis_usage']['calls'],
+            'prompt_tokens': r['analysis_usage']['prompt_tokens'],
+            'prompt_tokens_per_token': (
+                r['analysis_usage']['prompt_tokens'] / r['analyzed_tokens']
+                if r['analyzed_tokens'] > 0 else 0
+            ),
+            'estimated_cost': r['analysis_usage']['estimated_cost']
+        }
+        for r in completed
+    ]
+    
+    print(f"\n{Fore.WHITE}Usage (this run, {cached_count} cases from cache):")
+    print(f"  API calls: {run_usage.calls}")
+    print(f"  Prompt tokens: {run_usage.prompt_tokens} ({run_usage.cached_tokens} cached)")
+    print(f"  Completion tokens: {run_usage.completion_tokens}")
+    print(f"  Estimated cost: ${run_usage.estimated_cost:.4f}")
+    print(f"  Wall time: {run_usage.wall_time:.1f}s (network: {run_usage.network_time:.1f}s)")
+    for row in cost_scaling:
+        print(f"  {row['test_id']}: {row['analyzed_tokens']} tokens -> "
+              f"{row['prompt_tokens']} prompt tokens ({row['prompt_tokens_per_token']:.1f}/token)")
+    
     # Interpretation
     print(f"\n{Fore.CYAN}{Style.BRIGHT}INTERPRETATION:")
     if avg_high >= 75 and avg_not_found <= 15:
@@ -256,30 +438,42 @@ def main():
         print(f"{Fore.RED}⚠ NEEDS REVIEW: Lower than expected performance")
     
     # Save all results
-    output = {
+    header = {
         'metadata': {
             'test_date': datetime.now().isoformat(),
-            'model': 'gpt-3.5-turbo',
-            'temperature': 0.7,
-            'num_tests': len(test_cases)
+            'models': matrix['models'],
+            'temperatures': matrix['temperatures'],
+            'edit_types': matrix['edit_types'],
+            'num_tests': len(completed),
+            'num_cached': cached_count
         },
         'aggregate_statistics': {
             'avg_high_pct': avg_high,
             'avg_not_found_pct': avg_not_found,
             'std_high_pct': high_std,
-            'std_not_found_pct': not_found_std
+            'std_not_found_pct': not_found_std,
+            'ci95_high_pct': baseline['high_pct']['ci95'],
+            'ci95_not_found_pct': baseline['not_found_pct']['ci95'],
+            'avg_by_category': by_category,
+            'avg_not_found_pct_by_edit_type': by_edit_type
         },
-        'individual_tests': all_results
+        'usage': {
+            'total': run_usage.to_dict(),
+            'cost_scaling': cost_scaling
+        },
+        'aggregator_state': aggregator.to_dict()
     }
     
-    with open('scientific_validation_results.json', 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    write_results(
+        args.output,
+        header,
+        [_cache_path(args.cache_dir, 'cases', r['test_id']) for r in completed]
+    )
     
-    print(f"\n{Fore.GREEN}✓ Results saved to: scientific_validation_results.json")
+    print(f"\n{Fore.GREEN}✓ Results saved to: {args.output}")
     print(f"\n{Fore.GREEN}{Style.BRIGHT}✓ VALIDATION COMPLETE!")
     print(f"{Fore.CYAN}Ready to generate research paper...")
 
 
 if __name__ == "__main__":
     main()
-
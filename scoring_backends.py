@@ -0,0 +1,613 @@
+#!/usr/bin/env python3
+"""
+Scoring backends for TamperCheck
+
+A backend is whatever turns text into token probabilities: the OpenAI API,
+an OpenAI-compatible server (vLLM, llama.cpp, fake_model_server.py, ...) or
+a local Hugging Face model. TamperDetector talks to one through the
+ScoringBackend interface and uses its BackendCapabilities to decide which
+scoring strategies it can offer, so a backend that scores a whole sequence
+in one pass is never driven one prefix at a time.
+
+Third-party backends register under the "tampercheck.backends" entry point
+group and are then available by name:
+
+    # setup.py of another package
+    entry_points={"tampercheck.backends": ["mybackend = mypackage:MyBackend"]}
+
+    TamperDetector(backend="mybackend", model="...")
+"""
+
+import os
+import math
+import time
+import inspect
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+from tampercheck import UsageStats, model_capabilities, _event
+
+logger = logging.getLogger("tampercheck.backends")
+
+
+ENTRY_POINT_GROUP = "tampercheck.backends"
+
+
+@dataclass
+class BackendCapabilities:
+    """What a backend can do; the planner only offers strategies it allows"""
+    prefix: bool = False     # Top-k next-token logprobs after a given prefix
+    sequence: bool = False   # Logprob of every token of a given text in one call
+    generate: bool = False   # Generate a response with per-token logprobs
+    echo: bool = False       # Sequence scoring is an API request with echo=True
+    seed: bool = False       # Reproducible generation from a seed
+    local: bool = False      # Runs in-process: no API cost or rate limits
+    max_top_k: int = 5       # Most alternatives returned per position
+
+
+@dataclass
+class TokenScore:
+    """One scored token of a sequence or a generation"""
+    token: str
+    logprob: float
+    offset: Optional[int] = None  # Character offset in the scored text, if known
+    top_alternatives: List[Dict[str, Any]] = field(default_factory=list)  # [{'token', 'probability'}] in %
+
+
+def capabilities_for_model(model: str) -> BackendCapabilities:
+    """Capabilities of an OpenAI model from the MODEL_CAPABILITIES table"""
+    known = model_capabilities(model)
+    return BackendCapabilities(
+        prefix=known["chat"],
+        sequence=known["echo"],
+        generate=known["chat"],
+        echo=known["echo"],
+        seed=known["chat"],
+        # Chat allows 20 top_logprobs, legacy completions 5
+        max_top_k=20 if known["chat"] else 5
+    )
+
+
+class ScoringBackend:
+    """
+    Interface every backend implements.
+
+    Methods a backend's capabilities rule out may be left unimplemented.
+    Each method records the requests it makes in the given UsageStats.
+    """
+
+    name = "base"
+
+    def __init__(self, model: str):
+        self.model = model
+        self.capabilities = BackendCapabilities()
+
+    def next_token(
+        self,
+        context: List[Dict[str, str]],
+        prefix: str,
+        top_k: int,
+        temperature: float,
+        usage: UsageStats
+    ) -> List[Dict[str, Any]]:
+        """
+        Top next-token predictions after context plus a partial assistant
+        message (capability: prefix).
+
+        Returns:
+            [{'token' (stripped), 'probability' (%)}], most likely first
+        """
+        raise NotImplementedError(f"{self.name} backend cannot score prefixes")
+
+    def score_sequence(
+        self,
+        prompt: str,
+        text: str,
+        top_k: int,
+        temperature: float,
+        usage: UsageStats
+    ) -> List[TokenScore]:
+        """
+        Logprob of every token of text following prompt (capability: sequence).
+
+        Returns:
+            TokenScores for the tokens of text; offsets are relative to text
+        """
+        raise NotImplementedError(f"{self.name} backend cannot score sequences")
+
+    def generate(
+        self,
+        context: List[Dict[str, str]],
+        max_tokens: int,
+        top_k: int,
+        temperature: float,
+        usage: UsageStats,
+        seed: Optional[int] = None,
+        stream: bool = False,
+        on_token: Optional[Callable[[TokenScore], None]] = None
+    ) -> Tuple[str, List[TokenScore]]:
+        """
+        Generate a response with per-token logprobs (capability: generate).
+
+        With stream=True the response is streamed, and on_token receives each
+        TokenScore as it arrives; otherwise on_token is called once the
+        response is complete.
+
+        Returns:
+            (generated text, TokenScores of the generated tokens)
+        """
+        raise NotImplementedError(f"{self.name} backend cannot generate")
+
+    def for_model(self, model: str) -> "ScoringBackend":
+        """A backend of the same kind and settings for another model"""
+        return type(self)(model=model)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(model={self.model!r})"
+
+
+class OpenAIBackend(ScoringBackend):
+    """OpenAI API: chat logprobs for prefixes/generation, echo for completions models"""
+
+    name = "openai"
+
+    def __init__(
+        self,
+        model: str = "gpt-3.5-turbo",
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_connections: Optional[int] = None
+    ):
+        """
+        Args:
+            model: Model to score with; its capabilities come from MODEL_CAPABILITIES
+            api_key: OpenAI API key (defaults to OPENAI_API_KEY env var)
+            base_url: Alternative endpoint serving OpenAI models (e.g. a proxy)
+            max_connections: Size of the HTTP connection pool, kept for the
+                    backend's lifetime
+        """
+        super().__init__(model)
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.capabilities = capabilities_for_model(model)
+        self._client = None  # OpenAI client, created on first API call
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """The OpenAI client; openai is imported the first time it is needed"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    try:
+                        from openai import OpenAI
+                    except ImportError as e:
+                        raise ImportError(
+                            "The openai package is required for API scoring. "
+                            "Please run: pip install -r requirements.txt"
+                        ) from e
+                    if not self.api_key:
+                        raise ValueError(
+                            "OpenAI API key not found. Set OPENAI_API_KEY environment variable "
+                            "or pass api_key parameter."
+                        )
+                    options = {"base_url": self.base_url} if self.base_url else {}
+                    if self.max_connections:
+                        try:
+                            import httpx
+                        except ImportError:
+                            httpx = None
+                            logger.warning("httpx is not installed; max_connections is ignored and the "
+                                           "OpenAI client's default connection pool is used",
+                                           extra=_event("pool_unavailable", max_connections=self.max_connections))
+                        if httpx is not None:
+                            options["http_client"] = httpx.Client(limits=httpx.Limits(
+                                max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections
+                            ))
+                    self._client = OpenAI(api_key=self.api_key, **options)
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    def for_model(self, model: str) -> "OpenAIBackend":
+        """Same endpoint and key for another model, sharing the client"""
+        backend = type(self)(model=model, api_key=self.api_key, base_url=self.base_url,
+                             max_connections=self.max_connections)
+        backend.client = self.client
+        return backend
+
+    @staticmethod
+    def _top_alternatives(top_logprobs) -> List[Dict[str, Any]]:
+        return [{'token': alt.token.strip(), 'probability': math.exp(alt.logprob) * 100}
+                for alt in top_logprobs or []]
+
+    def next_token(self, context, prefix, top_k, temperature, usage):
+        started = time.perf_counter()
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=context + [{"role": "assistant", "content": prefix}],
+            max_tokens=1,
+            temperature=temperature,
+            logprobs=True,
+            top_logprobs=top_k
+        )
+        usage.record(response, self.model, time.perf_counter() - started)
+
+        logprobs = response.choices[0].logprobs
+        if not (logprobs and logprobs.content):
+            return []
+        return self._top_alternatives(logprobs.content[0].top_logprobs)
+
+    def score_sequence(self, prompt, text, top_k, temperature, usage):
+        started = time.perf_counter()
+        response = self.client.completions.create(
+            model=self.model,
+            prompt=prompt + text,
+            max_tokens=0,
+            echo=True,
+            logprobs=top_k,
+            temperature=temperature
+        )
+        usage.record(response, self.model, time.perf_counter() - started)
+
+        scores = []
+        logprobs = response.choices[0].logprobs
+        if not logprobs:
+            return scores
+        top_logprobs = logprobs.top_logprobs or [None] * len(logprobs.tokens)
+        for token, logprob, top, offset in zip(logprobs.tokens, logprobs.token_logprobs,
+                                               top_logprobs, logprobs.text_offset):
+            # Skip the prompt; the first prompt token has no logprob
+            if offset < len(prompt) or logprob is None:
+                continue
+            scores.append(TokenScore(
+                token=token,
+                logprob=logprob,
+                offset=offset - len(prompt),
+                top_alternatives=[
+                    {'token': alt.strip(), 'probability': math.exp(alt_logprob) * 100}
+                    for alt, alt_logprob in sorted((top or {}).items(), key=lambda kv: -kv[1])
+                ]
+            ))
+        return scores
+
+    def generate(self, context, max_tokens, top_k, temperature, usage, seed=None, stream=False, on_token=None):
+        options = {"seed": seed} if seed is not None and self.capabilities.seed else {}
+        if stream:
+            options["stream"] = True
+            options["stream_options"] = {"include_usage": True}
+        started = time.perf_counter()
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=context,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            logprobs=True,
+            top_logprobs=top_k,
+            **options
+        )
+
+        scores = []
+
+        def add(token_data):
+            offset = scores[-1].offset + len(scores[-1].token) if scores else 0
+            scores.append(TokenScore(
+                token=token_data.token,
+                logprob=token_data.logprob,
+                offset=offset,
+                top_alternatives=self._top_alternatives(token_data.top_logprobs)
+            ))
+            if on_token:
+                on_token(scores[-1])
+
+        if not stream:
+            usage.record(response, self.model, time.perf_counter() - started)
+            logprobs = response.choices[0].logprobs
+            for token_data in (logprobs.content if logprobs and logprobs.content else []):
+                add(token_data)
+            return response.choices[0].message.content, scores
+
+        # Each chunk carries the logprobs of its own tokens; the last one the usage
+        parts = []
+        last = None
+        for chunk in response:
+            last = chunk
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.delta and choice.delta.content:
+                parts.append(choice.delta.content)
+            for token_data in (choice.logprobs.content if choice.logprobs and choice.logprobs.content else []):
+                add(token_data)
+        usage.record(last, self.model, time.perf_counter() - started)
+        return "".join(parts), scores
+
+
+class OpenAICompatibleBackend(OpenAIBackend):
+    """
+    Any server speaking the OpenAI API at base_url (vLLM, llama.cpp, a
+    proxy, fake_model_server.py). Most such servers score prompts with
+    echo=True on /completions for every model, so sequence scoring is
+    assumed available; turn capabilities off where the server lacks them.
+    """
+
+    name = "openai-compatible"
+
+    def __init__(
+        self,
+        model: str,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        echo: bool = True,
+        seed: bool = True,
+        max_top_k: int = 20
+    ):
+        """
+        Args:
+            model: Model name as the server knows it
+            base_url: Server endpoint, e.g. http://localhost:8000/v1
+            api_key: Key if the server wants one (self-hosted ones usually don't)
+            max_connections: Size of the HTTP connection pool
+            echo: Whether /completions supports echo=True prompt logprobs
+            seed: Whether generation honours a seed
+            max_top_k: Most top_logprobs the server returns
+        """
+        if not base_url:
+            raise ValueError("The openai-compatible backend needs a base_url")
+        super().__init__(model, api_key=api_key or os.getenv("OPENAI_API_KEY") or "unused",
+                         base_url=base_url, max_connections=max_connections)
+        self.capabilities = BackendCapabilities(
+            prefix=True, sequence=echo, generate=True, echo=echo, seed=seed, max_top_k=max_top_k
+        )
+
+    def for_model(self, model: str) -> "OpenAICompatibleBackend":
+        backend = type(self)(model=model, base_url=self.base_url, api_key=self.api_key,
+                             max_connections=self.max_connections, echo=self.capabilities.echo,
+                             seed=self.capabilities.seed, max_top_k=self.capabilities.max_top_k)
+        backend.client = self.client
+        return backend
+
+
+class LocalBackend(ScoringBackend):
+    """
+    A local causal language model (torch + transformers).
+
+    Scores a whole sequence in one forward pass and generates with
+    per-token logprobs; nothing is sent over the network.
+    """
+
+    name = "local"
+
+    def __init__(self, model: str, threads: Optional[int] = None):
+        """
+        Args:
+            model: Hugging Face model name or path
+            threads: torch intra-op threads (default: torch's choice)
+        """
+        super().__init__(model)
+        self.threads = threads
+        self.capabilities = BackendCapabilities(sequence=True, generate=True, seed=True, local=True, max_top_k=20)
+        self._loaded = None  # (tokenizer, model), loaded on first use
+        self._load_lock = threading.Lock()
+        # One model serves every thread (e.g. all service workers); passes
+        # take turns, since torch already spreads each one over the cores
+        self._forward_lock = threading.Lock()
+        self._decoded = {}  # token id -> text
+
+    def for_model(self, model: str) -> "LocalBackend":
+        return type(self)(model=model, threads=self.threads)
+
+    def load(self):
+        """(tokenizer, model), loading them the first time"""
+        if self._loaded is None:
+            with self._load_lock:
+                if self._loaded is None:
+                    try:
+                        import torch
+                        from transformers import AutoModelForCausalLM, AutoTokenizer
+                    except ImportError as e:
+                        raise ImportError("Local scoring requires: pip install torch transformers") from e
+                    if self.threads:
+                        torch.set_num_threads(self.threads)
+                    logger.info("Loading local model %s", self.model,
+                                extra=_event("local_load", model=self.model))
+                    tokenizer = AutoTokenizer.from_pretrained(self.model)
+                    model = AutoModelForCausalLM.from_pretrained(self.model)
+                    model.eval()
+                    self._loaded = (tokenizer, model)
+        return self._loaded
+
+    def _top_alternatives(self, tokenizer, row, top_k) -> List[Dict[str, Any]]:
+        import torch
+        top = torch.topk(row, top_k)
+        return [{'token': self._decode(tokenizer, int(alt_id)).strip(), 'probability': math.exp(float(alt_lp)) * 100}
+                for alt_lp, alt_id in zip(top.values, top.indices)]
+
+    @staticmethod
+    def _encode(tokenizer, text):
+        """(token ids, character offsets or None) of text without special tokens"""
+        try:
+            encoded = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+            return encoded["input_ids"], [start for start, _ in encoded["offset_mapping"]]
+        except (NotImplementedError, KeyError, TypeError):
+            # Slow (Python) tokenizers cannot report offsets
+            return tokenizer(text, add_special_tokens=False)["input_ids"], None
+
+    def score_sequence(self, prompt, text, top_k, temperature, usage):
+        return self.score_batch([(prompt, text)], top_k, temperature, usage)[0]
+
+    def score_batch(
+        self,
+        pairs: List[Tuple[str, str]],
+        top_k: int,
+        temperature: float,
+        usage: UsageStats,
+        batch_size: int = 16
+    ) -> List[List[TokenScore]]:
+        """
+        Score many (prompt, text) pairs with batched forward passes.
+
+        Sequences are sorted by length and cut into batches of batch_size,
+        so each batch is padded only to its own longest sequence; padding
+        sits on the right behind an attention mask and never affects the
+        real tokens' logits.
+
+        Returns:
+            Per pair, the TokenScores of its text (same order as pairs)
+        """
+        import torch
+        tokenizer, model = self.load()
+        pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else (tokenizer.eos_token_id or 0)
+
+        sequences = []
+        for prompt, text in pairs:
+            prompt_ids = tokenizer(prompt or tokenizer.bos_token or "\n")["input_ids"]
+            text_ids, offsets = self._encode(tokenizer, text)
+            sequences.append((prompt_ids + text_ids, len(prompt_ids), text_ids, offsets))
+        order = sorted(range(len(sequences)), key=lambda i: len(sequences[i][0]))
+
+        results = [None] * len(sequences)
+        real = padded = 0
+        started = time.perf_counter()
+        for batch_start in range(0, len(order), max(1, batch_size)):
+            batch = order[batch_start:batch_start + max(1, batch_size)]
+            width = len(sequences[batch[-1]][0])
+            input_ids = torch.full((len(batch), width), pad_id, dtype=torch.long)
+            attention_mask = torch.zeros((len(batch), width), dtype=torch.long)
+            for row, i in enumerate(batch):
+                ids = sequences[i][0]
+                input_ids[row, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+                attention_mask[row, :len(ids)] = 1
+                real += len(ids)
+            padded += len(batch) * width
+
+            with self._forward_lock, torch.no_grad():
+                logits = model(input_ids=input_ids, attention_mask=attention_mask).logits
+            usage.calls += 1
+
+            for row, i in enumerate(batch):
+                _, start, text_ids, offsets = sequences[i]
+                if not text_ids:
+                    results[i] = []
+                    continue
+                # Logits at position p predict the token at p + 1; only the
+                # text's positions are normalized, not the prompt or padding
+                rows = torch.log_softmax(logits[row, start - 1:start - 1 + len(text_ids)].float()
+                                         / max(temperature, 1e-6), dim=-1)
+                targets = torch.tensor(text_ids, dtype=torch.long)
+                token_logprobs = rows.gather(1, targets.unsqueeze(1)).squeeze(1).tolist()
+                top = torch.topk(rows, top_k, dim=-1)
+                top_values, top_indices = top.values.exp().mul(100).tolist(), top.indices.tolist()
+                results[i] = [
+                    TokenScore(
+                        token=self._decode(tokenizer, token_id),
+                        logprob=token_logprobs[idx],
+                        offset=offsets[idx] if offsets else None,
+                        top_alternatives=[{'token': self._decode(tokenizer, alt_id).strip(), 'probability': alt_p}
+                                          for alt_p, alt_id in zip(top_values[idx], top_indices[idx])]
+                    )
+                    for idx, token_id in enumerate(text_ids)
+                ]
+
+        elapsed = time.perf_counter() - started
+        batches = math.ceil(len(order) / max(1, batch_size))
+        logger.info("Local forward passes took %.2fs (%d sequences, %d batches)", elapsed, len(order), batches,
+                    extra=_event("local_forward", seconds=elapsed, sequences=len(order), batches=batches,
+                                 padding=1 - real / padded if padded else 0.0))
+        return results
+
+    def _decode(self, tokenizer, token_id: int) -> str:
+        """Text of one token id, cached: batches decode the same ids over and over"""
+        text = self._decoded.get(token_id)
+        if text is None:
+            text = self._decoded[token_id] = tokenizer.decode([token_id])
+        return text
+
+    def generate(self, context, max_tokens, top_k, temperature, usage, seed=None, stream=False, on_token=None):
+        # The whole generation is one in-process call, so stream is accepted but
+        # tokens reach on_token only once it has finished
+        import torch
+        tokenizer, model = self.load()
+        if seed is not None:
+            torch.manual_seed(seed)
+
+        prompt = "".join(m['content'] + "\n\n" for m in context)
+        input_ids = tokenizer(prompt or tokenizer.bos_token or "\n", return_tensors="pt").input_ids
+        with self._forward_lock, torch.no_grad():
+            output = model.generate(
+                input_ids,
+                max_new_tokens=max_tokens,
+                do_sample=temperature > 0,
+                temperature=max(temperature, 1e-6),
+                output_scores=True,
+                return_dict_in_generate=True,
+                pad_token_id=tokenizer.pad_token_id or tokenizer.eos_token_id
+            )
+        usage.calls += 1
+
+        scores = []
+        offset = 0
+        generated = output.sequences[0, input_ids.shape[1]:]
+        for token_id, step in zip(generated.tolist(), output.scores):
+            row = torch.log_softmax(step[0].float(), dim=-1)
+            token = tokenizer.decode([token_id])
+            scores.append(TokenScore(token=token, logprob=float(row[token_id]), offset=offset,
+                                     top_alternatives=self._top_alternatives(tokenizer, row, top_k)))
+            if on_token:
+                on_token(scores[-1])
+            offset += len(token)
+        return tokenizer.decode(generated, skip_special_tokens=True), scores
+
+
+BUILTIN_BACKENDS = {
+    OpenAIBackend.name: OpenAIBackend,
+    OpenAICompatibleBackend.name: OpenAICompatibleBackend,
+    LocalBackend.name: LocalBackend,
+}
+
+
+def available_backends() -> Dict[str, Any]:
+    """
+    Backend name -> class (built in) or entry point (installed packages,
+    loaded on use). Installed entry points override built-in names.
+    """
+    backends = dict(BUILTIN_BACKENDS)
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return backends
+    found = entry_points()
+    group = found.select(group=ENTRY_POINT_GROUP) if hasattr(found, "select") else found.get(ENTRY_POINT_GROUP, [])
+    for entry_point in group:
+        backends[entry_point.name] = entry_point
+    return backends
+
+
+def load_backend(name: str, **options) -> ScoringBackend:
+    """
+    Instantiate a backend by name.
+
+    Options the backend's constructor does not take (e.g. api_key for the
+    local backend) are dropped, so callers can pass one common set.
+
+    Raises:
+        ValueError: If no backend of that name is available
+    """
+    backends = available_backends()
+    if name not in backends:
+        raise ValueError(f"Unknown scoring backend: {name} (available: {', '.join(sorted(backends))})")
+    backend_class = backends[name]
+    if not isinstance(backend_class, type):
+        backend_class = backend_class.load()
+
+    parameters = inspect.signature(backend_class).parameters
+    if not any(p.kind == p.VAR_KEYWORD for p in parameters.values()):
+        options = {k: v for k, v in options.items() if k in parameters}
+    return backend_class(**{k: v for k, v in options.items() if v is not None})
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Service Load Test for TamperCheck
+Drive tampercheck_service.py with concurrent checks against a local fake model
+
+Starts fake_model_server.py and the analysis service in this process (or
+targets a running service with --url), then fires --requests checks from
+--concurrency keep-alive clients. A --repeat fraction of the checks reuse
+earlier messages so the response cache is exercised. Reports throughput,
+latency percentiles, 429 rejections, cache hits and upstream model requests,
+plus time-to-first-token on /analyze/stream. --baseline N also times N
+checks run the old way, one `tampercheck.py` process each, for comparison.
+
+Usage:
+    python service_benchmark.py
+    python service_benchmark.py --requests 500 --concurrency 32 --workers 8 --queue 16
+    python service_benchmark.py --baseline 5 --model-latency 20
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+import subprocess
+import http.client
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+from colorama import Fore, Style, init as colorama_init
+
+import fake_model_server
+from tampercheck_service import AnalysisService, serve
+
+colorama_init(autoreset=True)
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Seconds to wait for an in-process service to come up
+START_TIMEOUT = 60
+
+PROMPT = "Write a short story about a robot learning to paint. Keep it to 2-3 sentences."
+
+SENTENCES = [
+    "The robot learned to paint the colors of the world.",
+    "Each day it created a new canvas with its brush.",
+    "It was the first time the robot felt the beauty of art.",
+    "One day the robot painted the world in each color it knew.",
+]
+
+
+def make_messages(count, repeat, seed=0):
+    """count messages; a `repeat` fraction are copies of earlier ones"""
+    rng = random.Random(seed)
+    messages = []
+    for i in range(count):
+        if messages and rng.random() < repeat:
+            messages.append(rng.choice(messages))
+        else:
+            messages.append(f"{rng.choice(SENTENCES)} {rng.choice(SENTENCES)} ({i})")
+    return messages
+
+
+def start_service(base_url, workers, queue_size, cache_size, rpm):
+    """Run an AnalysisService on a background event loop; returns its URL"""
+    service = AnalysisService(workers=workers, queue_size=queue_size, cache_size=cache_size,
+                              api_key="unused", base_url=base_url, requests_per_minute=rpm)
+    ready = threading.Event()
+    port = []
+    failure = []
+
+    def run():
+        try:
+            asyncio.run(serve(service, port=0, ready=lambda p: (port.append(p), ready.set())))
+        except BaseException as e:
+            # e.g. warm_up failing to build the client; report it instead of hanging
+            failure.append(e)
+            ready.set()
+
+    threading.Thread(target=run, daemon=True).start()
+    if not ready.wait(START_TIMEOUT):
+        raise RuntimeError(f"Service did not start within {START_TIMEOUT}s")
+    if failure:
+        raise RuntimeError(f"Service failed to start: {failure[0]!r}") from failure[0]
+    return f"http://127.0.0.1:{port[0]}"
+
+
+class Client:
+    """One keep-alive connection per thread"""
+
+    def __init__(self, url):
+        self.address = urlparse(url)
+        self._local = threading.local()
+
+    def _connection(self):
+        if not hasattr(self._local, 'conn'):
+            self._local.conn = http.client.HTTPConnection(self.address.hostname, self.address.port, timeout=300)
+        return self._local.conn
+
+    def request(self, method, path, body=None):
+        """(status, response bytes, seconds)"""
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        started = time.perf_counter()
+        try:
+            conn = self._connection()
+            conn.request(method, path, data, {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            payload = response.read()
+        except (ConnectionError, http.client.HTTPException):
+            del self._local.conn
+            return 0, b"", time.perf_counter() - started
+        return response.status, payload, time.perf_counter() - started
+
+    def first_token(self, body):
+        """Seconds until the first streamed token line, and until the end"""
+        conn = http.client.HTTPConnection(self.address.hostname, self.address.port, timeout=300)
+        started = time.perf_counter()
+        conn.request('POST', '/analyze/stream', json.dumps(body).encode('utf-8'))
+        response = conn.getresponse()
+        first = None
+        for line in response:
+            if first is None and json.loads(line).get('event') == 'token':
+                first = time.perf_counter() - started
+        conn.close()
+        return first, time.perf_counter() - started
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def baseline(base_url, messages):
+    """Seconds per check when every check is its own tampercheck.py process"""
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "unused"))
+    times = []
+    for message in messages:
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "tampercheck.py", "--base-url", base_url, "--strategy", "prefix",
+                        "--prompt", PROMPT, "--message", message, "--log-level", "ERROR"],
+                       cwd=HERE, env=env, capture_output=True)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the TamperCheck analysis service")
+    parser.add_argument("--url", help="Target a running service instead of starting one")
+    parser.add_argument("--requests", type=int, default=200, help="Checks to send")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--repeat", type=float, default=0.3, help="Fraction of checks that repeat a message")
+    parser.add_argument("--workers", type=int, default=8, help="Service workers (when started here)")
+    parser.add_argument("--queue", type=int, default=32, help="Service queue size (when started here)")
+    parser.add_argument("--cache", type=int, default=1024, help="Service cache size (when started here)")
+    parser.add_argument("--rpm", type=int, help="Service requests-per-minute limit (when started here)")
+    parser.add_argument("--model-latency", type=float, default=20.0, help="Fake model delay in milliseconds")
+    parser.add_argument("--baseline", type=int, default=0, help="Also time N process-per-check runs")
+    parser.add_argument("--output", default="service_benchmark_results.json", help="Where to save the results")
+    args = parser.parse_args()
+
+    print(f"{Fore.CYAN}{Style.BRIGHT}")
+    print("="*80)
+    print("  SERVICE LOAD TEST")
+    print("  Concurrent checks against the analysis service")
+    print("="*80)
+    print(Style.RESET_ALL)
+
+    model_server, base_url = fake_model_server.start_server(0, args.model_latency)
+    try:
+        url = args.url or start_service(base_url, args.workers, args.queue, args.cache, args.rpm)
+    except RuntimeError as e:
+        print(f"{Fore.RED}{e}")
+        sys.exit(1)
+    client = Client(url)
+    print(f"{Fore.WHITE}Service {url}, fake model {base_url} ({args.model_latency:.0f} ms per call)")
+
+    messages = make_messages(args.requests, args.repeat)
+
+    def check(message):
+        return client.request('POST', '/analyze', {'prompt': PROMPT, 'message': message, 'strategy': 'prefix'})
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(check, messages))
+    elapsed = time.perf_counter() - started
+
+    statuses = {}
+    for status, _, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    ok = [seconds for status, _, seconds in results if status == 200]
+    cached = sum(1 for status, payload, _ in results if status == 200 and json.loads(payload).get('cached'))
+
+    first, total = client.first_token({'prompt': PROMPT, 'message': f"{SENTENCES[0]} {SENTENCES[1]} (stream)"})
+    _, health, _ = client.request('GET', '/health')
+    health = json.loads(health)
+    _, upstream, _ = Client(base_url.rsplit('/v1', 1)[0]).request('GET', '/stats')
+
+    summary = {
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'elapsed': elapsed,
+        'throughput': len(ok) / elapsed if elapsed else 0.0,
+        'statuses': statuses,
+        'cached_responses': cached,
+        'latency': {
+            'mean': sum(ok) / len(ok) if ok else 0.0,
+            'p50': percentile(ok, 0.5),
+            'p95': percentile(ok, 0.95),
+            'p99': percentile(ok, 0.99)
+        },
+        'stream': {'first_token': first, 'total': total},
+        'model_requests': json.loads(upstream)['requests'],
+        'service': health
+    }
+
+    print(f"\n{Fore.GREEN}{len(ok)}/{args.requests} checks answered in {elapsed:.1f}s "
+          f"({summary['throughput']:.1f} checks/s){Style.RESET_ALL}")
+    print(f"Statuses:     {', '.join(f'{k}: {v}' for k, v in sorted(statuses.items()))}")
+    print(f"Latency:      mean {summary['latency']['mean'] * 1000:.0f} ms  p50 {summary['latency']['p50'] * 1000:.0f} ms  "
+          f"p95 {summary['latency']['p95'] * 1000:.0f} ms  p99 {summary['latency']['p99'] * 1000:.0f} ms")
+    print(f"Cache:        {cached} responses from cache, {health['requests']['coalesced']} joined in flight")
+    print(f"Model calls:  {summary['model_requests']}")
+    if first is not None:
+        print(f"Stream:       first token after {first * 1000:.0f} ms, complete after {total * 1000:.0f} ms")
+
+    if args.baseline:
+        times = baseline(base_url, messages[:args.baseline])
+        summary['baseline'] = {'checks': len(times), 'mean': sum(times) / len(times)}
+        print(f"Baseline:     {summary['baseline']['mean'] * 1000:.0f} ms per check with one process per check "
+              f"(service mean {summary['latency']['mean'] * 1000:.0f} ms under load)")
+
+    model_server.shutdown()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    print(f"\n{Fore.GREEN}✓ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
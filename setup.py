@@ -17,6 +17,7 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/yourusername/tampercheck",
     packages=find_packages(),
+    py_modules=["tampercheck", "scoring_backends", "generation_digest", "localization"],
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Developers",
@@ -33,6 +34,7 @@ setup(
         "openai>=1.0.0",
         "python-dotenv>=1.0.0",
         "colorama>=0.4.6",
+        "numpy>=1.21.0",
     ],
     entry_points={
         "console_scripts": [
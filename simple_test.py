@@ -3,7 +3,6 @@
 Simple Test Suite for TamperCheck - Windows Compatible
 """
 
-import os
 import sys
 import json
 from datetime import datetime
@@ -46,19 +45,14 @@ def main():
     ]
     
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        # Logprobs are recorded while generating, so verifying later is nearly free
+        print(f"\n{Fore.WHITE}", end="")
+        record = detector.generate(context, temperature=0.7, max_tokens=100, stream=True,
+                                   on_token=lambda score: print(score.token, end="", flush=True))
+        print()
+        original_text = record.text
         
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=context,
-            temperature=0.7,
-            max_tokens=100
-        )
-        
-        original_text = response.choices[0].message.content
-        
-        print(f"\n{Fore.GREEN}SUCCESS: Original text generated!")
+        print(f"\n{Fore.GREEN}SUCCESS: Original text generated ({len(record.tokens)} tokens recorded)!")
         print(f"\n{Fore.WHITE}{Style.BRIGHT}ORIGINAL TEXT:")
         print(f"{Fore.CYAN}{'='*70}")
         print(f"{Fore.WHITE}{original_text}")
@@ -75,7 +69,9 @@ def main():
     original_file = f"original_{timestamp}.txt"
     with open(original_file, 'w', encoding='utf-8') as f:
         f.write(original_text)
-    print(f"\n{Fore.GREEN}Saved to: {original_file}")
+    record_file = f"generation_{timestamp}.json"
+    record.save(record_file)
+    print(f"\n{Fore.GREEN}Saved to: {original_file} (token record: {record_file})")
     
     # Ask for manual edit
     print(f"\n{Fore.YELLOW}{Style.BRIGHT}[Step 3/5] YOUR TURN - Manual Edit Required!")
@@ -122,6 +118,7 @@ def main():
         "context": context,
         "original_text": original_text,
         "edited_text": edited_text,
+        "record_file": record_file,
         "changes": original_text != edited_text
     }
     
@@ -130,18 +127,19 @@ def main():
         json.dump(test_data, f, indent=2, ensure_ascii=False)
     print(f"{Fore.GREEN}Test data saved to: {data_file}")
     
-    # Analyze original
-    print(f"\n{Fore.CYAN}{Style.BRIGHT}[Step 4/5] Analyzing ORIGINAL text...")
-    print(f"{Fore.YELLOW}This should show mostly HIGH probability (green) tokens")
+    # Verify the edited text against the generation record
+    print(f"\n{Fore.CYAN}{Style.BRIGHT}[Step 4/5] Verifying EDITED text against the token record...")
+    print(f"{Fore.YELLOW}Unchanged words reuse the recorded probabilities; only edits are scored")
     
+    result_edited = None
     try:
-        result_original = detector.analyze(context, "", temperature=0.7)
+        result_edited = detector.verify(record, edited_text)
         
-        print(f"\n{Fore.WHITE}{Style.BRIGHT}=== ORIGINAL TEXT ANALYSIS ===")
-        detector.print_results(result_original, show_all_tokens=False)
+        print(f"\n{Fore.WHITE}{Style.BRIGHT}=== EDITED TEXT ANALYSIS ===")
+        detector.print_results(result_edited, show_all_tokens=False)
         
     except Exception as e:
-        print(f"{Fore.RED}ERROR analyzing original: {e}")
+        print(f"{Fore.RED}ERROR verifying edited text: {e}")
         import traceback
         traceback.print_exc()
     
@@ -155,8 +153,9 @@ def main():
     print(f"\n{Fore.WHITE}What you provided (edited):")
     print(f"{Fore.YELLOW}{edited_text}")
     
-    print(f"\n{Fore.WHITE}What AI would generate again (from analysis):")
-    print(f"{Fore.CYAN}{result_original.original_message}")
+    if result_edited:
+        print(f"\n{Fore.WHITE}Requests to verify: {result_edited.usage.calls} "
+              f"(scoring every token would take {len(result_edited.tokens)})")
     
     if original_text != edited_text:
         print(f"\n{Fore.RED}{Style.BRIGHT}DIFFERENCES DETECTED!")
@@ -176,7 +175,7 @@ def main():
     print(f"\n{Fore.WHITE}What we demonstrated:")
     print(f"  1. {Fore.GREEN}SUCCESS{Fore.WHITE} - Generated original text from OpenAI")
     print(f"  2. {Fore.GREEN}SUCCESS{Fore.WHITE} - Captured your manual edit")
-    print(f"  3. {Fore.GREEN}SUCCESS{Fore.WHITE} - Analyzed token probabilities")
+    print(f"  3. {Fore.GREEN}SUCCESS{Fore.WHITE} - Verified the edit against the recorded probabilities")
     print(f"  4. {Fore.GREEN}SUCCESS{Fore.WHITE} - Saved test data for comparison")
     
     print(f"\n{Fore.YELLOW}Key Insight:")
@@ -187,6 +186,7 @@ def main():
     print(f"\n{Fore.GREEN}{Style.BRIGHT}Interactive test complete!")
     print(f"\n{Fore.CYAN}Files saved:")
     print(f"  - {original_file}")
+    print(f"  - {record_file}")
     print(f"  - {edited_file}")
     print(f"  - {data_file}")
 
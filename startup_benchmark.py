@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark for TamperCheck
+Track how long `import tampercheck` and `tampercheck --help` take
+
+Uses `python -X importtime` to attribute import cost per module, and checks
+that no heavy backend (openai, torch, ...) is imported just by importing the
+library. Results are printed and written to bench_output.txt.
+
+Usage:
+    python startup_benchmark.py
+    python startup_benchmark.py --runs 20 --budget-ms 150   # exit 1 if over budget
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import statistics
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that must only load when a code path actually needs them
+HEAVY_MODULES = ('openai', 'httpx', 'colorama', 'dotenv', 'numpy', 'torch', 'transformers')
+
+
+def import_profile(module="tampercheck"):
+    """
+    Run `python -X importtime -c "import module"` in a fresh interpreter.
+
+    Returns:
+        List of (module name, self microseconds, cumulative microseconds)
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def wall_time(command, runs):
+    """Median and best wall time of a command in seconds"""
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=HERE, capture_output=True)
+        times.append(time.perf_counter() - started)
+    return statistics.median(times), min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TamperCheck startup time")
+    parser.add_argument("--runs", type=int, default=10, help="Repetitions per timed command")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    parser.add_argument("--budget-ms", type=float, help="Fail if `import tampercheck` exceeds this")
+    parser.add_argument("--output", default="bench_output.txt", help="Where to write the report")
+    args = parser.parse_args()
+
+    profile = import_profile()
+    loaded = {name for name, _, _ in profile}
+    total_ms = next(cumulative for name, _, cumulative in profile if name == "tampercheck") / 1000
+    heavy = sorted(m for m in HEAVY_MODULES if m in loaded)
+
+    baseline, _ = wall_time([sys.executable, "-c", "pass"], args.runs)
+    import_median, import_best = wall_time([sys.executable, "-c", "import tampercheck"], args.runs)
+    help_median, help_best = wall_time([sys.executable, "tampercheck.py", "--help"], args.runs)
+
+    lines = [
+        "TamperCheck startup benchmark",
+        f"python {sys.version.split()[0]}, {args.runs} runs per command",
+        "",
+        f"import tampercheck (-X importtime, cumulative): {total_ms:8.1f} ms",
+        f"interpreter only:                  median {baseline * 1000:7.1f} ms",
+        f"python -c 'import tampercheck':    median {import_median * 1000:7.1f} ms  best {import_best * 1000:7.1f} ms",
+        f"tampercheck --help:                median {help_median * 1000:7.1f} ms  best {help_best * 1000:7.1f} ms",
+        f"heavy modules loaded on import:    {', '.join(heavy) if heavy else 'none'}",
+        "",
+        "Slowest imports (self time):",
+    ]
+    for name, self_us, cumulative_us in sorted(profile, key=lambda r: -r[1])[:args.top]:
+        lines.append(f"  {self_us / 1000:7.2f} ms self {cumulative_us / 1000:8.2f} ms cumulative  {name}")
+
+    report = "\n".join(lines)
+    print(report)
+    with open(os.path.join(HERE, args.output), 'w', encoding='utf-8') as f:
+        f.write(report + "\n")
+
+    failed = bool(heavy)
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"\nOver budget: {total_ms:.1f} ms > {args.budget_ms:.1f} ms")
+        failed = True
+    if heavy:
+        print(f"\nHeavy modules imported eagerly: {', '.join(heavy)}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
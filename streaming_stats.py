@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Streaming Aggregate Statistics for TamperCheck
+Online, mergeable statistics for validation and corpus runs
+
+Every accumulator here works in bounded memory as results stream in and can
+be serialized and merged, so shards of a large run can be combined later:
+
+- RunningStats: count/mean/variance (Welford, merged with Chan et al.)
+- RateHistogram: fixed-bin histogram of percentage rates
+- PoissonBootstrap: bootstrap confidence interval of the mean via Poisson(1)
+  replicate weights, updated one observation at a time
+
+Usage:
+    python streaming_stats.py shard1.json shard2.json   # merge and summarize
+"""
+
+import sys
+import json
+import math
+import random
+
+
+STATUSES = ('HIGH', 'MEDIUM', 'LOW', 'NOT_FOUND')
+
+# Per-document rates tracked by the aggregator
+METRICS = ('high_pct', 'medium_pct', 'low_pct', 'not_found_pct')
+
+
+def count_statuses(results):
+    """
+    Per-document statistics in a single pass over token results
+
+    Returns the same dict the scripts' calculate_statistics/calc_stats build.
+    """
+    counts = dict.fromkeys(STATUSES, 0)
+    total = 0
+    for r in results:
+        status = r.get('status')
+        if status == 'ERROR':
+            continue
+        total += 1
+        if status in counts:
+            counts[status] += 1
+
+    def pct(n):
+        return (n / total * 100) if total > 0 else 0
+
+    return {
+        'total': total,
+        'high': counts['HIGH'],
+        'medium': counts['MEDIUM'],
+        'low': counts['LOW'],
+        'not_found': counts['NOT_FOUND'],
+        'high_pct': pct(counts['HIGH']),
+        'medium_pct': pct(counts['MEDIUM']),
+        'low_pct': pct(counts['LOW']),
+        'not_found_pct': pct(counts['NOT_FOUND'])
+    }
+
+
+class RunningStats:
+    """Count, mean, variance, min and max in O(1) memory (Welford)"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    def merge(self, other):
+        """Combine another RunningStats into this one (Chan et al.)"""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        """Sample variance (same convention as statistics.variance)"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'm2': self.m2,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.count = data['count']
+        stats.mean = data['mean']
+        stats.m2 = data['m2']
+        stats.min = data['min'] if data['min'] is not None else math.inf
+        stats.max = data['max'] if data['max'] is not None else -math.inf
+        return stats
+
+
+class RateHistogram:
+    """Fixed-bin histogram over percentage rates (0-100)"""
+
+    def __init__(self, bins=20):
+        self.bins = bins
+        self.counts = [0] * bins
+
+    def update(self, pct):
+        idx = min(int(pct / 100 * self.bins), self.bins - 1)
+        self.counts[max(idx, 0)] += 1
+
+    def merge(self, other):
+        if other.bins != self.bins:
+            raise ValueError("Cannot merge histograms with different bin counts")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        return self
+
+    def edges(self):
+        width = 100 / self.bins
+        return [(i * width, (i + 1) * width) for i in range(self.bins)]
+
+    def to_dict(self):
+        return {'bins': self.bins, 'counts': list(self.counts)}
+
+    @classmethod
+    def from_dict(cls, data):
+        hist = cls(data['bins'])
+        hist.counts = list(data['counts'])
+        return hist
+
+
+def new_seed():
+    """A random seed, so independently started shards draw independent weights"""
+    return random.SystemRandom().getrandbits(62)
+
+
+def _poisson1(rng):
+    """Draw from Poisson(1) (Knuth's method; fast for lambda=1)"""
+    limit = math.exp(-1)
+    k, p = 0, rng.random()
+    while p > limit:
+        k += 1
+        p *= rng.random()
+    return k
+
+
+class PoissonBootstrap:
+    """
+    Online bootstrap of the mean.
+
+    Each observation gets an independent Poisson(1) weight in every replicate,
+    which approximates resampling with replacement without storing the data.
+    Replicates are just (weight, weighted sum) pairs, so merging shards is an
+    element-wise sum. That is only valid if the shards drew their weights
+    independently, so every bootstrap tracks the seeds behind its data and
+    merge() refuses to combine two that share one.
+    """
+
+    def __init__(self, replicates=200, seed=None):
+        self.replicates = replicates
+        self.seed = new_seed() if seed is None else seed
+        self.weights = [0] * replicates
+        self.sums = [0.0] * replicates
+        self.sources = set()  # Seeds whose draws are in weights/sums
+        self._rng = random.Random(self.seed)
+
+    def update(self, x):
+        self.sources.add(self.seed)
+        for i in range(self.replicates):
+            w = _poisson1(self._rng)
+            if w:
+                self.weights[i] += w
+                self.sums[i] += w * x
+
+    def merge(self, other):
+        if other.replicates != self.replicates:
+            raise ValueError("Cannot merge bootstraps with different replicate counts")
+        shared = (self.sources | {self.seed}) & other.sources
+        if shared:
+            raise ValueError(f"Cannot merge bootstraps drawn from the same seed ({min(shared)}); "
+                             "their replicate weights are not independent")
+        self.sources |= other.sources
+        self.weights = [a + b for a, b in zip(self.weights, other.weights)]
+        self.sums = [a + b for a, b in zip(self.sums, other.sums)]
+        return self
+
+    def confidence_interval(self, level=0.95):
+        """Percentile interval of the replicate means, or None if empty"""
+        means = sorted(s / w for s, w in zip(self.sums, self.weights) if w > 0)
+        if not means:
+            return None
+        tail = (1 - level) / 2
+        lo = means[int(tail * (len(means) - 1))]
+        hi = means[int(math.ceil((1 - tail) * (len(means) - 1)))]
+        return lo, hi
+
+    def to_dict(self):
+        version, state, gauss = self._rng.getstate()
+        return {
+            'replicates': self.replicates,
+            'seed': self.seed,
+            'sources': sorted(self.sources),
+            'rng_state': [version, list(state), gauss],
+            'weights': list(self.weights),
+            'sums': list(self.sums)
+        }
+
+    @classmethod
+    def from_dict(cls, data, seed=None):
+        """
+        Restore a bootstrap, continuing its random stream where it stopped
+        so a resumed shard never replays weights it already drew. seed is
+        only used for states saved without one.
+        """
+        boot = cls(data['replicates'], seed=data.get('seed', seed))
+        boot.weights = list(data['weights'])
+        boot.sums = list(data['sums'])
+        boot.sources = set(data.get('sources', []))
+        if data.get('rng_state'):
+            version, state, gauss = data['rng_state']
+            boot._rng.setstate((version, tuple(state), gauss))
+        return boot
+
+
+class MetricAccumulator:
+    """RunningStats + RateHistogram + PoissonBootstrap for one metric"""
+
+    def __init__(self, seed=None):
+        self.stats = RunningStats()
+        self.histogram = RateHistogram()
+        self.bootstrap = PoissonBootstrap(seed=seed)
+
+    def update(self, x):
+        self.stats.update(x)
+        self.histogram.update(x)
+        self.bootstrap.update(x)
+
+    def merge(self, other):
+        self.stats.merge(other.stats)
+        self.histogram.merge(other.histogram)
+        self.bootstrap.merge(other.bootstrap)
+        return self
+
+    def summary(self):
+        ci = self.bootstrap.confidence_interval()
+        return {
+            'n': self.stats.count,
+            'mean': self.stats.mean,
+            'stdev': self.stats.stdev,
+            'min': self.stats.min if self.stats.count else None,
+            'max': self.stats.max if self.stats.count else None,
+            'ci95': list(ci) if ci else None,
+            'histogram': self.histogram.counts
+        }
+
+    def to_dict(self):
+        return {
+            'stats': self.stats.to_dict(),
+            'histogram': self.histogram.to_dict(),
+            'bootstrap': self.bootstrap.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data, seed=None):
+        acc = cls(seed=seed)
+        acc.stats = RunningStats.from_dict(data['stats'])
+        acc.histogram = RateHistogram.from_dict(data['histogram'])
+        acc.bootstrap = PoissonBootstrap.from_dict(data['bootstrap'], seed=seed)
+        return acc
+
+
+class ValidationAggregator:
+    """
+    Streaming per-group aggregates of per-document rates.
+
+    Each document updates the 'all' group plus 'category:<name>' and
+    'edit_type:<name>' groups. Only accumulators are kept, never the
+    documents, so memory is bounded by the number of groups.
+
+    The seed defaults to a random one per aggregator, so shards started
+    separately draw independent bootstrap weights.
+    """
+
+    def __init__(self, seed=None):
+        self.seed = new_seed() if seed is None else seed
+        self.groups = {}
+        self.documents = 0
+        self.tokens = 0
+
+    def _group(self, name):
+        if name not in self.groups:
+            # Distinct seed per group so replicate weights are independent
+            group_seed = self.seed * 1_000_003 + len(self.groups)
+            self.groups[name] = {m: MetricAccumulator(seed=group_seed) for m in METRICS}
+        return self.groups[name]
+
+    def add(self, statistics, category=None, edit_type=None):
+        """
+        Fold one document's statistics (from count_statuses) into the aggregates
+        """
+        names = ['all']
+        if category is not None:
+            names.append(f"category:{category}")
+        if edit_type is not None:
+            names.append(f"edit_type:{edit_type}")
+
+        for name in names:
+            group = self._group(name)
+            for metric in METRICS:
+                group[metric].update(statistics[metric])
+
+        self.documents += 1
+        self.tokens += statistics['total']
+
+    def merge(self, other):
+        """Combine another aggregator (e.g. another shard) into this one"""
+        for name, metrics in other.groups.items():
+            group = self._group(name)
+            for metric in METRICS:
+                group[metric].merge(metrics[metric])
+        self.documents += other.documents
+        self.tokens += other.tokens
+        return self
+
+    def summary(self, group='all'):
+        """Summary dict per metric for one group, or None if it has no data"""
+        if group not in self.groups:
+            return None
+        return {metric: acc.summary() for metric, acc in self.groups[group].items()}
+
+    def to_dict(self):
+        return {
+            'seed': self.seed,
+            'documents': self.documents,
+            'tokens': self.tokens,
+            'groups': {
+                name: {metric: acc.to_dict() for metric, acc in metrics.items()}
+                for name, metrics in self.groups.items()
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        agg = cls(seed=data.get('seed'))
+        agg.documents = data['documents']
+        agg.tokens = data['tokens']
+        for idx, (name, metrics) in enumerate(data['groups'].items()):
+            agg.groups[name] = {
+                metric: MetricAccumulator.from_dict(acc, seed=agg.seed * 1_000_003 + idx)
+                for metric, acc in metrics.items()
+            }
+        return agg
+
+
+def print_summary(aggregator):
+    """Print mean ± stdev and 95% CI of every metric for every group"""
+    print(f"Documents: {aggregator.documents}, tokens: {aggregator.tokens}")
+    for name in sorted(aggregator.groups, key=lambda n: (n != 'all', n)):
+        print(f"\n{name}")
+        for metric, s in aggregator.summary(name).items():
+            ci = f"[{s['ci95'][0]:.1f}, {s['ci95'][1]:.1f}]" if s['ci95'] else "n/a"
+            print(f"  {metric:<14} {s['mean']:6.1f}% ± {s['stdev']:5.1f}  95% CI {ci}  (n={s['n']})")
+
+
+def main():
+    if sys.platform == 'win32':
+        import codecs
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+    if len(sys.argv) < 2:
+        print("Usage: python streaming_stats.py <state-or-results.json> [...]")
+        sys.exit(1)
+
+    merged = ValidationAggregator()
+    for path in sys.argv[1:]:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        # Accept a bare aggregator state or a validation results file
+        state = data.get('aggregator_state', data)
+        merged.merge(ValidationAggregator.from_dict(state))
+
+    print_summary(merged)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,25 +7,196 @@ probability distributions using OpenAI's logprobs feature.
 """
 
 import os
+import re
 import math
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+import time
+import logging
+import argparse
+import threading
+import importlib.util
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple, Callable
+from dataclasses import dataclass, field, asdict
 from enum import Enum
 
-try:
-    from openai import OpenAI
-    from colorama import Fore, Back, Style, init as colorama_init
-    from dotenv import load_dotenv
-except ImportError as e:
-    print(f"Error: Missing required package. Please run: pip install -r requirements.txt")
-    print(f"Details: {e}")
-    exit(1)
 
-# Initialize colorama for cross-platform colored output
-colorama_init(autoreset=True)
+class _LazyAnsi:
+    """
+    colorama's Fore/Back/Style, imported on first use.
+    
+    Importing tampercheck stays cheap and side-effect free; without
+    colorama installed every colour code is an empty string.
+    """
+    
+    def __init__(self, name: str):
+        self._name = name
+        self._codes = None
+    
+    def __getattr__(self, attr: str) -> str:
+        if self._codes is None:
+            try:
+                import colorama
+                self._codes = getattr(colorama, self._name)
+            except ImportError:
+                self._codes = False
+        return getattr(self._codes, attr) if self._codes else ""
+
+
+Fore = _LazyAnsi("Fore")
+Back = _LazyAnsi("Back")
+Style = _LazyAnsi("Style")
+
+
+def load_environment() -> None:
+    """Load a .env file into the environment if python-dotenv is installed"""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
+
+
+# Library logging is silent until configure_logging() (or the host
+# application) attaches a handler; analysis code never prints.
+logger = logging.getLogger("tampercheck")
+logger.addHandler(logging.NullHandler())
+
+
+def _event(name: str, **data) -> Dict[str, Any]:
+    """extra= payload for a structured log record"""
+    return {"event": name, "data": data}
+
+
+class _ConsoleFormatter(logging.Formatter):
+    """Human-readable '[TamperCheck] message' lines, coloured by level"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        colors = {
+            logging.DEBUG: "",
+            logging.INFO: Fore.CYAN,
+            logging.WARNING: Fore.YELLOW,
+            logging.ERROR: Fore.RED,
+            logging.CRITICAL: Fore.RED,
+        }
+        if getattr(record, "event", None) == "token":
+            return record.getMessage()
+        return f"{colors.get(record.levelno, '')}[TamperCheck] {record.getMessage()}{Style.RESET_ALL}"
+
+
+class _JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, event, message and fields"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        import json
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "event": getattr(record, "event", None),
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "data", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: str = "INFO", json_lines: bool = False, stream=None) -> logging.Handler:
+    """
+    Send tampercheck's log records to a stream (stderr by default).
+    
+    Args:
+        level: Minimum level; DEBUG adds one record per scored token
+        json_lines: Emit JSON lines instead of coloured console text
+        stream: Where to write
+        
+    Returns:
+        The installed handler (replaces one installed by an earlier call)
+    """
+    for handler in list(logger.handlers):
+        if getattr(handler, "_tampercheck", False):
+            logger.removeHandler(handler)
+    
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(_JsonFormatter() if json_lines else _ConsoleFormatter())
+    handler._tampercheck = True
+    logger.addHandler(handler)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+    return handler
+
+
+# Approximate list prices in USD per 1M tokens: (prompt, completion)
+MODEL_PRICING = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-3.5-turbo-instruct": (1.50, 2.00),
+    "gpt-4": (30.00, 60.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "davinci-002": (2.00, 2.00),
+    "babbage-002": (0.40, 0.40),
+}
+
+# Cached prompt tokens are billed at a discount of the prompt price
+CACHED_PROMPT_DISCOUNT = 0.5
+
+
+# What each model's API can do: chat completions with logprobs, and
+# legacy completions with echo=True (logprobs for the prompt itself)
+MODEL_CAPABILITIES = {
+    "gpt-3.5-turbo": {"chat": True, "echo": False},
+    "gpt-3.5-turbo-instruct": {"chat": False, "echo": True},
+    "gpt-4": {"chat": True, "echo": False},
+    "gpt-4-turbo": {"chat": True, "echo": False},
+    "gpt-4o": {"chat": True, "echo": False},
+    "gpt-4o-mini": {"chat": True, "echo": False},
+    "davinci-002": {"chat": False, "echo": True},
+    "babbage-002": {"chat": False, "echo": True},
+}
+
+# How analyze_ensemble combines one token's probabilities across models:
+# min flags a token if any model finds it unlikely, mean averages, and vote
+# takes the median (a majority vote under any threshold)
+FUSION_METHODS = ("min", "mean", "vote")
+
+# Same tokenization the analysis scripts use for per-token scoring
+TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]|\s+')
+
+
+def _lookup_model(table: Dict[str, Any], model: str) -> Optional[str]:
+    """Longest table key that prefixes the model name (handles dated snapshots)"""
+    return max((name for name in table if model.startswith(name)), key=len, default=None)
+
+
+def model_capabilities(model: str) -> Dict[str, bool]:
+    """Capabilities of a model; unknown models are assumed to be chat-only"""
+    base = _lookup_model(MODEL_CAPABILITIES, model)
+    return dict(MODEL_CAPABILITIES[base]) if base else {"chat": True, "echo": False}
 
-# Load environment variables
-load_dotenv()
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting"""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    """
+    Estimate the USD cost of a request from its token counts.
+    
+    Dated model snapshots (e.g. "gpt-4o-mini-2024-07-18") are priced as their
+    base model. Unknown models are reported as 0.0.
+    """
+    base = _lookup_model(MODEL_PRICING, model)
+    if base is None:
+        return 0.0
+    
+    prompt_price, completion_price = MODEL_PRICING[base]
+    uncached = prompt_tokens - cached_tokens
+    cost = uncached * prompt_price
+    cost += cached_tokens * prompt_price * CACHED_PROMPT_DISCOUNT
+    cost += completion_tokens * completion_price
+    return cost / 1_000_000
 
 
 class ProbabilityLevel(Enum):
@@ -44,6 +215,72 @@ class TokenAnalysis:
     probability_pct: float  # Percentage (0-100)
     level: ProbabilityLevel
     position: int
+    found: bool = True  # False if the token was not among the model's top alternatives
+    top_alternatives: List[Dict[str, Any]] = field(default_factory=list)  # [{'token', 'probability'}] in %
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Per-token result in the format the analysis scripts store"""
+        return {
+            'position': self.position,
+            'token': self.token,
+            'found': self.found,
+            'probability': self.probability_pct,
+            'status': self.level.name if self.found else "NOT_FOUND",
+            'top_alternatives': self.top_alternatives
+        }
+
+
+@dataclass
+class UsageStats:
+    """Request, token and timing accounting for one or more analyses"""
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    estimated_cost: float = 0.0  # USD
+    wall_time: float = 0.0       # Seconds, end to end
+    network_time: float = 0.0    # Seconds spent waiting on API calls
+    
+    def record(self, response: Any, model: str, elapsed: float):
+        """
+        Add one API response to the totals.
+        
+        Args:
+            response: Chat or completions response carrying a `usage` block
+            model: Model the request was billed against
+            elapsed: Seconds spent waiting for the response
+        """
+        self.calls += 1
+        self.network_time += elapsed
+        
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        
+        prompt_tokens = usage.prompt_tokens or 0
+        completion_tokens = usage.completion_tokens or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+        
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cached_tokens += cached_tokens
+        self.estimated_cost += estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens)
+    
+    def merge(self, other: "UsageStats") -> "UsageStats":
+        """Add another UsageStats into this one (in place) and return self"""
+        self.calls += other.calls
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cached_tokens += other.cached_tokens
+        self.estimated_cost += other.estimated_cost
+        self.wall_time += other.wall_time
+        self.network_time += other.network_time
+        return self
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly representation"""
+        return asdict(self)
 
 
 @dataclass
@@ -56,6 +293,440 @@ class TamperAnalysis:
     low_prob_count: int
     avg_probability: float
     suspicious_regions: List[tuple]  # List of (start_pos, end_pos) tuples
+    usage: UsageStats = field(default_factory=UsageStats)
+    ensemble: Dict[str, "TamperAnalysis"] = field(default_factory=dict)  # Per-model analyses behind a fused result
+    change_points: List[Any] = field(default_factory=list)  # localization.ChangePointEvents seen while streaming
+    stopped_early: bool = False  # Scoring stopped once enough regions were confirmed
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly representation; tokens use TokenAnalysis.to_dict"""
+        return {
+            'message': self.original_message,
+            'high_prob_count': self.high_prob_count,
+            'medium_prob_count': self.medium_prob_count,
+            'low_prob_count': self.low_prob_count,
+            'avg_probability': self.avg_probability,
+            'suspicious_regions': [list(region) for region in self.suspicious_regions],
+            'change_points': [event.to_dict() for event in self.change_points],
+            'stopped_early': self.stopped_early,
+            'usage': self.usage.to_dict(),
+            'ensemble': {
+                model: {
+                    'avg_probability': member.avg_probability,
+                    'low_prob_count': member.low_prob_count,
+                    'suspicious_regions': [list(region) for region in member.suspicious_regions],
+                    'usage': member.usage.to_dict()
+                }
+                for model, member in self.ensemble.items()
+            },
+            'results': [token.to_dict() for token in self.tokens]
+        }
+
+
+@dataclass
+class GenerationRecord:
+    """
+    A generated message with the logprobs captured while generating it.
+    
+    Kept next to the message (see save), it lets verify() check a presented
+    text with a local diff, calling the model only for the edited spans.
+    """
+    model: str
+    context: List[Dict[str, str]]
+    text: str
+    tokens: List[Any]  # scoring_backends.TokenScores of the generated tokens
+    temperature: float
+    top_k: int
+    usage: UsageStats = field(default_factory=UsageStats)
+    digest: Optional[Any] = None  # generation_digest.MerkleDigest of the text
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Compact JSON-friendly form: every token is [text, logprob,
+        [[alternative, probability %], ...]]. Offsets are implied by the
+        token order, and usage is not stored.
+        """
+        data = {
+            'model': self.model,
+            'temperature': self.temperature,
+            'top_k': self.top_k,
+            'context': self.context,
+            'text': self.text,
+            'tokens': [
+                [score.token, round(score.logprob, 5),
+                 [[alt['token'], round(alt['probability'], 4)] for alt in score.top_alternatives]]
+                for score in self.tokens
+            ]
+        }
+        if self.digest is not None:
+            data['digest'] = self.digest.to_dict()
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GenerationRecord":
+        """Rebuild a record from to_dict output"""
+        from scoring_backends import TokenScore
+        from generation_digest import MerkleDigest
+        
+        tokens = []
+        offset = 0
+        for token, logprob, alternatives in data['tokens']:
+            tokens.append(TokenScore(
+                token=token,
+                logprob=logprob,
+                offset=offset,
+                top_alternatives=[{'token': alt, 'probability': pct} for alt, pct in alternatives]
+            ))
+            offset += len(token)
+        return cls(
+            model=data['model'],
+            context=data['context'],
+            text=data['text'],
+            tokens=tokens,
+            temperature=data['temperature'],
+            top_k=data['top_k'],
+            digest=MerkleDigest.from_dict(data['digest']) if data.get('digest') else None
+        )
+    
+    def save(self, path: str):
+        """Write the record as JSON"""
+        import json
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+    
+    @classmethod
+    def load(cls, path: str) -> "GenerationRecord":
+        """Read a record written by save"""
+        import json
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+class ScoringStrategy(Enum):
+    """Ways of getting token probabilities for a message"""
+    PREFIX = "prefix"              # One max_tokens=1 request per token of the message
+    ECHO = "echo"                  # One completions request with echo=True
+    REGENERATION = "regeneration"  # Regenerate a response and read its logprobs
+    LOCAL = "local"                # Forward pass through a local model
+
+
+# Rough relative detection quality of each strategy (0-1). Prefix and echo
+# score the presented text itself; regeneration only samples a fresh
+# response; a local model usually differs from the one that wrote the text.
+# Calibrate against scientific_validation.py before relying on these.
+STRATEGY_ACCURACY = {
+    ScoringStrategy.PREFIX: 0.85,
+    ScoringStrategy.ECHO: 0.90,
+    ScoringStrategy.REGENERATION: 0.30,
+    ScoringStrategy.LOCAL: 0.70,
+}
+
+# Latency assumptions used by the planner
+DEFAULT_REQUEST_LATENCY = 0.6       # Seconds per API round trip
+GENERATION_TOKENS_PER_SECOND = 50   # Completion tokens streamed per second
+LOCAL_TOKENS_PER_SECOND = 200       # Tokens per second through a local forward pass
+MESSAGE_OVERHEAD_TOKENS = 4         # Chat formatting tokens per message
+MAX_GENERATION_TOKENS = 4096        # Cap on max_tokens for regeneration requests
+
+
+@dataclass
+class StrategyEstimate:
+    """Estimated cost and latency of one scoring strategy"""
+    strategy: ScoringStrategy
+    available: bool
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    estimated_cost: float = 0.0  # USD
+    wall_time: float = 0.0       # Seconds
+    accuracy: float = 0.0
+    reason: str = ""             # Why the strategy is unavailable or was rejected
+    
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['strategy'] = self.strategy.value
+        return data
+
+
+@dataclass
+class ScoringPlan:
+    """Dry-run plan: an estimate per strategy and the one that would be used"""
+    model: str
+    message_tokens: int
+    estimates: List[StrategyEstimate]
+    chosen: Optional[StrategyEstimate]
+    max_latency: Optional[float] = None
+    min_accuracy: Optional[float] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'model': self.model,
+            'message_tokens': self.message_tokens,
+            'max_latency': self.max_latency,
+            'min_accuracy': self.min_accuracy,
+            'chosen': self.chosen.strategy.value if self.chosen else None,
+            'estimates': [e.to_dict() for e in self.estimates]
+        }
+
+
+def _wall_time(calls: int, prompt_tokens: int, seconds: float,
+               requests_per_minute: Optional[int], tokens_per_minute: Optional[int]) -> float:
+    """Latency is the slower of doing the work and staying under the rate limits"""
+    limits = [seconds]
+    if requests_per_minute:
+        limits.append(calls / requests_per_minute * 60)
+    if tokens_per_minute:
+        limits.append(prompt_tokens / tokens_per_minute * 60)
+    return max(limits)
+
+
+def plan_scoring(
+    model: str,
+    context: List[Dict[str, str]],
+    message: str,
+    max_latency: Optional[float] = None,
+    min_accuracy: Optional[float] = None,
+    requests_per_minute: Optional[int] = None,
+    tokens_per_minute: Optional[int] = None,
+    local_model: Optional[str] = None,
+    request_latency: float = DEFAULT_REQUEST_LATENCY,
+    context_window: Optional[int] = None,
+    capabilities: Optional[Any] = None,
+    prefer: str = "cost"
+) -> ScoringPlan:
+    """
+    Estimate calls, tokens, cost and wall time of every scoring strategy
+    without making any API calls, and pick the cheapest (or fastest) one
+    that meets the latency and accuracy targets.
+    
+    Args:
+        model: Model that would score the message
+        context: Conversation the message was generated in
+        message: Message text to be scored
+        max_latency: Optional upper bound on wall time in seconds
+        min_accuracy: Optional lower bound on STRATEGY_ACCURACY
+        requests_per_minute: Current request rate limit, if known
+        tokens_per_minute: Current token rate limit, if known
+        local_model: Local model name/path; enables the local strategy
+        request_latency: Assumed seconds per API round trip
+        context_window: Prefix scoring sends only the last K tokens of the prefix
+        capabilities: BackendCapabilities of the scoring backend; defaults to
+                    what the OpenAI API offers for the model
+        prefer: "cost" picks the cheapest strategy, ties broken by latency;
+                    "latency" the fastest one that scores the message itself
+        
+    Returns:
+        ScoringPlan (chosen is None if no strategy meets the targets)
+    """
+    if prefer not in ("cost", "latency"):
+        raise ValueError(f"Unknown planning preference: {prefer}")
+    if capabilities is None:
+        from scoring_backends import capabilities_for_model
+        capabilities = capabilities_for_model(model)
+    context_tokens = sum(estimate_tokens(m['content']) + MESSAGE_OVERHEAD_TOKENS for m in context)
+    message_tokens = estimate_tokens(message)
+    
+    estimates = []
+    
+    # Per-prefix: one request per word/punctuation token, each resending the
+    # context plus the prefix so far (or its last context_window tokens)
+    prefix = StrategyEstimate(ScoringStrategy.PREFIX, available=capabilities.prefix)
+    prefix_chars = 0
+    window_starts = deque(maxlen=context_window) if context_window else None
+    for token in TOKEN_PATTERN.findall(message):
+        if token.strip():
+            sent_chars = prefix_chars
+            if window_starts is not None and len(window_starts) == context_window:
+                sent_chars -= window_starts[0]
+            prefix.calls += 1
+            prefix.prompt_tokens += context_tokens + MESSAGE_OVERHEAD_TOKENS + math.ceil(sent_chars / 4)
+            if window_starts is not None:
+                window_starts.append(prefix_chars)
+        prefix_chars += len(token)
+    prefix.completion_tokens = prefix.calls
+    prefix.wall_time = prefix.calls * request_latency
+    if not capabilities.prefix:
+        prefix.reason = "backend cannot score prefixes"
+    estimates.append(prefix)
+    
+    # Echo: a single request returns logprobs for context and message
+    echo = StrategyEstimate(ScoringStrategy.ECHO, available=capabilities.sequence and not capabilities.local)
+    echo.calls = 1
+    echo.prompt_tokens = context_tokens + message_tokens
+    echo.wall_time = request_latency
+    if capabilities.local:
+        echo.reason = "local backend scores sequences with the local strategy"
+    elif not capabilities.sequence:
+        echo.reason = "model does not support echo"
+    estimates.append(echo)
+    
+    # Regeneration: one request that generates a fresh response
+    regeneration = StrategyEstimate(ScoringStrategy.REGENERATION, available=capabilities.generate)
+    regeneration.calls = 1
+    regeneration.prompt_tokens = context_tokens
+    regeneration.completion_tokens = min(message_tokens + 50, MAX_GENERATION_TOKENS)
+    regeneration.wall_time = request_latency + regeneration.completion_tokens / GENERATION_TOKENS_PER_SECOND
+    if not capabilities.generate:
+        regeneration.reason = "backend cannot generate"
+    estimates.append(regeneration)
+    
+    # Local: one forward pass, no API cost and no rate limits
+    local_installed = all(importlib.util.find_spec(name) for name in ("torch", "transformers"))
+    local = StrategyEstimate(ScoringStrategy.LOCAL,
+                             available=bool(local_model or capabilities.local) and local_installed)
+    local.calls = 1
+    local.wall_time = (context_tokens + message_tokens) / LOCAL_TOKENS_PER_SECOND
+    if not (local_model or capabilities.local):
+        local.reason = "no local model configured"
+    elif not local_installed:
+        local.reason = "torch/transformers not installed"
+    estimates.append(local)
+    
+    for estimate in estimates:
+        estimate.accuracy = STRATEGY_ACCURACY[estimate.strategy]
+        if estimate.strategy != ScoringStrategy.LOCAL and not capabilities.local:
+            estimate.estimated_cost = estimate_cost(model, estimate.prompt_tokens, estimate.completion_tokens)
+            estimate.wall_time = _wall_time(estimate.calls, estimate.prompt_tokens, estimate.wall_time,
+                                            requests_per_minute, tokens_per_minute)
+        if estimate.available and not message and estimate.strategy != ScoringStrategy.REGENERATION:
+            estimate.available = False
+            estimate.reason = "no message to score"
+    
+    # Cheapest (or fastest) strategy that meets the targets
+    candidates = []
+    for estimate in estimates:
+        if not estimate.available:
+            continue
+        if prefer == "latency" and message and estimate.strategy == ScoringStrategy.REGENERATION:
+            # Fast, but scores a fresh response rather than the message
+            continue
+        if max_latency is not None and estimate.wall_time > max_latency:
+            estimate.reason = f"exceeds latency target ({estimate.wall_time:.1f}s > {max_latency:.1f}s)"
+            continue
+        if min_accuracy is not None and estimate.accuracy < min_accuracy:
+            estimate.reason = f"below accuracy target ({estimate.accuracy:.2f} < {min_accuracy:.2f})"
+            continue
+        candidates.append(estimate)
+    if prefer == "latency":
+        chosen = min(candidates, key=lambda e: (e.wall_time, e.estimated_cost), default=None)
+    else:
+        chosen = min(candidates, key=lambda e: (e.estimated_cost, e.wall_time), default=None)
+    
+    return ScoringPlan(
+        model=model,
+        message_tokens=message_tokens,
+        estimates=estimates,
+        chosen=chosen,
+        max_latency=max_latency,
+        min_accuracy=min_accuracy
+    )
+
+
+def print_plan(plan: ScoringPlan):
+    """Print a scoring plan as a table"""
+    print(f"\n{Fore.CYAN}{Style.BRIGHT}SCORING PLAN ({plan.model}, ~{plan.message_tokens} message tokens)")
+    print(f"{'-'*80}")
+    print(f"{'Strategy':<14} {'Calls':>6} {'Prompt tok':>11} {'Cost':>10} {'Time':>9} {'Acc':>5}  Note")
+    for e in plan.estimates:
+        marker = "*" if e is plan.chosen else " "
+        color = Fore.GREEN if e is plan.chosen else (Fore.WHITE if e.available else Fore.RED)
+        print(f"{color}{marker}{e.strategy.value:<13} {e.calls:>6} {e.prompt_tokens:>11} "
+              f"{'$' + format(e.estimated_cost, '.5f'):>10} {e.wall_time:>8.1f}s {e.accuracy:>5.2f}  {e.reason}")
+    if plan.chosen:
+        print(f"\n{Fore.GREEN}Chosen strategy: {plan.chosen.strategy.value}")
+    else:
+        print(f"\n{Fore.RED}No strategy meets the requested latency/accuracy targets")
+
+
+class RateLimiter:
+    """
+    Thread-safe pacing for request and token rate limits.
+    
+    Each acquire() reserves the next free slot under both limits and sleeps
+    until it arrives, so concurrent workers (or several detectors sharing
+    one limiter) never exceed the budget together.
+    """
+    
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._lock = threading.Lock()
+        self._next_request = 0.0
+        self._next_tokens = 0.0
+    
+    def acquire(self, tokens: int = 0):
+        """
+        Block until a request of roughly `tokens` prompt tokens may be sent.
+        """
+        if not self.requests_per_minute and not self.tokens_per_minute:
+            return
+        
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_request)
+            if self.requests_per_minute:
+                self._next_request = slot + 60 / self.requests_per_minute
+            if self.tokens_per_minute and tokens:
+                slot = max(slot, self._next_tokens)
+                self._next_tokens = max(self._next_tokens, now) + tokens / self.tokens_per_minute * 60
+        
+        wait = slot - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+
+def split_into_chunks(message: str, max_tokens: int = 400) -> List[Tuple[int, int]]:
+    """
+    Split a message into paragraph/sentence-aligned chunks.
+    
+    Works on TOKEN_PATTERN pieces so every chunk tokenizes exactly like the
+    same span of the full message. Sentences and paragraphs are packed
+    greedily up to max_tokens word/punctuation tokens; a single sentence
+    longer than that is split hard.
+    
+    Returns:
+        List of (start_piece, end_piece) index ranges covering the message
+    """
+    pieces = TOKEN_PATTERN.findall(message)
+    
+    # Sentence/paragraph units, each ending after the whitespace that follows
+    units = []
+    unit_start = 0
+    for i, piece in enumerate(pieces):
+        ends_sentence = piece.strip() == "" and i > 0 and pieces[i - 1] in (".", "!", "?")
+        if ends_sentence or "\n" in piece:
+            units.append((unit_start, i + 1))
+            unit_start = i + 1
+    if unit_start < len(pieces):
+        units.append((unit_start, len(pieces)))
+    
+    def size(start, end):
+        return sum(1 for p in pieces[start:end] if p.strip())
+    
+    chunks = []
+    chunk_start, chunk_size = 0, 0
+    for start, end in units:
+        unit_size = size(start, end)
+        if chunk_size and chunk_size + unit_size > max_tokens:
+            chunks.append((chunk_start, start))
+            chunk_start, chunk_size = start, 0
+        
+        # Oversized sentence: cut it every max_tokens tokens
+        if unit_size > max_tokens:
+            count = chunk_size
+            for i in range(start, end):
+                if pieces[i].strip():
+                    if count == max_tokens:
+                        chunks.append((chunk_start, i))
+                        chunk_start, count = i, 0
+                    count += 1
+            chunk_size = count
+        else:
+            chunk_size += unit_size
+    if chunk_start < len(pieces):
+        chunks.append((chunk_start, len(pieces)))
+    
+    return chunks
 
 
 class TamperDetector:
@@ -68,29 +739,148 @@ class TamperDetector:
     # Suspicious region detection
     MIN_CLUSTER_SIZE = 2    # Minimum consecutive low-prob tokens to flag
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-3.5-turbo"):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: str = "gpt-3.5-turbo",
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        local_model: Optional[str] = None,
+        context_window: Optional[int] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        base_url: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        backend: Optional[Any] = None,
+        local_threads: Optional[int] = None
+    ):
         """
         Initialize the tamper detector.
         
         Args:
             api_key: OpenAI API key (defaults to OPENAI_API_KEY env var)
             model: OpenAI model to use for analysis
+            requests_per_minute: Request rate limit to plan for and pace to
+            tokens_per_minute: Token rate limit to plan for
+            local_model: Hugging Face model name/path for the local strategy
+            context_window: If set, prefix scoring sends the context plus only
+                    the last K tokens of the prefix, making total prompt
+                    tokens linear rather than quadratic in message length
+            rate_limiter: Shared RateLimiter (e.g. across several detectors);
+                    built from the rate limits above if not given
+            base_url: OpenAI-compatible API endpoint (defaults to OpenAI's)
+            max_connections: Size of the client's HTTP connection pool; the
+                    pool is kept for the detector's lifetime, so a long-lived
+                    detector reuses warm connections across analyses
+            backend: ScoringBackend instance, or the name of one (see
+                    scoring_backends.available_backends) built from the
+                    options above; defaults to the OpenAI backend
+            local_threads: torch intra-op threads for local_model scoring
         """
+        from scoring_backends import ScoringBackend, OpenAIBackend, LocalBackend, load_backend
+        
+        if not (api_key or os.getenv("OPENAI_API_KEY")):
+            load_environment()
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
+        if context_window is not None and context_window < 1:
+            raise ValueError("context_window must be at least 1 token")
+        if not self.api_key and not local_model and backend is None:
             raise ValueError(
                 "OpenAI API key not found. Set OPENAI_API_KEY environment variable "
                 "or pass api_key parameter."
             )
         
-        self.client = OpenAI(api_key=self.api_key)
+        if isinstance(backend, ScoringBackend):
+            model = backend.model
+        elif backend is not None:
+            backend = load_backend(backend, model=model, api_key=self.api_key, base_url=base_url,
+                                   max_connections=max_connections, threads=local_threads)
+        else:
+            backend = OpenAIBackend(model, api_key=self.api_key, base_url=base_url,
+                                    max_connections=max_connections)
+        self.backend = backend
         self.model = model
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.local_model = local_model
+        self.context_window = context_window
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.request_latency = DEFAULT_REQUEST_LATENCY
+        
+        # The local strategy runs on local_model, or on the backend itself if it is local
+        if local_model:
+            self.local_backend = LocalBackend(local_model, threads=local_threads)
+        elif backend.capabilities.local:
+            self.local_backend = backend
+        else:
+            self.local_backend = None
+        
+        # Running total across every analysis made with this detector
+        self.total_usage = UsageStats()
+        
+        self.rate_limiter = rate_limiter or RateLimiter(requests_per_minute, tokens_per_minute)
+        self._members = {}  # model -> TamperDetector for analyze_ensemble
+    
+    @property
+    def client(self):
+        """The API client of the backend (OpenAI backends only)"""
+        return self.backend.client
+    
+    @client.setter
+    def client(self, client):
+        self.backend.client = client
+    
+    def plan(
+        self,
+        context: List[Dict[str, str]],
+        message_to_analyze: str,
+        max_latency: Optional[float] = None,
+        min_accuracy: Optional[float] = None,
+        prefer: str = "cost"
+    ) -> ScoringPlan:
+        """
+        Dry-run: estimate every scoring strategy this detector's backend
+        supports for this message without calling the API, and pick the
+        cheapest (or, with prefer="latency", fastest) one meeting the targets.
+        
+        Args:
+            context: Conversation the message was generated in
+            message_to_analyze: The message text that would be checked
+            max_latency: Optional wall time budget in seconds
+            min_accuracy: Optional minimum STRATEGY_ACCURACY
+            prefer: "cost" or "latency"
+            
+        Returns:
+            ScoringPlan with per-strategy estimates and the chosen strategy
+        """
+        return plan_scoring(
+            self.model,
+            context,
+            message_to_analyze,
+            max_latency=max_latency,
+            min_accuracy=min_accuracy,
+            requests_per_minute=self.rate_limiter.requests_per_minute,
+            tokens_per_minute=self.rate_limiter.tokens_per_minute,
+            local_model=self.local_model,
+            request_latency=self.request_latency,
+            context_window=self.context_window,
+            capabilities=self.backend.capabilities,
+            prefer=prefer
+        )
     
     def analyze(
         self, 
         context: List[Dict[str, str]], 
         message_to_analyze: str,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        strategy: str = "regeneration",
+        max_latency: Optional[float] = None,
+        min_accuracy: Optional[float] = None,
+        resolve: Optional[str] = None,
+        resolve_top_k: int = 20,
+        on_token: Optional[Callable[[TokenAnalysis], None]] = None,
+        on_region: Optional[Callable[[Any], None]] = None,
+        stop_after_regions: Optional[int] = None
     ) -> TamperAnalysis:
         """
         Analyze a message for potential tampering.
@@ -100,77 +890,709 @@ class TamperDetector:
                     [{"role": "user", "content": "..."}, ...]
             message_to_analyze: The message text to check for edits
             temperature: Temperature setting for probability analysis
+            strategy: A ScoringStrategy value, "auto" to let plan() pick the
+                    cheapest strategy, or "fastest" for the quickest one the
+                    backend supports
+            max_latency: Latency target used when strategy is "auto"/"fastest"
+            min_accuracy: Accuracy target used when strategy is "auto"/"fastest"
+            resolve: If set ("auto", "top_k" or "echo"), rescore the tokens the
+                    prefix strategy could not find; see resolve_not_found
+            resolve_top_k: top_logprobs for the "top_k" resolution method
+            on_token: Called with each TokenAnalysis as it is scored (prefix
+                    strategy) or once the whole message is scored (others)
+            on_region: Called with each localization.ChangePointEvent as an
+                    online change-point detector over the token stream
+                    confirms a region ("start") or sees it end ("end")
+            stop_after_regions: Stop prefix scoring as soon as this many
+                    regions are confirmed; the analysis then covers only the
+                    tokens scored so far and has stopped_early set
             
         Returns:
             TamperAnalysis object with detailed results
         """
-        print(f"\n{Fore.CYAN}[TamperCheck] Analyzing message with {self.model}...")
-        print(f"{Fore.CYAN}[TamperCheck] Message length: {len(message_to_analyze)} characters")
+        logger.info("Analyzing message with %s (%d characters)", self.model, len(message_to_analyze),
+                    extra=_event("analyze_start", model=self.model, characters=len(message_to_analyze)))
+        
+        if strategy in ("auto", "fastest"):
+            plan = self.plan(context, message_to_analyze, max_latency, min_accuracy,
+                             prefer="latency" if strategy == "fastest" else "cost")
+            if plan.chosen is None:
+                raise ValueError("No scoring strategy meets the requested latency/accuracy targets")
+            strategy = plan.chosen.strategy
+            logger.info("Planner chose %s (~$%.5f, ~%.1fs)", strategy.value,
+                        plan.chosen.estimated_cost, plan.chosen.wall_time,
+                        extra=_event("plan", strategy=strategy.value, estimated_cost=plan.chosen.estimated_cost,
+                                     wall_time=plan.chosen.wall_time))
+        strategy = ScoringStrategy(strategy)
         
-        # Build the full conversation including the message to analyze
-        messages = context.copy()
-        messages.append({"role": "assistant", "content": message_to_analyze})
+        logger.info("Using %s method for probability analysis", strategy.value,
+                    extra=_event("strategy", strategy=strategy.value))
         
-        # Note: Chat models don't support echo, so we use regeneration method
-        # We'll regenerate the message and compare probabilities
-        print(f"{Fore.YELLOW}[TamperCheck] Using regeneration method for probability analysis")
+        analyzers = {
+            ScoringStrategy.PREFIX: self._analyze_via_prefix,
+            ScoringStrategy.ECHO: self._analyze_via_echo,
+            ScoringStrategy.REGENERATION: self._analyze_via_regeneration,
+            ScoringStrategy.LOCAL: self._analyze_via_local,
+        }
         
-        return self._analyze_via_regeneration(context, message_to_analyze, temperature)
+        change_points = None
+        if on_region or stop_after_regions:
+            from localization import ChangePointDetector
+            change_points = ChangePointDetector()
+        
+        stopped_early = False
+        
+        def watch(token):
+            """on_token plus change-point tracking; True stops prefix scoring"""
+            nonlocal stopped_early
+            if on_token:
+                on_token(token)
+            if change_points is None:
+                return False
+            for event in change_points.update(token):
+                if on_region:
+                    on_region(event)
+            stopped_early = bool(stop_after_regions) and change_points.confirmed >= stop_after_regions
+            return stopped_early
+        
+        started = time.perf_counter()
+        if strategy == ScoringStrategy.PREFIX:
+            analysis = self._analyze_via_prefix(context, message_to_analyze, temperature, on_token=watch)
+        else:
+            analysis = analyzers[strategy](context, message_to_analyze, temperature)
+            if on_token or change_points:
+                for token in analysis.tokens:
+                    watch(token)
+            stopped_early = False  # Already scored in full; nothing to save
+        if change_points is not None:
+            for event in change_points.finish():
+                if on_region:
+                    on_region(event)
+        if resolve and strategy == ScoringStrategy.PREFIX:
+            tokens, usage = self._resolve(context, message_to_analyze, analysis.tokens,
+                                          resolve, resolve_top_k, temperature)
+            analysis = self._build_analysis(message_to_analyze, tokens, analysis.usage.merge(usage))
+        analysis.usage.wall_time = time.perf_counter() - started
+        if change_points is not None:
+            analysis.change_points = change_points.events
+            analysis.stopped_early = stopped_early
+        
+        self.total_usage.merge(analysis.usage)
+        return analysis
     
-    def _analyze_via_regeneration(
+    def analyze_ensemble(
         self,
         context: List[Dict[str, str]],
         message_to_analyze: str,
-        temperature: float
+        models: List[str],
+        fusion: str = "mean",
+        temperature: float = 0.7,
+        resolve: Optional[str] = None
     ) -> TamperAnalysis:
         """
-        Analyze by regenerating and comparing token probabilities.
+        Score a message with several models at once and fuse the evidence.
         
-        This method generates a new response with logprobs and compares
-        the probability distribution to detect unlikely tokens.
+        Every model runs the prefix strategy concurrently, so the latency is
+        that of the slowest model rather than the sum. Prefix positions are
+        the message's own word/punctuation pieces, so the per-model results
+        line up token by token whatever each model's tokenizer.
+        
+        Args:
+            context: List of previous messages in conversation format
+            message_to_analyze: The message text to check for edits
+            models: Models to score with (all through this detector's
+                    API key and endpoint, each with its own rate limiter)
+            fusion: "min", "mean" or "vote" (see FUSION_METHODS)
+            temperature: Temperature setting for probability analysis
+            resolve: Optional NOT_FOUND resolution method, as in analyze()
+            
+        Returns:
+            Fused TamperAnalysis; `ensemble` holds each model's own analysis
+            with its usage and timing
         """
-        print(f"{Fore.CYAN}[TamperCheck] Regenerating message to get token probabilities...")
+        if fusion not in FUSION_METHODS:
+            raise ValueError(f"Unknown fusion method: {fusion} (expected one of {', '.join(FUSION_METHODS)})")
+        if not models:
+            raise ValueError("analyze_ensemble needs at least one model")
         
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=context,
-                max_tokens=len(message_to_analyze.split()) + 50,  # Rough estimate
-                temperature=temperature,
-                logprobs=True,
-                top_logprobs=5
+        members = {model: self._member(model) for model in dict.fromkeys(models)}
+        logger.info("Scoring with %d models concurrently (%s fusion)", len(members), fusion,
+                    extra=_event("ensemble_start", models=list(members), fusion=fusion))
+        
+        def score(model):
+            return members[model].analyze(context, message_to_analyze, temperature=temperature,
+                                          strategy=ScoringStrategy.PREFIX.value, resolve=resolve)
+        
+        started = time.perf_counter()
+        from concurrent.futures import ThreadPoolExecutor
+        analyses = {}
+        with ThreadPoolExecutor(max_workers=len(members)) as pool:
+            futures = {model: pool.submit(score, model) for model in members}
+            for model, future in futures.items():
+                try:
+                    analyses[model] = future.result()
+                except Exception as e:
+                    logger.error("Ensemble member %s failed: %s", model, e,
+                                 extra=_event("ensemble_error", model=model, error=str(e)))
+        if not analyses:
+            raise RuntimeError("Every ensemble model failed")
+        
+        usage = UsageStats()
+        for analysis in analyses.values():
+            usage.merge(analysis.usage)
+        usage.wall_time = time.perf_counter() - started
+        
+        analysis = self._build_analysis(message_to_analyze, self._fuse(list(analyses.values()), fusion), usage)
+        analysis.ensemble = analyses
+        logger.info("Ensemble done in %.1fs (slowest member %.1fs)", usage.wall_time,
+                    max(a.usage.wall_time for a in analyses.values()),
+                    extra=_event("ensemble_done", wall_time=usage.wall_time,
+                                 members={m: a.usage.wall_time for m, a in analyses.items()}))
+        
+        self.total_usage.merge(usage)
+        return analysis
+    
+    def _member(self, model: str) -> "TamperDetector":
+        """Detector for one ensemble model, kept (and its backend's client shared) across calls"""
+        if model not in self._members:
+            self._members[model] = TamperDetector(
+                api_key=self.api_key,
+                requests_per_minute=self.requests_per_minute,
+                tokens_per_minute=self.tokens_per_minute,
+                context_window=self.context_window,
+                backend=self.backend.for_model(model)
             )
-        except Exception as e:
-            print(f"{Fore.RED}[ERROR] Regeneration failed: {e}")
-            raise
+        return self._members[model]
+    
+    def _fuse(self, analyses: List[TamperAnalysis], fusion: str) -> List[TokenAnalysis]:
+        """Combine aligned per-model tokens into one token list"""
+        by_position = [{t.position: t for t in analysis.tokens} for analysis in analyses]
+        fused = []
+        for token in analyses[0].tokens:
+            votes = [tokens[token.position] for tokens in by_position if token.position in tokens]
+            probabilities = sorted(t.probability for t in votes)
+            found = [t.found for t in votes]
+            if fusion == "min":
+                probability, is_found = probabilities[0], all(found)
+            elif fusion == "mean":
+                probability, is_found = sum(probabilities) / len(probabilities), any(found)
+            else:
+                middle = len(probabilities) // 2
+                probability = (probabilities[middle] if len(probabilities) % 2
+                               else (probabilities[middle - 1] + probabilities[middle]) / 2)
+                is_found = sum(found) * 2 > len(found)
+            fused.append(TokenAnalysis(
+                token=token.token,
+                logprob=math.log(probability) if probability > 0 else float('-inf'),
+                probability=probability,
+                probability_pct=probability * 100,
+                level=self._classify(probability),
+                position=token.position,
+                found=is_found,
+                top_alternatives=token.top_alternatives
+            ))
+        return fused
+    
+    def analyze_chunked(
+        self,
+        context: List[Dict[str, str]],
+        message_to_analyze: str,
+        temperature: float = 0.7,
+        strategy: str = "prefix",
+        chunk_tokens: int = 400,
+        overlap_tokens: int = 50,
+        max_workers: int = 4
+    ) -> TamperAnalysis:
+        """
+        Analyze a long message as concurrently scored chunks.
+        
+        The message is split on paragraph/sentence boundaries into chunks of
+        at most chunk_tokens tokens. Each chunk is scored with the preceding
+        overlap_tokens tokens as unscored lead-in context, chunks run on a
+        thread pool (sharing this detector's rate limiter), and the results
+        are stitched into one TamperAnalysis. Positions are global, and
+        suspicious regions are recomputed over the stitched tokens so runs
+        crossing a chunk boundary come out as a single region.
         
-        # Extract token analyses
+        Args:
+            context: List of previous messages in conversation format
+            message_to_analyze: The (long) message text to check for edits
+            temperature: Temperature setting for probability analysis
+            strategy: A ScoringStrategy value (not "auto")
+            chunk_tokens: Maximum word/punctuation tokens per chunk
+            overlap_tokens: Tokens of preceding text given to each chunk
+            max_workers: Number of chunks scored concurrently
+            
+        Returns:
+            TamperAnalysis covering the whole message
+        """
+        strategy = ScoringStrategy(strategy)
+        analyzers = {
+            ScoringStrategy.PREFIX: self._analyze_via_prefix,
+            ScoringStrategy.ECHO: self._analyze_via_echo,
+            ScoringStrategy.REGENERATION: self._analyze_via_regeneration,
+            ScoringStrategy.LOCAL: self._analyze_via_local,
+        }
+        
+        pieces = TOKEN_PATTERN.findall(message_to_analyze)
+        chunks = split_into_chunks(message_to_analyze, chunk_tokens)
+        logger.info("Analyzing %d pieces as %d chunks with %d workers (%s)", len(pieces), len(chunks),
+                    min(max_workers, len(chunks)), strategy.value,
+                    extra=_event("chunked_start", pieces=len(pieces), chunks=len(chunks),
+                                 workers=min(max_workers, len(chunks)), strategy=strategy.value))
+        
+        def score_chunk(chunk):
+            start, end = chunk
+            # Lead-in: the last overlap_tokens tokens before the chunk
+            lead_start, seen = start, 0
+            while lead_start > 0 and seen < overlap_tokens:
+                lead_start -= 1
+                if pieces[lead_start].strip():
+                    seen += 1
+            lead_text = "".join(pieces[lead_start:start])
+            return analyzers[strategy](context, "".join(pieces[start:end]), temperature, lead_text=lead_text)
+        
+        started = time.perf_counter()
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            results = list(pool.map(score_chunk, chunks))
+        
+        # Stitch: prefix positions are piece indices, so offset by the chunk's
+        # first piece; other strategies count model tokens, so offset by the
+        # number of tokens before the chunk
         tokens = []
-        if response.choices[0].logprobs and response.choices[0].logprobs.content:
-            for idx, token_data in enumerate(response.choices[0].logprobs.content):
-                token = token_data.token
-                logprob = token_data.logprob
-                probability = math.exp(logprob)  # Convert log probability to probability
-                probability_pct = probability * 100
-                
-                # Classify probability level
-                if probability >= self.HIGH_THRESHOLD:
-                    level = ProbabilityLevel.HIGH
-                elif probability >= self.LOW_THRESHOLD:
-                    level = ProbabilityLevel.MEDIUM
+        usage = UsageStats()
+        for (start, _), analysis in zip(chunks, results):
+            offset = start if strategy == ScoringStrategy.PREFIX else len(tokens)
+            for token in analysis.tokens:
+                token.position += offset
+                tokens.append(token)
+            usage.merge(analysis.usage)
+        
+        if strategy == ScoringStrategy.REGENERATION:
+            message = "".join(analysis.original_message or "" for analysis in results)
+        else:
+            message = message_to_analyze
+        
+        analysis = self._build_analysis(message, tokens, usage)
+        analysis.usage.wall_time = time.perf_counter() - started
+        
+        self.total_usage.merge(analysis.usage)
+        return analysis
+    
+    def analyze_batch(
+        self,
+        items: List[Tuple[List[Dict[str, str]], str]],
+        temperature: float = 0.7,
+        batch_size: int = 16
+    ) -> List[TamperAnalysis]:
+        """
+        Score many short messages with batched forward passes of the local model.
+        
+        For offline audits of thousands of replies: the (context, message)
+        pairs are sorted by length and run batch_size at a time, so the CPU
+        does a few large matrix multiplications instead of one small pass per
+        message. Results match analyze(..., strategy="local") per message.
+        
+        Args:
+            items: (context, message) pairs
+            temperature: Temperature setting for probability analysis
+            batch_size: Sequences per forward pass
+            
+        Returns:
+            One TamperAnalysis per item, in order. The passes are shared, so
+            the per-item usage is empty; total_usage counts the passes.
+        """
+        if self.local_backend is None:
+            raise ValueError("Batch scoring requires a local_model")
+        
+        usage = UsageStats()
+        started = time.perf_counter()
+        pairs = [(self._format_prompt(context), message) for context, message in items]
+        scores = self.local_backend.score_batch(pairs, 5, temperature, usage, batch_size=batch_size)
+        usage.wall_time = time.perf_counter() - started
+        
+        analyses = []
+        for (_, message), document_scores in zip(items, scores):
+            tokens = [self._token_from_score(score, idx) for idx, score in enumerate(document_scores)]
+            analyses.append(self._build_analysis(message, tokens, UsageStats()))
+        
+        self.total_usage.merge(usage)
+        return analyses
+    
+    def generate(
+        self,
+        context: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 256,
+        top_k: int = 5,
+        seed: Optional[int] = None,
+        stream: bool = False,
+        on_token: Optional[Callable[[Any], None]] = None
+    ) -> GenerationRecord:
+        """
+        Generate a response and record its per-token logprobs.
+        
+        The logprobs come with the generation at no extra cost. A Merkle
+        digest of the text is stored with them. Save the record next to the
+        message, and verify() can later check a presented copy without
+        scoring it token by token.
+        
+        Args:
+            context: Conversation to respond to
+            temperature: Sampling temperature
+            max_tokens: Most tokens to generate
+            top_k: Alternatives recorded per token
+            seed: Seed for reproducible generation, where the backend supports it
+            stream: Stream the response; on_token then sees each token as it arrives
+            on_token: Called with each scoring_backends.TokenScore
+            
+        Returns:
+            GenerationRecord of the response
+        """
+        from generation_digest import build_digest
+        
+        self._require("generate", "generate-and-record")
+        top_k = min(top_k, self.backend.capabilities.max_top_k)
+        
+        usage = UsageStats()
+        started = time.perf_counter()
+        self._throttle(sum(estimate_tokens(m['content']) for m in context))
+        text, scores = self.backend.generate(context, max_tokens, top_k, temperature, usage,
+                                             seed=seed, stream=stream, on_token=on_token)
+        usage.wall_time = time.perf_counter() - started
+        self.total_usage.merge(usage)
+        
+        logger.info("Generated and recorded %d tokens", len(scores),
+                    extra=_event("generate_done", tokens=len(scores), stream=stream, calls=usage.calls))
+        return GenerationRecord(
+            model=self.model,
+            context=list(context),
+            text=text or "",
+            tokens=scores,
+            temperature=temperature,
+            top_k=top_k,
+            usage=usage,
+            digest=build_digest(text or "")
+        )
+    
+    def verify(
+        self,
+        record: GenerationRecord,
+        presented_text: str,
+        method: str = "auto",
+        top_k: int = 5
+    ) -> TamperAnalysis:
+        """
+        Check a presented text against the GenerationRecord of the original.
+        
+        The record's Merkle digest is compared with the presented text's, which
+        finds the changed chunks without reading the rest. Those chunks are
+        then diffed word by word. Unchanged words take their probabilities
+        from the record. Only the edited words, and the first word after each
+        edit, are scored with the model, through the same per-position
+        rescoring as resolve_not_found. An untouched text costs no requests
+        at all.
+        
+        Words after an edit keep the probabilities recorded for the original
+        wording before them; only the word at the seam is rescored.
+        
+        Args:
+            record: GenerationRecord of the message as generated
+            presented_text: The text to check
+            method: How to score edited words: "echo", "top_k" or "auto",
+                    as in resolve_not_found
+            top_k: Alternatives requested per edited word by the top_k method
+            
+        Returns:
+            TamperAnalysis of presented_text. Positions are word/punctuation
+            piece indices, as with the prefix strategy.
+        """
+        if record.model != self.model:
+            raise ValueError(f"The record was generated with {record.model}; "
+                             f"verify it with a detector for that model, not {self.model}")
+        from bisect import bisect_left, bisect_right
+        from generation_digest import build_digest, align
+        
+        started = time.perf_counter()
+        original = TOKEN_PATTERN.findall(record.text)
+        presented = TOKEN_PATTERN.findall(presented_text)
+        opcodes, diff = align(record.digest or build_digest(record.text), record.text, presented_text)
+        
+        # Each record token belongs to the original word piece holding its first
+        # non-space character, so a token spanning several pieces (" don't") is
+        # counted once; the pieces it runs on into get probability 1.
+        starts = []
+        indices = []
+        offset = 0
+        for index, piece in enumerate(original):
+            if piece.strip():
+                starts.append(offset)
+                indices.append(index)
+            offset += len(piece)
+        owned = {}
+        for score in record.tokens:
+            if score.token.strip():
+                k = bisect_right(starts, score.offset + len(score.token) - len(score.token.lstrip())) - 1
+            else:
+                k = bisect_left(starts, score.offset)  # Whitespace goes with the word after it
+            if 0 <= k < len(starts):
+                owned.setdefault(indices[k], []).append(score)
+        
+        tokens = []
+        edited = []
+        pending_space = ""
+        seam = False
+        for tag, i1, i2, j1, j2 in opcodes:
+            for j in range(j1, j2):
+                piece = presented[j]
+                if not piece.strip():
+                    pending_space += piece
+                    continue
+                scores = owned.get(i1 + j - j1, []) if tag == "equal" and not seam else None
+                seam = False
+                if scores is not None:
+                    logprob = sum((score.logprob for score in scores), 0.0)
+                    probability = math.exp(logprob)
+                    found, top_alternatives = True, scores[0].top_alternatives if scores else []
                 else:
-                    level = ProbabilityLevel.LOW
-                
+                    edited.append(len(tokens))
+                    logprob, probability, found, top_alternatives = float('-inf'), 0.0, False, []
                 tokens.append(TokenAnalysis(
-                    token=token,
+                    token=pending_space + piece,
                     logprob=logprob,
                     probability=probability,
-                    probability_pct=probability_pct,
-                    level=level,
-                    position=idx
+                    probability_pct=probability * 100,
+                    level=self._classify(probability),
+                    position=j,
+                    found=found,
+                    top_alternatives=top_alternatives
                 ))
+                pending_space = ""
+            seam = tag != "equal"
+        
+        usage = UsageStats()
+        if edited:
+            tokens, usage = self._resolve(record.context, presented_text, tokens, method, top_k,
+                                          record.temperature, positions=edited)
+        usage.wall_time = time.perf_counter() - started
+        self.total_usage.merge(usage)
+        
+        logger.info("Verified against the generation record: %d changed chunks, %d of %d tokens rescored "
+                    "with %d requests", diff.changed_chunks, len(edited), len(tokens), usage.calls,
+                    extra=_event("verify_done", tokens=len(tokens), changed_chunks=diff.changed_chunks,
+                                 comparisons=diff.comparisons, rescored=len(edited), calls=usage.calls))
+        return self._build_analysis(presented_text, tokens, usage)
+    
+    def resolve_not_found(
+        self,
+        context: List[Dict[str, str]],
+        message_to_analyze: str,
+        analysis: TamperAnalysis,
+        method: str = "auto",
+        top_k: int = 20,
+        temperature: float = 0.7,
+        lead_text: str = ""
+    ) -> TamperAnalysis:
+        """
+        Rescore only the NOT_FOUND tokens of a prefix analysis.
+        
+        The first pass asks for the top 5 alternatives, which is enough for
+        most tokens; the ones it could not find get a second, more expensive
+        request each, so the added cost is proportional to the number of
+        unresolved positions rather than to the message length.
+        
+        Args:
+            context: The context the analysis was made with
+            message_to_analyze: The analyzed message
+            analysis: Result of the prefix strategy (positions are piece indices)
+            method: "top_k" repeats the prefix request with top_logprobs=top_k;
+                    "echo" forces the token with an echo=True completions
+                    request and reads its exact logprob (completions models
+                    only); "auto" uses echo when the model supports it
+            top_k: Alternatives requested by the top_k method (API maximum 20)
+            temperature: Temperature setting for probability analysis
+            lead_text: Unscored text that preceded the message, as in analyze_chunked
+            
+        Returns:
+            New TamperAnalysis with the resolved tokens replaced and the extra
+            requests added to its usage
+        """
+        started = time.perf_counter()
+        tokens, usage = self._resolve(context, message_to_analyze, analysis.tokens,
+                                      method, top_k, temperature, lead_text)
+        usage.wall_time = time.perf_counter() - started
+        self.total_usage.merge(usage)
+        
+        combined = UsageStats().merge(analysis.usage).merge(usage)
+        return self._build_analysis(analysis.original_message, tokens, combined)
+    
+    def _resolve(
+        self,
+        context: List[Dict[str, str]],
+        message: str,
+        tokens: List[TokenAnalysis],
+        method: str,
+        top_k: int,
+        temperature: float,
+        lead_text: str = "",
+        positions: Optional[List[int]] = None
+    ) -> Tuple[List[TokenAnalysis], UsageStats]:
+        """
+        Second pass behind resolve_not_found and verify: rescore the tokens at
+        the given list indices (default: the NOT_FOUND ones). Returns
+        (tokens, usage of the new requests).
+        """
+        capabilities = self.backend.capabilities
+        if method == "auto":
+            method = "echo" if capabilities.sequence else "top_k"
+        if method not in ("top_k", "echo"):
+            raise ValueError(f"Unknown resolution method: {method}")
+        if not 1 <= top_k <= 20:
+            raise ValueError("top_k must be between 1 and 20")
+        self._require("sequence" if method == "echo" else "prefix", f"{method} resolution")
+        top_k = min(top_k, capabilities.max_top_k)
+        
+        unresolved = positions if positions is not None else [i for i, t in enumerate(tokens) if not t.found]
+        logger.info("Rescoring %d tokens (%s)", len(unresolved), method,
+                    extra=_event("resolve_start", tokens=len(unresolved), method=method))
+        
+        usage = UsageStats()
+        tokens = list(tokens)
+        for i in unresolved:
+            token = tokens[i]
+            prefix_text = self._prefix_text(message, token.position, lead_text)
+            
+            self._throttle(estimate_tokens(prefix_text))
+            if method == "echo":
+                # Score the token as a forced continuation of the prefix
+                scores = self.backend.score_sequence(self._format_prompt(context) + prefix_text.rstrip(),
+                                                     token.token, 1, temperature, usage)
+                found, probability = True, math.exp(sum(score.logprob for score in scores))
+                top_alternatives = token.top_alternatives
+            else:
+                top_alternatives = self.backend.next_token(context, prefix_text, top_k, temperature, usage)
+                found, probability = self._match_token(token.token, top_alternatives)
+            
+            tokens[i] = TokenAnalysis(
+                token=token.token,
+                logprob=math.log(probability) if probability > 0 else float('-inf'),
+                probability=probability,
+                probability_pct=probability * 100,
+                level=self._classify(probability),
+                position=token.position,
+                found=found,
+                top_alternatives=top_alternatives
+            )
+        
+        resolved = sum(1 for i in unresolved if tokens[i].found)
+        logger.info("Resolved %d of %d tokens with %d extra requests", resolved, len(unresolved),
+                    usage.calls, extra=_event("resolve_done", resolved=resolved, unresolved=len(unresolved),
+                                              calls=usage.calls, cost=usage.estimated_cost))
+        return tokens, usage
+    
+    @classmethod
+    def classify_status(cls, found: bool, probability_pct: float) -> str:
+        """
+        Status label for a token the per-token scripts scored themselves,
+        with the same boundaries as _classify (a token at a threshold gets
+        the higher level).
+        
+        Args:
+            found: Whether the token was among the model's top alternatives
+            probability_pct: The token's probability in percent
+            
+        Returns:
+            "HIGH", "MEDIUM", "LOW" or "NOT_FOUND"
+        """
+        if not found:
+            return "NOT_FOUND"
+        if probability_pct >= cls.HIGH_THRESHOLD * 100:
+            return "HIGH"
+        if probability_pct >= cls.LOW_THRESHOLD * 100:
+            return "MEDIUM"
+        return "LOW"
+    
+    def _classify(self, probability: float) -> ProbabilityLevel:
+        """Map a probability (0-1) to a ProbabilityLevel"""
+        if probability >= self.HIGH_THRESHOLD:
+            return ProbabilityLevel.HIGH
+        elif probability >= self.LOW_THRESHOLD:
+            return ProbabilityLevel.MEDIUM
+        return ProbabilityLevel.LOW
+    
+    def _throttle(self, tokens: int = 0):
+        """Wait for the rate limiter before sending a request of ~tokens prompt tokens"""
+        if not self.backend.capabilities.local:
+            self.rate_limiter.acquire(tokens)
+    
+    def _require(self, capability: str, strategy: str):
+        """Raise ValueError if the backend lacks a capability the strategy needs"""
+        if not getattr(self.backend.capabilities, capability):
+            raise ValueError(f"The {strategy} strategy needs {capability} scoring, "
+                             f"which the {self.backend.name} backend for {self.model} does not support")
+    
+    @staticmethod
+    def _format_prompt(context: List[Dict[str, str]]) -> str:
+        """Flatten a chat context into a plain completions prompt"""
+        return "".join(m['content'] + "\n\n" for m in context)
+    
+    def _token_from_score(self, score, position: int) -> TokenAnalysis:
+        """TokenAnalysis of a backend TokenScore"""
+        probability = math.exp(score.logprob)
+        return TokenAnalysis(
+            token=score.token,
+            logprob=score.logprob,
+            probability=probability,
+            probability_pct=probability * 100,
+            level=self._classify(probability),
+            position=position,
+            top_alternatives=score.top_alternatives
+        )
+    
+    @staticmethod
+    def _match_token(piece: str, top_alternatives: List[Dict[str, float]]) -> Tuple[bool, float]:
+        """
+        Look a token up among the top alternatives.
         
-        # Calculate statistics
+        Same loose matching as the analysis scripts: exact or substring.
+        
+        Returns:
+            (found, probability 0-1); probability is 0 when not found
+        """
+        our_token_clean = piece.strip().lower()
+        for alt in top_alternatives:
+            alt_clean = alt['token'].lower()
+            if our_token_clean == alt_clean or our_token_clean in alt_clean or alt_clean in our_token_clean:
+                return True, alt['probability'] / 100
+        return False, 0.0
+    
+    def _prefix_text(self, message: str, position: int, lead_text: str = "") -> str:
+        """
+        The prefix _analyze_via_prefix sends for the token at a piece
+        position, including the context_window cut
+        """
+        pieces = TOKEN_PATTERN.findall(lead_text) + TOKEN_PATTERN.findall(message)[:position]
+        current_text = "".join(pieces)
+        if not self.context_window:
+            return current_text
+        starts = []
+        offset = 0
+        for piece in pieces:
+            if piece.strip():
+                starts.append(offset)
+            offset += len(piece)
+        if len(starts) < self.context_window:
+            return current_text
+        return current_text[starts[-self.context_window]:]
+    
+    def _build_analysis(
+        self,
+        message: str,
+        tokens: List[TokenAnalysis],
+        usage: UsageStats
+    ) -> TamperAnalysis:
+        """Summarize token analyses into a TamperAnalysis"""
         high_count = sum(1 for t in tokens if t.level == ProbabilityLevel.HIGH)
         medium_count = sum(1 for t in tokens if t.level == ProbabilityLevel.MEDIUM)
         low_count = sum(1 for t in tokens if t.level == ProbabilityLevel.LOW)
@@ -179,21 +1601,196 @@ class TamperDetector:
         # Detect suspicious regions (clusters of low-probability tokens)
         suspicious_regions = self._find_suspicious_regions(tokens)
         
-        generated_text = response.choices[0].message.content
-        
-        print(f"{Fore.GREEN}[TamperCheck] Analysis complete!")
-        print(f"{Fore.CYAN}[TamperCheck] Analyzed {len(tokens)} tokens")
+        logger.info("Analysis complete: %d tokens, %d low, %d suspicious regions",
+                    len(tokens), low_count, len(suspicious_regions),
+                    extra=_event("analyze_done", tokens=len(tokens), low=low_count,
+                                 regions=len(suspicious_regions), calls=usage.calls))
         
         return TamperAnalysis(
-            original_message=generated_text,
+            original_message=message,
             tokens=tokens,
             high_prob_count=high_count,
             medium_prob_count=medium_count,
             low_prob_count=low_count,
             avg_probability=avg_prob,
-            suspicious_regions=suspicious_regions
+            suspicious_regions=suspicious_regions,
+            usage=usage
         )
     
+    def _analyze_via_prefix(
+        self,
+        context: List[Dict[str, str]],
+        message_to_analyze: str,
+        temperature: float,
+        lead_text: str = "",
+        on_token: Optional[Callable[[TokenAnalysis], Optional[bool]]] = None
+    ) -> TamperAnalysis:
+        """
+        Analyze by asking for the next token after every prefix of the message.
+        
+        For each word/punctuation token we send the context plus the text so
+        far as a partial assistant message and check whether the actual token
+        is among the model's top 5 predictions. Costs one request per token.
+        
+        With context_window=K only the last K tokens of the prefix are sent,
+        so each request is bounded instead of growing with the position.
+        lead_text is already-written text preceding the message; it is sent
+        as part of the prefix but not scored. on_token receives each token
+        as soon as it is scored; if it returns True, scoring stops there.
+        """
+        self._require("prefix", ScoringStrategy.PREFIX.value)
+        top_k = min(5, self.backend.capabilities.max_top_k)
+        
+        pieces = TOKEN_PATTERN.findall(message_to_analyze)
+        word_count = sum(1 for p in pieces if p.strip())
+        logger.info("Scoring %d tokens one prefix at a time", word_count,
+                    extra=_event("prefix_start", tokens=word_count))
+        # Checked once so the per-token loop does no logging work when quiet
+        trace = logger.isEnabledFor(logging.DEBUG)
+        
+        usage = UsageStats()
+        tokens = []
+        current_text = ""
+        pending_space = ""
+        
+        # Offsets in current_text where each of the last K tokens starts
+        window_starts = deque(maxlen=self.context_window) if self.context_window else None
+        
+        for piece in TOKEN_PATTERN.findall(lead_text):
+            if window_starts is not None and piece.strip():
+                window_starts.append(len(current_text))
+            current_text += piece
+        
+        for i, piece in enumerate(pieces):
+            # Whitespace is carried into the prefix and the next token's text
+            if piece.strip() == "":
+                current_text += piece
+                pending_space += piece
+                continue
+            
+            prefix_text = current_text
+            if window_starts is not None and len(window_starts) == self.context_window:
+                prefix_text = current_text[window_starts[0]:]
+            
+            self._throttle(estimate_tokens(prefix_text))
+            top_alternatives = self.backend.next_token(context, prefix_text, top_k, temperature, usage)
+            found, probability = self._match_token(piece, top_alternatives)
+            
+            level = self._classify(probability)
+            tokens.append(TokenAnalysis(
+                token=pending_space + piece,
+                logprob=math.log(probability) if probability > 0 else float('-inf'),
+                probability=probability,
+                probability_pct=probability * 100,
+                level=level,
+                position=i,
+                found=found,
+                top_alternatives=top_alternatives
+            ))
+            if on_token and on_token(tokens[-1]):
+                break
+            
+            if trace:
+                top_pref = top_alternatives[0]['token'] if top_alternatives else "N/A"
+                top_prob = top_alternatives[0]['probability'] if top_alternatives else 0
+                status = f"{probability * 100:.1f}%" if found else f"NOT IN TOP {top_k}"
+                logger.debug("%-5d %-25s %-12s %s (%.1f%%)", i, piece[:25], status, top_pref, top_prob,
+                             extra=_event("token", position=i, token=piece, found=found,
+                                          probability=probability * 100, top=top_pref))
+            
+            if window_starts is not None:
+                window_starts.append(len(current_text))
+            current_text += piece
+            pending_space = ""
+        
+        return self._build_analysis(message_to_analyze, tokens, usage)
+    
+    def _analyze_via_echo(
+        self,
+        context: List[Dict[str, str]],
+        message_to_analyze: str,
+        temperature: float,
+        lead_text: str = ""
+    ) -> TamperAnalysis:
+        """
+        Analyze by scoring the whole message in one backend request.
+        
+        With the OpenAI backend this is a completions request with echo=True,
+        which returns the exact logprob of every prompt token; only
+        completions models (and most OpenAI-compatible servers) support it.
+        """
+        self._require("sequence", ScoringStrategy.ECHO.value)
+        logger.info("Scoring message in one echo request", extra=_event("echo_start"))
+        
+        prompt = self._format_prompt(context) + lead_text
+        usage = UsageStats()
+        
+        self._throttle(estimate_tokens(prompt + message_to_analyze))
+        scores = self.backend.score_sequence(prompt, message_to_analyze, min(5, self.backend.capabilities.max_top_k),
+                                             temperature, usage)
+        tokens = [self._token_from_score(score, idx) for idx, score in enumerate(scores)]
+        
+        return self._build_analysis(message_to_analyze, tokens, usage)
+    
+    def _analyze_via_local(
+        self,
+        context: List[Dict[str, str]],
+        message_to_analyze: str,
+        temperature: float,
+        lead_text: str = ""
+    ) -> TamperAnalysis:
+        """
+        Analyze with one forward pass through a local causal language model.
+        
+        Needs `local_model` (or a local backend) plus the optional
+        torch/transformers packages. No API calls are made, so the usage
+        block only counts the pass.
+        """
+        if self.local_backend is None:
+            raise ValueError("Local strategy requires a local_model")
+        
+        usage = UsageStats()
+        scores = self.local_backend.score_sequence(self._format_prompt(context) + lead_text, message_to_analyze,
+                                                   5, temperature, usage)
+        tokens = [self._token_from_score(score, idx) for idx, score in enumerate(scores)]
+        
+        return self._build_analysis(message_to_analyze, tokens, usage)
+    
+    def _analyze_via_regeneration(
+        self,
+        context: List[Dict[str, str]],
+        message_to_analyze: str,
+        temperature: float,
+        lead_text: str = ""
+    ) -> TamperAnalysis:
+        """
+        Analyze by regenerating and comparing token probabilities.
+        
+        This method generates a new response with logprobs and compares
+        the probability distribution to detect unlikely tokens.
+        """
+        self._require("generate", ScoringStrategy.REGENERATION.value)
+        logger.info("Regenerating message to get token probabilities", extra=_event("regeneration_start"))
+        
+        usage = UsageStats()
+        messages = context + [{"role": "assistant", "content": lead_text}] if lead_text else context
+        try:
+            self._throttle(sum(estimate_tokens(m['content']) for m in messages))
+            generated_text, scores = self.backend.generate(
+                messages,
+                min(estimate_tokens(message_to_analyze) + 50, MAX_GENERATION_TOKENS),
+                min(5, self.backend.capabilities.max_top_k),
+                temperature,
+                usage
+            )
+        except Exception as e:
+            logger.error("Regeneration failed: %s", e, extra=_event("regeneration_error", error=str(e)))
+            raise
+        
+        tokens = [self._token_from_score(score, idx) for idx, score in enumerate(scores)]
+        
+        return self._build_analysis(generated_text, tokens, usage)
+    
     def _find_suspicious_regions(self, tokens: List[TokenAnalysis]) -> List[tuple]:
         """
         Find clusters of low-probability tokens that might indicate edits.
@@ -203,22 +1800,24 @@ class TamperDetector:
         """
         regions = []
         current_start = None
+        current_end = None
         low_count = 0
         
         for token in tokens:
             if token.level == ProbabilityLevel.LOW:
                 if current_start is None:
                     current_start = token.position
+                current_end = token.position
                 low_count += 1
             else:
                 if current_start is not None and low_count >= self.MIN_CLUSTER_SIZE:
-                    regions.append((current_start, token.position - 1))
+                    regions.append((current_start, current_end))
                 current_start = None
                 low_count = 0
         
         # Handle case where low-prob tokens extend to end
         if current_start is not None and low_count >= self.MIN_CLUSTER_SIZE:
-            regions.append((current_start, tokens[-1].position))
+            regions.append((current_start, current_end))
         
         return regions
     
@@ -251,6 +1850,14 @@ class TamperDetector:
         else:
             print(f"\n{Fore.GREEN}{Style.BRIGHT}✓ No suspicious regions detected")
         
+        # Usage and cost
+        print(f"\n{Fore.WHITE}{Style.BRIGHT}Usage:")
+        self.print_usage(analysis.usage)
+        for model, member in analysis.ensemble.items():
+            print(f"  {model}: {member.usage.wall_time:.2f}s, {member.usage.calls} calls, "
+                  f"${member.usage.estimated_cost:.6f}, avg {member.avg_probability*100:.2f}%, "
+                  f"{member.low_prob_count} low")
+        
         # Token-by-token breakdown
         print(f"\n{Fore.WHITE}{Style.BRIGHT}Token Analysis:")
         print(f"{'-'*80}")
@@ -285,11 +1892,90 @@ class TamperDetector:
                 print(f"{color}{token.position:<5} {token_display:<20} {token.probability_pct:>10.2f}% {token.level.value:<10}")
         
         print(f"\n{'='*80}\n")
+    
+    def print_usage(self, usage: UsageStats):
+        """
+        Print request, token and cost accounting.
+        
+        Args:
+            usage: UsageStats for a single analysis or a whole run
+        """
+        print(f"  API calls: {usage.calls}")
+        print(f"  Prompt tokens: {usage.prompt_tokens} ({usage.cached_tokens} cached)")
+        print(f"  Completion tokens: {usage.completion_tokens}")
+        print(f"  Estimated cost: ${usage.estimated_cost:.6f}")
+        print(f"  Wall time: {usage.wall_time:.2f}s (network: {usage.network_time:.2f}s)")
 
 
 def main():
     """Example usage of TamperCheck"""
     
+    # Terminal colours and .env are CLI concerns, not import-time side effects
+    try:
+        from colorama import init as colorama_init
+        colorama_init(autoreset=True)
+    except ImportError:
+        pass
+    load_environment()
+    
+    parser = argparse.ArgumentParser(description="TamperCheck - LLM Output Tamper Detection Tool")
+    parser.add_argument("--model", default="gpt-3.5-turbo", help="Model to score with")
+    parser.add_argument("--base-url", help="OpenAI-compatible API endpoint (e.g. fake_model_server.py)")
+    parser.add_argument("--backend", help="Scoring backend: openai, openai-compatible, local or an installed plugin")
+    parser.add_argument("--prompt", help="User prompt the message was generated for")
+    parser.add_argument("--message", default="", help="Message text to check for edits")
+    parser.add_argument("--file", help="Read the message to check from a file")
+    parser.add_argument("--strategy", default="auto",
+                        choices=["auto", "fastest"] + [s.value for s in ScoringStrategy],
+                        help="Scoring strategy (default: cheapest that meets the targets)")
+    parser.add_argument("--max-latency", type=float, help="Wall time budget in seconds")
+    parser.add_argument("--min-accuracy", type=float, help="Minimum strategy accuracy (0-1)")
+    parser.add_argument("--rpm", type=int, help="Requests-per-minute rate limit")
+    parser.add_argument("--tpm", type=int, help="Tokens-per-minute rate limit")
+    parser.add_argument("--local-model", help="Local model name/path for the local strategy")
+    parser.add_argument("--context-window", type=int,
+                        help="Prefix scoring sends only the last K tokens of the prefix")
+    parser.add_argument("--chunk-tokens", type=int,
+                        help="Score long messages as concurrent chunks of this many tokens")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent chunks when --chunk-tokens is set")
+    parser.add_argument("--resolve", choices=["auto", "top_k", "echo"],
+                        help="Rescore NOT_FOUND prefix tokens with a second, targeted pass")
+    parser.add_argument("--resolve-top-k", type=int, default=20, help="top_logprobs for --resolve top_k")
+    parser.add_argument("--ensemble", help="Comma-separated models to score with concurrently and fuse")
+    parser.add_argument("--fusion", default="mean", choices=FUSION_METHODS,
+                        help="How --ensemble combines per-model token probabilities")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="Progress logging level (DEBUG logs every scored token)")
+    parser.add_argument("--log-json", action="store_true", help="Write progress logs as JSON lines")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Print the cost/latency plan and exit without calling the API")
+    args = parser.parse_args()
+    configure_logging(args.log_level, json_lines=args.log_json)
+    
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            args.message = f.read()
+    context = [{"role": "user", "content": args.prompt}] if args.prompt else []
+    
+    if args.dry_run:
+        capabilities = None
+        if args.backend:
+            from scoring_backends import load_backend
+            capabilities = load_backend(args.backend, model=args.model, base_url=args.base_url).capabilities
+        plan = plan_scoring(
+            args.model, context, args.message,
+            max_latency=args.max_latency,
+            min_accuracy=args.min_accuracy,
+            requests_per_minute=args.rpm,
+            tokens_per_minute=args.tpm,
+            local_model=args.local_model,
+            context_window=args.context_window,
+            capabilities=capabilities,
+            prefer="latency" if args.strategy == "fastest" else "cost"
+        )
+        print_plan(plan)
+        return
+    
     print(f"{Fore.CYAN}{Style.BRIGHT}")
     print("╔════════════════════════════════════════════════════════════════╗")
     print("║                        TAMPERCHECK                             ║")
@@ -298,18 +1984,70 @@ def main():
     print(Style.RESET_ALL)
     
     # Check for API key
-    if not os.getenv("OPENAI_API_KEY"):
+    if not os.getenv("OPENAI_API_KEY") and args.backend in (None, "openai"):
         print(f"{Fore.RED}Error: OPENAI_API_KEY not found in environment variables.")
         print(f"{Fore.YELLOW}Please create a .env file with your API key or set the environment variable.")
         return
     
     # Initialize detector
     try:
-        detector = TamperDetector(model="gpt-3.5-turbo")
+        detector = TamperDetector(
+            model=args.model,
+            requests_per_minute=args.rpm,
+            tokens_per_minute=args.tpm,
+            local_model=args.local_model,
+            context_window=args.context_window,
+            base_url=args.base_url,
+            backend=args.backend
+        )
     except ValueError as e:
         print(f"{Fore.RED}Error: {e}")
         return
     
+    # Analyze the caller's own message
+    if args.prompt:
+        try:
+            if args.ensemble:
+                result = detector.analyze_ensemble(
+                    context, args.message,
+                    models=[m.strip() for m in args.ensemble.split(",") if m.strip()],
+                    fusion=args.fusion,
+                    resolve=args.resolve
+                )
+                detector.print_results(result, show_all_tokens=True)
+                return
+            if args.chunk_tokens:
+                strategy = args.strategy
+                if strategy in ("auto", "fastest"):
+                    plan = detector.plan(context, args.message, args.max_latency, args.min_accuracy,
+                                         prefer="latency" if strategy == "fastest" else "cost")
+                    if plan.chosen is None:
+                        raise ValueError("No scoring strategy meets the requested latency/accuracy targets")
+                    strategy = plan.chosen.strategy.value
+                result = detector.analyze_chunked(
+                    context, args.message,
+                    strategy=strategy,
+                    chunk_tokens=args.chunk_tokens,
+                    max_workers=args.workers
+                )
+                if args.resolve and strategy == ScoringStrategy.PREFIX.value:
+                    result = detector.resolve_not_found(context, args.message, result,
+                                                        method=args.resolve, top_k=args.resolve_top_k)
+                detector.print_results(result, show_all_tokens=True)
+                return
+            result = detector.analyze(
+                context, args.message,
+                strategy=args.strategy,
+                max_latency=args.max_latency,
+                min_accuracy=args.min_accuracy,
+                resolve=args.resolve,
+                resolve_top_k=args.resolve_top_k
+            )
+            detector.print_results(result, show_all_tokens=True)
+        except Exception as e:
+            print(f"{Fore.RED}Error during analysis: {e}")
+        return
+    
     # Example 1: Simple story generation
     print(f"\n{Fore.CYAN}{Style.BRIGHT}Example 1: Analyzing a simple story{Style.RESET_ALL}")
     print(f"{Fore.WHITE}This will generate a story and show the probability distribution.")
@@ -338,6 +2076,9 @@ def main():
     except Exception as e:
         print(f"{Fore.RED}Error during analysis: {e}")
     
+    print(f"\n{Fore.WHITE}{Style.BRIGHT}Run usage ({detector.model}):")
+    detector.print_usage(detector.total_usage)
+    
     print(f"\n{Fore.GREEN}{Style.BRIGHT}Analysis complete!")
     print(f"{Fore.CYAN}To analyze your own text, modify the context and message in the code.")
 
@@ -0,0 +1,558 @@
+#!/usr/bin/env python3
+"""
+TamperCheck Analysis Service
+Long-running HTTP service, so callers don't pay for a Python process per check
+
+One process keeps the openai import, the HTTP connection pool, the rate
+limiter and a response cache warm across requests:
+
+    POST /analyze          {"prompt" | "context", "message", "strategy"?, "temperature"?, "resolve"?,
+                            "stop_after_regions"?}
+                           -> the analysis as JSON (TamperAnalysis.to_dict)
+    POST /analyze/stream   same body -> NDJSON, one {"event": "token"} line per
+                           scored token, {"event": "region"} lines as edit
+                           regions start and end, then {"event": "done"} with
+                           the summary
+    GET  /health           queue depth, cache and usage counters
+    POST /jobs             same body plus "priority"? -> 202 {"id"}; queued in a
+                           job_queue.py database (--jobs) for background workers
+    GET  /jobs/<id>        the job's status, and its analysis once done
+
+Analyses run on a fixed pool of worker threads fed by a bounded queue. When
+the queue is full new requests are refused with 429 and a Retry-After header
+instead of piling up; identical requests share one analysis, and finished
+analyses are answered from an LRU cache.
+
+Usage:
+    python tampercheck_service.py --port 8080 --workers 8 --queue 64 --rpm 500
+    curl -s localhost:8080/analyze -d '{"prompt": "Write a haiku", "message": "..."}'
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import functools
+import hashlib
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from tampercheck import (
+    TamperDetector, RateLimiter, ScoringStrategy, UsageStats,
+    configure_logging, load_environment, _event
+)
+from job_queue import JobQueue, PRIORITY_CLASSES
+
+logger = logging.getLogger("tampercheck.service")
+
+# Largest request body accepted, in bytes
+MAX_BODY = 1 << 20
+
+
+class HTTPError(Exception):
+    """An error answered with an HTTP status and a JSON {"error": ...} body"""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class ResponseCache:
+    """LRU cache of finished analyses keyed by the normalized request"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def to_dict(self):
+        return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                'hits': self.hits, 'misses': self.misses}
+
+
+def parse_request(body):
+    """
+    Validate an /analyze body.
+
+    Returns:
+        Normalized {'context', 'message', 'strategy', 'temperature', 'resolve', 'stop_after_regions'}
+    """
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be JSON")
+    if not isinstance(data, dict):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+
+    message = data.get('message')
+    if not isinstance(message, str) or not message.strip():
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "'message' is required")
+
+    context = data.get('context')
+    if context is None:
+        context = [{"role": "user", "content": data['prompt']}] if data.get('prompt') else []
+    if not isinstance(context, list) or not all(isinstance(m, dict) and 'content' in m for m in context):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "'context' must be a list of {role, content} messages")
+
+    strategy = data.get('strategy', ScoringStrategy.PREFIX.value)
+    if strategy != "auto" and strategy not in {s.value for s in ScoringStrategy}:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"Unknown strategy: {strategy}")
+
+    resolve = data.get('resolve')
+    if resolve not in (None, "auto", "top_k", "echo"):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"Unknown resolution method: {resolve}")
+
+    try:
+        temperature = float(data.get('temperature', 0.7))
+    except (TypeError, ValueError):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "'temperature' must be a number")
+
+    stop_after_regions = data.get('stop_after_regions')
+    if stop_after_regions is not None and (not isinstance(stop_after_regions, int) or stop_after_regions < 1):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "'stop_after_regions' must be a positive integer")
+
+    return {
+        'context': [{'role': m.get('role', 'user'), 'content': m['content']} for m in context],
+        'message': message,
+        'strategy': strategy,
+        'temperature': temperature,
+        'resolve': resolve,
+        'stop_after_regions': stop_after_regions,
+    }
+
+
+def request_key(model, request):
+    """Cache key: hash of the model and the normalized request"""
+    canonical = json.dumps([model, request], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class AnalysisService:
+    """
+    Queue, worker pool and cache in front of warm TamperDetectors.
+
+    Every worker thread gets its own TamperDetector (so usage accounting
+    never races) but they all share one OpenAI client - and with it one
+    HTTP connection pool - one RateLimiter and, with local_model, one
+    loaded model.
+    """
+
+    def __init__(self, workers=4, queue_size=32, cache_size=1024, jobs=None, **detector_options):
+        self.workers = workers
+        self.jobs = jobs  # Optional JobQueue behind /jobs
+        self.queue_size = queue_size
+        self.cache = ResponseCache(cache_size)
+        self.usage = UsageStats()
+        self.counters = {'accepted': 0, 'rejected': 0, 'completed': 0, 'failed': 0, 'coalesced': 0}
+
+        detector_options.setdefault('max_connections', workers)
+        self._options = detector_options
+        self._primary = TamperDetector(**detector_options)
+        self._options['rate_limiter'] = self._primary.rate_limiter
+        self._options['backend'] = self._primary.backend
+        self._local = threading.local()
+        self._inflight = {}
+        self._queue = None
+        self._tasks = []
+        self._executor = None
+
+    @property
+    def model(self):
+        return self._primary.model
+
+    def warm_up(self):
+        """Import openai and build the shared client before the first request"""
+        if not (self._primary.local_model or self._primary.backend.capabilities.local):
+            self._primary.client
+
+    def _detector(self):
+        """This worker thread's detector, sharing the primary's backend, client and local model"""
+        if not hasattr(self._local, 'detector'):
+            detector = TamperDetector(**self._options)
+            # Loaded lazily, so replacing it here means one copy of the model in memory
+            detector.local_backend = self._primary.local_backend
+            self._local.detector = detector
+        return self._local.detector
+
+    def _run(self, request, on_token):
+        """Worker thread: one analysis"""
+        return self._detector().analyze(
+            request['context'], request['message'],
+            temperature=request['temperature'],
+            strategy=request['strategy'],
+            resolve=request['resolve'],
+            stop_after_regions=request['stop_after_regions'],
+            on_token=on_token
+        )
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tampercheck")
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.warm_up)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown(wait=False)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            request, future, on_token = await self._queue.get()
+            try:
+                analysis = await loop.run_in_executor(self._executor, self._run, request, on_token)
+            except Exception as e:
+                self.counters['failed'] += 1
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                self.counters['completed'] += 1
+                self.usage.merge(analysis.usage)
+                if not future.done():
+                    future.set_result(analysis.to_dict())
+            finally:
+                self._queue.task_done()
+
+    async def analyze(self, request, on_token=None):
+        """
+        Analysis dict for a normalized request.
+
+        Served from the cache, joined to an identical analysis already in
+        flight, or queued. on_token is called on the event loop with each
+        token dict as it is scored; cached and joined results are replayed.
+
+        Raises:
+            HTTPError: 429 when the queue is full
+        """
+        key = request_key(self.model, request)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self._replay(cached, on_token, cached=True)
+
+        if key in self._inflight:
+            self.counters['coalesced'] += 1
+            result = await asyncio.shield(self._inflight[key])
+            return self._replay(result, on_token, cached=False)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        thread_callback = (lambda token: loop.call_soon_threadsafe(on_token, token.to_dict())) if on_token else None
+        try:
+            self._queue.put_nowait((request, future, thread_callback))
+        except asyncio.QueueFull:
+            self.counters['rejected'] += 1
+            raise HTTPError(HTTPStatus.TOO_MANY_REQUESTS, "Service is saturated, retry later",
+                            {'Retry-After': '1'})
+
+        self.counters['accepted'] += 1
+        self._inflight[key] = future
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            self._inflight.pop(key, None)
+        self.cache.put(key, result)
+        return dict(result, cached=False)
+
+    @staticmethod
+    def _replay(result, on_token, cached):
+        if on_token:
+            for token in result['results']:
+                on_token(token)
+        return dict(result, cached=cached)
+
+    async def health(self):
+        # SQLite blocks; counted on the default executor, not the loop or the analysis workers
+        jobs = await asyncio.get_running_loop().run_in_executor(None, self.jobs.counts) if self.jobs else None
+        return {
+            'status': 'ok',
+            'model': self.model,
+            'workers': self.workers,
+            'queue': {'depth': self._queue.qsize() if self._queue else 0, 'capacity': self.queue_size},
+            'inflight': len(self._inflight),
+            'requests': dict(self.counters),
+            'cache': self.cache.to_dict(),
+            'usage': self.usage.to_dict(),
+            'jobs': jobs,
+        }
+
+
+async def _read_request(reader):
+    """(method, path, headers, body) of the next request, or None at EOF"""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, path, _ = line.decode('latin-1').split(' ', 2)
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length') or 0)
+    if length > MAX_BODY:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path.split('?', 1)[0], headers, body
+
+
+def _head(status, headers):
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+
+
+async def _send_json(writer, status, payload, headers=None, keep_alive=True):
+    data = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+    writer.write(_head(status, dict({
+        'Content-Type': 'application/json',
+        'Content-Length': str(len(data)),
+        'Connection': 'keep-alive' if keep_alive else 'close',
+    }, **(headers or {}))) + data)
+    await writer.drain()
+
+
+async def _send_stream(writer, service, request):
+    """Chunked NDJSON: token and region lines as tokens are scored, then the summary"""
+    from localization import ChangePointDetector
+    change_points = ChangePointDetector()
+    lines = asyncio.Queue()
+    job = asyncio.ensure_future(service.analyze(request, on_token=lines.put_nowait))
+
+    async def chunk(payload):
+        data = (json.dumps(payload, ensure_ascii=False, default=str) + "\n").encode('utf-8')
+        writer.write(f"{len(data):X}\r\n".encode('latin-1') + data + b"\r\n")
+        await writer.drain()
+
+    async def token_chunk(token):
+        await chunk(dict(token, event="token"))
+        for region in change_points.update(token):
+            await chunk(dict(region.to_dict(), event="region"))
+
+    # Wait for the first token (or the job) before committing to a 200
+    first = asyncio.ensure_future(lines.get())
+    await asyncio.wait([first, job], return_when=asyncio.FIRST_COMPLETED)
+    if job.done() and job.exception() is not None and lines.empty() and not first.done():
+        first.cancel()
+        raise job.exception()
+
+    writer.write(_head(HTTPStatus.OK, {
+        'Content-Type': 'application/x-ndjson',
+        'Transfer-Encoding': 'chunked',
+        'Connection': 'keep-alive',
+    }))
+    pending = first
+    while True:
+        if pending is None:
+            pending = asyncio.ensure_future(lines.get())
+        await asyncio.wait([pending, job], return_when=asyncio.FIRST_COMPLETED)
+        if pending.done():
+            await token_chunk(pending.result())
+            pending = None
+        elif job.done():
+            pending.cancel()
+            break
+    while not lines.empty():
+        await token_chunk(lines.get_nowait())
+    for region in change_points.finish():
+        await chunk(dict(region.to_dict(), event="region"))
+
+    try:
+        result = job.result()
+        summary = {k: v for k, v in result.items() if k != 'results'}
+        await chunk(dict(summary, event="done"))
+    except Exception as e:
+        await chunk({'event': 'error', 'error': str(e)})
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+async def _handle_jobs(writer, service, method, path, body, keep_alive):
+    """Submit (POST /jobs) or poll (GET /jobs/<id>) a durable job; returns the status sent"""
+    if service.jobs is None:
+        raise HTTPError(HTTPStatus.NOT_FOUND, "Job queue not enabled (start with --jobs)")
+    loop = asyncio.get_running_loop()  # SQLite blocks; keep it off the event loop
+
+    if path == '/jobs':
+        if method != 'POST':
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {path}")
+        request = parse_request(body)
+        options = json.loads(body)
+        priority = options.get('priority', 'default')
+        if priority not in PRIORITY_CLASSES:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Unknown priority class: {priority}")
+        job_id = await loop.run_in_executor(None, functools.partial(
+            service.jobs.submit, request, priority=priority, max_attempts=int(options.get('max_attempts', 3))))
+        await _send_json(writer, HTTPStatus.ACCEPTED, {'id': job_id, 'status': 'pending'},
+                         {'Location': f"/jobs/{job_id}"}, keep_alive=keep_alive)
+        return HTTPStatus.ACCEPTED
+
+    if method != 'GET':
+        raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {path}")
+    try:
+        job = await loop.run_in_executor(None, service.jobs.get, int(path[len('/jobs/'):]))
+    except ValueError:
+        job = None
+    if job is None:
+        raise HTTPError(HTTPStatus.NOT_FOUND, f"No job at {path}")
+    await _send_json(writer, HTTPStatus.OK, job, keep_alive=keep_alive)
+    return HTTPStatus.OK
+
+
+async def handle_connection(service, reader, writer):
+    """Serve requests on one keep-alive connection"""
+    try:
+        while True:
+            try:
+                parsed = await _read_request(reader)
+            except HTTPError as e:
+                await _send_json(writer, e.status, {'error': str(e)}, keep_alive=False)
+                break
+            if parsed is None:
+                break
+            method, path, headers, body = parsed
+            keep_alive = headers.get('connection', '').lower() != 'close'
+            started = time.perf_counter()
+            status = HTTPStatus.OK
+            try:
+                if method == 'GET' and path == '/health':
+                    await _send_json(writer, status, await service.health(), keep_alive=keep_alive)
+                elif method == 'POST' and path == '/analyze':
+                    result = await service.analyze(parse_request(body))
+                    await _send_json(writer, status, result, keep_alive=keep_alive)
+                elif method == 'POST' and path == '/analyze/stream':
+                    await _send_stream(writer, service, parse_request(body))
+                elif path == '/jobs' or path.startswith('/jobs/'):
+                    status = await _handle_jobs(writer, service, method, path, body, keep_alive)
+                elif path in ('/health', '/analyze', '/analyze/stream'):
+                    raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {path}")
+                else:
+                    raise HTTPError(HTTPStatus.NOT_FOUND, f"No route for {path}")
+            except HTTPError as e:
+                status = e.status
+                await _send_json(writer, status, {'error': str(e)}, e.headers, keep_alive=keep_alive)
+            except ValueError as e:
+                status = HTTPStatus.UNPROCESSABLE_ENTITY
+                await _send_json(writer, status, {'error': str(e)}, keep_alive=keep_alive)
+            except Exception as e:
+                status = HTTPStatus.BAD_GATEWAY
+                logger.error("Analysis failed: %s", e, extra=_event("service_error", path=path, error=str(e)))
+                await _send_json(writer, status, {'error': str(e)}, keep_alive=keep_alive)
+
+            elapsed = time.perf_counter() - started
+            logger.info("%s %s %d %.0fms", method, path, status.value, elapsed * 1000,
+                        extra=_event("request", method=method, path=path, status=status.value, elapsed=elapsed))
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(service, host="127.0.0.1", port=8080, ready=None):
+    """
+    Run the service until cancelled.
+
+    Args:
+        service: AnalysisService to expose
+        host, port: Address to listen on (port 0 picks a free port)
+        ready: Optional callback given the bound port once listening
+    """
+    await service.start()
+    server = await asyncio.start_server(lambda r, w: handle_connection(service, r, w), host, port)
+    bound = server.sockets[0].getsockname()[1]
+    logger.info("Listening on http://%s:%d (%d workers, queue %d)", host, bound, service.workers,
+                service.queue_size, extra=_event("service_start", host=host, port=bound,
+                                                 workers=service.workers, queue=service.queue_size))
+    if ready:
+        ready(bound)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main():
+    if sys.platform == 'win32':
+        import codecs
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+    load_environment()
+
+    parser = argparse.ArgumentParser(description="TamperCheck HTTP analysis service")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    parser.add_argument("--model", default="gpt-3.5-turbo", help="Model to score with")
+    parser.add_argument("--base-url", help="OpenAI-compatible API endpoint (e.g. a fake_model_server.py)")
+    parser.add_argument("--workers", type=int, default=4, help="Analyses run concurrently")
+    parser.add_argument("--queue", type=int, default=32, help="Queued analyses before answering 429")
+    parser.add_argument("--cache", type=int, default=1024, help="Finished analyses kept in the response cache")
+    parser.add_argument("--jobs", help="job_queue.py database to accept /jobs submissions into")
+    parser.add_argument("--rpm", type=int, help="Requests-per-minute rate limit")
+    parser.add_argument("--tpm", type=int, help="Tokens-per-minute rate limit")
+    parser.add_argument("--context-window", type=int, help="Prefix scoring sends only the last K tokens")
+    parser.add_argument("--local-model", help="Local model name/path for the local strategy")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="Logging level (INFO logs one line per request)")
+    parser.add_argument("--log-json", action="store_true", help="Write logs as JSON lines")
+    args = parser.parse_args()
+    configure_logging(args.log_level, json_lines=args.log_json)
+
+    try:
+        service = AnalysisService(
+            workers=args.workers,
+            queue_size=args.queue,
+            cache_size=args.cache,
+            jobs=JobQueue(args.jobs) if args.jobs else None,
+            model=args.model,
+            base_url=args.base_url,
+            # A local fake server accepts any key
+            api_key=os.getenv("OPENAI_API_KEY") or ("unused" if args.base_url else None),
+            rate_limiter=RateLimiter(args.rpm, args.tpm),
+            context_window=args.context_window,
+            local_model=args.local_model
+        )
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
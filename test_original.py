@@ -19,6 +19,8 @@ if sys.platform == 'win32':
 from openai import OpenAI
 from colorama import Fore, Style, init as colorama_init
 
+from tampercheck import TamperDetector
+
 colorama_init(autoreset=True)
 
 
@@ -89,18 +91,15 @@ def analyze_all_tokens(client, context_prompt, text_to_analyze, label):
                         break
                 
                 # Determine status
-                if our_token_found and our_token_prob > 20:
+                status_text = TamperDetector.classify_status(our_token_found, our_token_prob)
+                if status_text == "HIGH":
                     status = f"{Fore.GREEN}✓ HIGH ({our_token_prob:.1f}%)"
-                    status_text = "HIGH"
-                elif our_token_found and our_token_prob > 5:
+                elif status_text == "MEDIUM":
                     status = f"{Fore.YELLOW}○ MED ({our_token_prob:.1f}%)"
-                    status_text = "MEDIUM"
-                elif our_token_found:
+                elif status_text == "LOW":
                     status = f"{Fore.RED}! LOW ({our_token_prob:.1f}%)"
-                    status_text = "LOW"
                 else:
                     status = f"{Fore.RED}✗ NOT IN TOP 5"
-                    status_text = "NOT_FOUND"
                 
                 top_pref = top_alternatives[0]['token'] if top_alternatives else "N/A"
                 top_prob = top_alternatives[0]['probability'] if top_alternatives else 0
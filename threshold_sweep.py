@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Threshold Sweep for TamperCheck
+Re-score stored per-token results under thousands of threshold settings
+without any API calls, and report ROC/PR curves for document detection
+
+A document is flagged when it contains a suspicious region: a run of at least
+`min_cluster` consecutive tokens that are NOT_FOUND or below the low
+threshold (the same rule TamperDetector._find_suspicious_regions applies).
+As in TamperDetector._classify, a token exactly at a threshold gets the
+higher level, so a swept setting reproduces the detector's result.
+All (low, min_cluster) combinations are evaluated at once on a padded
+documents x tokens probability matrix, so the sweep costs a few array passes
+regardless of how many settings are tried.
+
+--score entropy sweeps the same rule over entropy-adjusted probabilities,
+100 * exp(entropy - surprise), with the entropy estimated from each
+token's stored top-k alternatives. A token is then "low" when it is much
+less likely than a typical choice at its position, not merely unlikely.
+The results are in the same units, so the two curves compare directly.
+
+Usage:
+    python threshold_sweep.py
+    python threshold_sweep.py --fixtures full_analysis_results.json other.json
+    python threshold_sweep.py --low 0.5:50:0.5 --clusters 1:10 --edited other.json
+    python threshold_sweep.py --score entropy
+"""
+
+import sys
+import json
+import argparse
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+import numpy as np
+from colorama import Fore, Style, init as colorama_init
+
+from tampercheck import TamperDetector
+from window_benchmark import DEFAULT_FIXTURES, load_fixtures
+from localization import topk_features
+
+colorama_init(autoreset=True)
+
+
+# Current defaults, in percent, for comparison with the best setting found
+DEFAULT_HIGH_PCT = TamperDetector.HIGH_THRESHOLD * 100
+DEFAULT_LOW_PCT = TamperDetector.LOW_THRESHOLD * 100
+DEFAULT_CLUSTER = TamperDetector.MIN_CLUSTER_SIZE
+
+
+def parse_range(spec, cast=float):
+    """'start:stop:step' (inclusive), 'a,b,c' or a single value -> list"""
+    if ':' in spec:
+        parts = [cast(p) for p in spec.split(':')]
+        start, stop = parts[0], parts[1]
+        step = parts[2] if len(parts) > 2 else cast(1)
+        values = np.arange(start, stop + step / 2, step)
+        return [cast(round(v, 6)) for v in values]
+    return [cast(v) for v in spec.split(',')]
+
+
+def document_label(document, edited=(), authentic=()):
+    """
+    1 if the document was edited, 0 if it is untouched model output.
+    Explicit --edited/--authentic name matches win over the stored type.
+    """
+    if any(pattern in document['name'] for pattern in edited):
+        return 1
+    if any(pattern in document['name'] for pattern in authentic):
+        return 0
+    return 0 if document.get('type', 'original') == 'original' else 1
+
+
+def build_matrix(documents, score="probability"):
+    """
+    Pad per-token results into arrays.
+
+    Args:
+        documents: Loaded fixture documents
+        score: "probability" for the stored probabilities, or "entropy" for
+               entropy-adjusted ones (NOT_FOUND tokens then get a score too,
+               so every real cell counts as found)
+
+    Returns:
+        (probability, found, valid): documents x max_tokens arrays of the
+        token's probability in percent, whether it was in the top
+        alternatives, and whether the cell holds a real (non-ERROR) token
+    """
+    rows = [[r for r in sorted(d['results'], key=lambda r: r['position']) if r.get('status') != 'ERROR']
+            for d in documents]
+    width = max((len(r) for r in rows), default=0)
+
+    probability = np.zeros((len(rows), width))
+    found = np.zeros((len(rows), width), dtype=bool)
+    valid = np.zeros((len(rows), width), dtype=bool)
+    for i, results in enumerate(rows):
+        n = len(results)
+        if score == "entropy":
+            probability[i, :n] = 100 * np.exp(-topk_features(results)['excess'])
+            found[i, :n] = True
+        else:
+            probability[i, :n] = [r.get('probability', 0.0) for r in results]
+            found[i, :n] = [r.get('found', False) for r in results]
+        valid[i, :n] = True
+
+    return probability, found, valid
+
+
+def run_lengths(flags):
+    """
+    Length of the current run of True values ending at every position,
+    along the last axis (0 where the flag is False)
+    """
+    index = np.arange(flags.shape[-1])
+    last_break = np.maximum.accumulate(np.where(flags, -1, index), axis=-1)
+    return np.where(flags, index - last_break, 0)
+
+
+def sweep(probability, found, valid, labels, lows, clusters):
+    """
+    Evaluate every (low, min_cluster) pair.
+
+    Returns:
+        Dict of arrays shaped (len(lows), len(clusters)) with confusion
+        counts and region counts, plus per-low token flag rates
+    """
+    lows = np.asarray(lows, dtype=float)
+    clusters = np.asarray(clusters)
+    labels = np.asarray(labels, dtype=bool)
+
+    # (lows, documents, tokens): token is low/NOT_FOUND under each threshold
+    flags = (~found | (probability < lows[:, None, None])) & valid
+    runs = run_lengths(flags)
+    longest = runs.max(axis=-1)
+
+    # Every run of length >= C passes through run length == C exactly once
+    regions = np.stack([(runs == c).sum(axis=-1) for c in clusters], axis=1)
+    flagged = longest[:, None, :] >= clusters[None, :, None]
+
+    tp = (flagged & labels).sum(axis=-1)
+    fp = (flagged & ~labels).sum(axis=-1)
+    fn = labels.sum() - tp
+    tn = (~labels).sum() - fp
+
+    token_rate = flags.sum(axis=(1, 2)) / max(valid.sum(), 1) * 100
+
+    return {'tp': tp, 'fp': fp, 'tn': tn, 'fn': fn, 'regions': regions.sum(axis=-1), 'token_flag_rate': token_rate}
+
+
+def _ratio(num, den):
+    return np.divide(num, den, out=np.zeros(np.shape(num), dtype=float), where=np.asarray(den) > 0)
+
+
+def metrics(counts):
+    """Add tpr/fpr/precision/recall/f1 arrays to the sweep counts"""
+    tp, fp, tn, fn = counts['tp'], counts['fp'], counts['tn'], counts['fn']
+    recall = _ratio(tp, tp + fn)
+    precision = _ratio(tp, tp + fp)
+    return dict(counts,
+                tpr=recall,
+                fpr=_ratio(fp, fp + tn),
+                precision=precision,
+                recall=recall,
+                f1=_ratio(2 * precision * recall, precision + recall))
+
+
+def roc_auc(fpr, tpr):
+    """Area under the ROC points (anchored at (0,0) and (1,1))"""
+    points = sorted(set(zip(fpr, tpr)) | {(0.0, 0.0), (1.0, 1.0)})
+    xs, ys = zip(*points)
+    return float(np.trapezoid(ys, xs)) if hasattr(np, 'trapezoid') else float(np.trapz(ys, xs))
+
+
+def high_sweep(probability, found, valid, labels, highs):
+    """Mean HIGH-token rate of authentic vs edited documents per high threshold"""
+    highs = np.asarray(highs, dtype=float)
+    labels = np.asarray(labels, dtype=bool)
+    tokens = np.maximum(valid.sum(axis=-1), 1)
+    high = ((probability >= highs[:, None, None]) & found & valid).sum(axis=-1) / tokens * 100
+
+    rows = []
+    for i, h in enumerate(highs):
+        rows.append({
+            'high': float(h),
+            'authentic_high_pct': float(high[i, ~labels].mean()) if (~labels).any() else None,
+            'edited_high_pct': float(high[i, labels].mean()) if labels.any() else None
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep detection thresholds over stored results (no API calls)")
+    parser.add_argument("--fixtures", nargs="+", default=DEFAULT_FIXTURES, help="Stored result files")
+    parser.add_argument("--low", default="0.5:50:0.5", help="Low thresholds in percent (start:stop:step or a,b,c)")
+    parser.add_argument("--high", default="5:95:5", help="High thresholds in percent")
+    parser.add_argument("--clusters", default="1:10", help="Minimum cluster sizes")
+    parser.add_argument("--score", choices=["probability", "entropy"], default="probability",
+                        help="Token score to threshold: raw or entropy-adjusted probability")
+    parser.add_argument("--edited", nargs="*", default=[], help="Document names (substrings) to treat as edited")
+    parser.add_argument("--authentic", nargs="*", default=[], help="Document names (substrings) to treat as authentic")
+    parser.add_argument("--output", default="threshold_sweep_results.json", help="Where to save the results")
+    args = parser.parse_args()
+
+    lows = parse_range(args.low)
+    highs = parse_range(args.high)
+    clusters = parse_range(args.clusters, cast=int)
+
+    print(f"{Fore.CYAN}{Style.BRIGHT}")
+    print("="*80)
+    print("  THRESHOLD SWEEP")
+    print("  Offline re-scoring of stored results")
+    print("="*80)
+    print(Style.RESET_ALL)
+
+    documents = load_fixtures(args.fixtures)
+    labels = [document_label(d, args.edited, args.authentic) for d in documents]
+    for document, label in zip(documents, labels):
+        color = Fore.RED if label else Fore.GREEN
+        print(f"  {color}{'edited   ' if label else 'authentic'}{Style.RESET_ALL} {document['name']}")
+
+    if not documents or all(labels) or not any(labels):
+        print(f"\n{Fore.RED}Need at least one edited and one authentic document to sweep.")
+        sys.exit(1)
+
+    probability, found, valid = build_matrix(documents, args.score)
+    results = metrics(sweep(probability, found, valid, labels, lows, clusters))
+
+    print(f"\n{Fore.WHITE}{len(documents)} documents, {int(valid.sum())} tokens, "
+          f"{len(lows) * len(clusters)} threshold combinations, {len(highs)} high thresholds")
+
+    grid = []
+    for i, low in enumerate(lows):
+        for j, cluster in enumerate(clusters):
+            grid.append({
+                'low': low,
+                'min_cluster': cluster,
+                'token_flag_rate': float(results['token_flag_rate'][i]),
+                'regions': int(results['regions'][i, j]),
+                **{k: int(results[k][i, j]) for k in ('tp', 'fp', 'tn', 'fn')},
+                **{k: float(results[k][i, j]) for k in ('tpr', 'fpr', 'precision', 'recall', 'f1')}
+            })
+
+    curves = {}
+    for j, cluster in enumerate(clusters):
+        roc = [{'low': low, 'fpr': float(results['fpr'][i, j]), 'tpr': float(results['tpr'][i, j])}
+               for i, low in enumerate(lows)]
+        pr = [{'low': low, 'precision': float(results['precision'][i, j]), 'recall': float(results['recall'][i, j])}
+              for i, low in enumerate(lows)]
+        curves[str(cluster)] = {
+            'roc': roc,
+            'pr': pr,
+            'auc': roc_auc([p['fpr'] for p in roc], [p['tpr'] for p in roc])
+        }
+
+    # Best F1; ties go to the fewest false positives, then the lowest threshold
+    best = max(grid, key=lambda g: (g['f1'], -g['fp'], -g['low'], -g['min_cluster']))
+    default = next((g for g in grid if g['low'] == DEFAULT_LOW_PCT and g['min_cluster'] == DEFAULT_CLUSTER), None)
+
+    print(f"\n{Fore.CYAN}{Style.BRIGHT}ROC AUC by minimum cluster size{Style.RESET_ALL}")
+    for cluster in clusters:
+        print(f"  min_cluster={cluster:<3} AUC {curves[str(cluster)]['auc']:.3f}")
+
+    def describe(g):
+        return (f"low={g['low']:.1f}% min_cluster={g['min_cluster']}  "
+                f"F1 {g['f1']:.2f}  TPR {g['tpr']:.2f}  FPR {g['fpr']:.2f}  "
+                f"tokens flagged {g['token_flag_rate']:.1f}%")
+
+    print(f"\n{Fore.GREEN}Best:    {describe(best)}")
+    if default:
+        print(f"{Fore.WHITE}Default: {describe(default)}")
+
+    output = {
+        'metadata': {
+            'fixtures': args.fixtures,
+            'documents': [{'name': d['name'], 'edited': bool(l)} for d, l in zip(documents, labels)],
+            'tokens': int(valid.sum()),
+            'score': args.score,
+            'defaults': {'high': DEFAULT_HIGH_PCT, 'low': DEFAULT_LOW_PCT, 'min_cluster': DEFAULT_CLUSTER}
+        },
+        'best': best,
+        'default': default,
+        'curves': curves,
+        'high_sweep': high_sweep(probability, found, valid, labels, highs),
+        'grid': grid
+    }
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+
+    print(f"\n{Fore.GREEN}✓ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,8 @@ if sys.platform == 'win32':
 from openai import OpenAI
 from colorama import Fore, Style, init as colorama_init
 
+from tampercheck import TamperDetector
+
 colorama_init(autoreset=True)
 
 
@@ -95,13 +97,14 @@ def analyze_token_by_token(client, context_prompt, edited_text):
                         break
                 
                 # Determine status
-                if our_token_found and our_token_prob > 20:
+                status_text = TamperDetector.classify_status(our_token_found, our_token_prob)
+                if status_text == "HIGH":
                     status = f"{Fore.GREEN}HIGH PROB"
                     in_top = f"{Fore.GREEN}Yes ({our_token_prob:.1f}%)"
-                elif our_token_found and our_token_prob > 5:
+                elif status_text == "MEDIUM":
                     status = f"{Fore.YELLOW}MEDIUM"
                     in_top = f"{Fore.YELLOW}Yes ({our_token_prob:.1f}%)"
-                elif our_token_found:
+                elif status_text == "LOW":
                     status = f"{Fore.RED}LOW PROB"
                     in_top = f"{Fore.RED}Yes ({our_token_prob:.1f}%)"
                 else:
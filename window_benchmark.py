@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Sliding-Window Benchmark
+Compare bounded-context prefix scoring (last K tokens) against the stored
+full-prefix results, to choose K for multi-page documents
+"""
+
+import os
+import sys
+import json
+import argparse
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+from colorama import Fore, Style, init as colorama_init
+
+from tampercheck import TamperDetector, plan_scoring
+
+colorama_init(autoreset=True)
+
+
+# Prompt used by full_analysis.py / test_original.py for the robot story
+DEFAULT_PROMPT = "Write a short story about a robot learning to paint. Keep it to 2-3 sentences."
+
+# Same cut-off full_analysis.generate_html uses to call a document tampered
+TAMPERED_NOT_FOUND_PCT = 10
+
+DEFAULT_FIXTURES = [
+    'original_analysis_results.json',
+    'full_analysis_results.json',
+    'scientific_validation_results.json',
+]
+
+
+def load_fixtures(paths):
+    """
+    Load stored full-prefix results as a list of
+    {'name', 'prompt', 'text', 'type', 'results'} documents
+
+    'type' is 'original' for untouched model output and the edit type
+    otherwise ('edited' for full_analysis.py's hand-edited story).
+    """
+    documents = []
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"{Fore.YELLOW}Skipping missing fixture: {path}")
+            continue
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if isinstance(data, list):
+            # Bare result list (full_analysis.py) - the text is rebuilt from
+            # the tokens; a gap in positions was a skipped whitespace token
+            text = ""
+            last_position = -1
+            for r in sorted(data, key=lambda r: r['position']):
+                if r['position'] > last_position + 1:
+                    text += " "
+                text += r['token']
+                last_position = r['position']
+            documents.append({'name': path, 'prompt': DEFAULT_PROMPT, 'text': text,
+                              'type': 'edited', 'results': data})
+        elif 'individual_tests' in data:
+            for test in data['individual_tests']:
+                documents.append({
+                    'name': f"{path}:{test['test_id']}",
+                    'prompt': test['prompt'],
+                    'text': test['text'],
+                    'type': test.get('type', 'original'),
+                    'results': test['results']
+                })
+        elif 'results' in data:
+            documents.append({
+                'name': path,
+                'prompt': data.get('context', DEFAULT_PROMPT),
+                'text': data['text'],
+                'type': data.get('type', 'original'),
+                'results': data['results']
+            })
+        else:
+            print(f"{Fore.YELLOW}Skipping unrecognized fixture: {path}")
+
+    return documents
+
+
+def reference_statuses(results):
+    """Map position -> status for stored script results"""
+    return {r['position']: r['status'] for r in results if r.get('status') != 'ERROR'}
+
+
+def analysis_statuses(analysis):
+    """Map position -> status for a TamperAnalysis, in the scripts' vocabulary"""
+    return {t.position: ('NOT_FOUND' if not t.found else t.level.name) for t in analysis.tokens}
+
+
+def document_verdict(statuses):
+    """'TAMPERED' or 'AUTHENTIC' by NOT_FOUND rate"""
+    if not statuses:
+        return 'AUTHENTIC'
+    not_found_pct = sum(1 for s in statuses.values() if s == 'NOT_FOUND') / len(statuses) * 100
+    return 'TAMPERED' if not_found_pct > TAMPERED_NOT_FOUND_PCT else 'AUTHENTIC'
+
+
+def compare_statuses(reference, candidate):
+    """
+    Token-level agreement between two position -> status maps
+    """
+    shared = [p for p in reference if p in candidate]
+    if not shared:
+        return {'tokens': 0, 'status_agreement': 0, 'flag_agreement': 0}
+
+    flagged = ('LOW', 'NOT_FOUND')
+    same_status = sum(1 for p in shared if reference[p] == candidate[p])
+    same_flag = sum(1 for p in shared if (reference[p] in flagged) == (candidate[p] in flagged))
+
+    return {
+        'tokens': len(shared),
+        'status_agreement': same_status / len(shared) * 100,
+        'flag_agreement': same_flag / len(shared) * 100
+    }
+
+
+def estimate_prompt_tokens(document, window):
+    """Planner estimate of prefix-scoring prompt tokens (no API calls)"""
+    context = [{"role": "user", "content": document['prompt']}]
+    plan = plan_scoring("gpt-3.5-turbo", context, document['text'], context_window=window)
+    prefix = next(e for e in plan.estimates if e.strategy.value == 'prefix')
+    return prefix.prompt_tokens, prefix.estimated_cost
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sliding-window prefix scoring against full-prefix results")
+    parser.add_argument("--fixtures", nargs="+", default=DEFAULT_FIXTURES, help="Stored result files to compare against")
+    parser.add_argument("--windows", default="8,16,32,64", help="Comma-separated window sizes (tokens)")
+    parser.add_argument("--model", default="gpt-3.5-turbo", help="Model the fixtures were scored with")
+    parser.add_argument("--dry-run", action="store_true", help="Only estimate cost per window, no API calls")
+    parser.add_argument("--output", default="window_benchmark_results.json", help="Where to save the results")
+    args = parser.parse_args()
+
+    windows = [int(k) for k in args.windows.split(",")]
+
+    print(f"{Fore.CYAN}{Style.BRIGHT}")
+    print("="*80)
+    print("  SLIDING-WINDOW BENCHMARK")
+    print("  Bounded-context prefix scoring vs full-prefix results")
+    print("="*80)
+    print(Style.RESET_ALL)
+
+    documents = load_fixtures(args.fixtures)
+    print(f"{Fore.WHITE}Loaded {len(documents)} documents from {len(args.fixtures)} fixtures")
+
+    detector = None if args.dry_run else TamperDetector(model=args.model)
+
+    rows = []
+    for document in documents:
+        reference = reference_statuses(document['results'])
+        full_tokens, full_cost = estimate_prompt_tokens(document, None)
+
+        print(f"\n{Fore.CYAN}{Style.BRIGHT}{document['name']}{Style.RESET_ALL} "
+              f"({len(reference)} tokens, full prefix ~{full_tokens} prompt tokens)")
+
+        for window in windows:
+            est_tokens, est_cost = estimate_prompt_tokens(document, window)
+            row = {
+                'document': document['name'],
+                'window': window,
+                'tokens': len(reference),
+                'full_prompt_tokens_est': full_tokens,
+                'window_prompt_tokens_est': est_tokens,
+                'prompt_token_ratio': est_tokens / full_tokens if full_tokens else 0,
+                'full_cost_est': full_cost,
+                'window_cost_est': est_cost
+            }
+
+            if detector is not None:
+                detector.context_window = window
+                context = [{"role": "user", "content": document['prompt']}]
+                analysis = detector.analyze(context, document['text'], strategy="prefix")
+                candidate = analysis_statuses(analysis)
+
+                row.update(compare_statuses(reference, candidate))
+                row['reference_verdict'] = document_verdict(reference)
+                row['window_verdict'] = document_verdict(candidate)
+                row['verdict_agrees'] = row['reference_verdict'] == row['window_verdict']
+                row['usage'] = analysis.usage.to_dict()
+
+            rows.append(row)
+
+            line = f"  K={window:<4} prompt tokens {est_tokens:>7} ({row['prompt_token_ratio']*100:5.1f}% of full)"
+            if 'status_agreement' in row:
+                color = Fore.GREEN if row['verdict_agrees'] else Fore.RED
+                line += (f"  status {row['status_agreement']:5.1f}%  flags {row['flag_agreement']:5.1f}%"
+                         f"  {color}verdict {row['window_verdict']}")
+            print(line)
+
+    # Summary per window across all documents
+    print(f"\n{Fore.CYAN}{Style.BRIGHT}{'='*80}")
+    print("SUMMARY")
+    print(f"{'='*80}{Style.RESET_ALL}")
+
+    summary = []
+    for window in windows:
+        window_rows = [r for r in rows if r['window'] == window]
+        full = sum(r['full_prompt_tokens_est'] for r in window_rows)
+        bounded = sum(r['window_prompt_tokens_est'] for r in window_rows)
+        entry = {
+            'window': window,
+            'prompt_token_ratio': bounded / full if full else 0,
+            'documents': len(window_rows)
+        }
+        scored = [r for r in window_rows if 'status_agreement' in r]
+        if scored:
+            entry['mean_status_agreement'] = sum(r['status_agreement'] for r in scored) / len(scored)
+            entry['mean_flag_agreement'] = sum(r['flag_agreement'] for r in scored) / len(scored)
+            entry['verdict_agreement'] = sum(1 for r in scored if r['verdict_agrees']) / len(scored) * 100
+        summary.append(entry)
+
+        line = f"  K={window:<4} cost {entry['prompt_token_ratio']*100:5.1f}% of full prefix"
+        if scored:
+            line += (f", status agreement {entry['mean_status_agreement']:.1f}%"
+                     f", verdict agreement {entry['verdict_agreement']:.0f}%")
+        print(line)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'summary': summary, 'rows': rows}, f, indent=2, ensure_ascii=False)
+
+    print(f"\n{Fore.GREEN}✓ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()